@@ -0,0 +1,52 @@
+#!/bin/bash
+
+handle_error() {
+    echo "An error occurred on line $1"
+    exit 1
+}
+
+trap 'handle_error $LINENO' ERR
+
+# Gets location of this script and uses it as a base
+SCRIPTPATH="$( cd -- "$(dirname "$0")" >/dev/null 2>&1 ; pwd -P )"
+
+# Brings the database design up to date: the v1.0 design is deployed if the database is empty, then every script of
+# the migrations folder not applied yet is applied, in version order, each one in a single transaction along with
+# its record in app.schema_migrations. Running it again only applies the new scripts.
+# A database found already deployed is recorded as v1.0 without running anything, so the v1.0 script must never be
+# edited: every change of the design, even a new index, goes into a migration script that such databases get too.
+# The scripts are named '<version>-<description>.sql'. psql runs in the database container unless the PSQL
+# environment variable gives another command, e.g. PSQL="psql -h localhost -p 5000 -U postgres".
+PSQL=${PSQL:-"docker exec -i virtualization-level-1-prototype-app-db-1 psql -U postgres"}
+
+run_psql() {
+    $PSQL -X -q -v ON_ERROR_STOP=1 "$@"
+}
+
+echo Migrating Database design
+
+run_psql -c 'SET client_min_messages = warning' -c 'CREATE SCHEMA IF NOT EXISTS app' \
+         -c 'CREATE TABLE IF NOT EXISTS app.schema_migrations (version TEXT PRIMARY KEY, applied_at TIMESTAMPTZ NOT NULL DEFAULT now())'
+applied=$(run_psql -At -c 'SELECT version FROM app.schema_migrations')
+
+if ! grep -qx '1.0' <<< "$applied"; then
+    if [[ $(run_psql -At -c "SELECT to_regclass('app.\"Task\"') IS NOT NULL") == "t" ]]; then
+        echo "Design v1.0 already deployed"
+    else
+        echo "Deploying design v1.0"
+        run_psql < "$SCRIPTPATH/simple-app-db-v1.0.sql"
+    fi
+    run_psql -c "INSERT INTO app.schema_migrations (version) VALUES ('1.0')"
+fi
+
+for script in $(ls "$SCRIPTPATH"/migrations/*.sql | sort -V); do
+    version=$(basename "$script" | cut -d- -f1)
+    if grep -qx "$version" <<< "$applied"; then
+        continue
+    fi
+    echo "Applying design v$version"
+    { cat "$script"; echo "INSERT INTO app.schema_migrations (version) VALUES ('$version');"; } | run_psql --single-transaction
+done
+
+echo "Database design is up to date"
+exit 0
@@ -0,0 +1,7 @@
+-- Schema v1.0.1, applied on top of v1.0 by migrate_db.sh within a single transaction.
+
+-- Partial index of the active due dates, used to list the upcoming and overdue ones by date range (GET /due-by).
+-- It may already have been created by hand on databases deployed before this script existed.
+CREATE INDEX IF NOT EXISTS due_by_active_due_date_idx
+    ON app."Due_by" (due_date, task_id)
+    WHERE is_active;
@@ -0,0 +1,24 @@
+-- Schema v1.1, applied on top of v1.0.1 by migrate_db.sh within a single transaction.
+
+-- The trigger used to run its function, and an UPDATE of Due_by, for every updated row of Task, even when only the
+-- name or the description changed. It now only fires when the status column is part of the update and the task
+-- actually moves into the 'Deleted' or 'Dropped' status, the WHEN condition being checked without calling the function.
+DROP TRIGGER IF EXISTS task_status_update_trigger ON app."Task";
+
+CREATE TRIGGER task_status_update_trigger
+AFTER UPDATE OF task_status ON app."Task"
+FOR EACH ROW
+WHEN (NEW.task_status IN ('Deleted', 'Dropped') AND OLD.task_status IS DISTINCT FROM NEW.task_status)
+EXECUTE FUNCTION update_due_by_status();
+
+-- Task listing filtered by status (GET /tasks?task_status=...), in the order of the keyset pagination
+CREATE INDEX IF NOT EXISTS task_status_id_idx
+    ON app."Task" (task_status, id);
+
+-- Task listing leaving out the removed tasks (GET /tasks?exclude_removed=true), which usually are most of the table
+CREATE INDEX IF NOT EXISTS task_not_removed_id_idx
+    ON app."Task" (id)
+    WHERE task_status NOT IN ('Deleted', 'Dropped');
+
+-- The active due dates of a task (GET /tasks?include=active_due_by, and the ones deactivated by the trigger) are
+-- looked up through the primary key of Due_by, which starts with task_id, no other index is needed for them.
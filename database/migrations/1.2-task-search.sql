@@ -0,0 +1,21 @@
+-- Schema v1.2, applied on top of v1.1 by migrate_db.sh within a single transaction.
+-- Search of the tasks by keyword (GET /tasks/search), see db_task_actions.compose_task_search_query().
+
+-- Trigram matching, shipped with the contrib modules of PostgreSQL
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Words of the name (weight A) and of the description (weight B) of each task, kept up to date by PostgreSQL on every
+-- insert and update. The 'simple' configuration only lowercases the words, without stemming them, so that prefixes
+-- typed by the users match the words as they were written.
+ALTER TABLE app."Task"
+    ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+    GENERATED ALWAYS AS (setweight(to_tsvector('simple', task_name), 'A') ||
+                         setweight(to_tsvector('simple', coalesce(task_descrip, '')), 'B')) STORED;
+
+-- Full-text matching of the words, and of their prefixes, of the names and descriptions
+CREATE INDEX IF NOT EXISTS task_search_vector_idx
+    ON app."Task" USING GIN (search_vector);
+
+-- Typo-tolerant matching of the names (word similarity, the '<%' operator of pg_trgm)
+CREATE INDEX IF NOT EXISTS task_name_trgm_idx
+    ON app."Task" USING GIN (task_name gin_trgm_ops);
@@ -1,18 +1,76 @@
+from importlib import import_module
+from typing import Optional
 from flask import Flask
 from flask_cors import CORS
-from rest_api import tasks_operations_api
-from rest_api import due_by_operations_api
+from rest_api import api_json_provider
+from database_operations import db_config, db_logging
 
-# Imports for testing and debugging:
-from testing import flask_api_ut
-from testing import db_actions_it
+# Blueprints the app can serve, by the name used in the [api] section of database.ini: the module defining each one
+# and its attribute. A module is only imported when its blueprint is registered.
+BLUEPRINTS = {
+    "logging": ("rest_api.logging_operations_api", "logging_api"),
+    "tasks": ("rest_api.tasks_operations_api", "tasks_api"),
+    "due_by": ("rest_api.due_by_operations_api", "due_by_api"),
+    "metrics": ("rest_api.metrics_operations_api", "metrics_api"),
+    # For testing and debugging. The admin routes aren't authenticated: they reload the configuration (resetting the
+    # pools and the cache) and expose internal counters, so they must not be reachable in production.
+    "admin": ("rest_api.admin_operations_api", "admin_api"),
+    "basic": ("testing.flask_api_ut", "basic_flask_api"),
+}
+DEFAULT_BLUEPRINTS = "logging,tasks,due_by,metrics"
+DEFAULT_DEBUG_BLUEPRINTS = "admin,basic"
 
-#Declare Flask app
-app = Flask(__name__)
-app.register_blueprint(flask_api_ut.basic_flask_api)
-app.register_blueprint(tasks_operations_api.tasks_api)
-app.register_blueprint(due_by_operations_api.due_by_api)
-CORS(app)
+def blueprint_names(api_config, debug: bool) -> list:
+    """
+    Lists the blueprints to register, in order: the 'blueprints' of the [api] section, followed by its
+    'debug_blueprints' in debug mode only.
+
+    Args:
+        api_config (Mapping[str, str]): The [api] section of the configuration.
+        debug (bool): Whether the app runs in debug mode.
+
+    Returns:
+        list: The names of the blueprints, keys of BLUEPRINTS.
+
+    Raises:
+        ValueError: If a configured blueprint is unknown.
+    """
+    names = api_config.get("blueprints", DEFAULT_BLUEPRINTS).split(',')
+    if debug:
+        names += api_config.get("debug_blueprints", DEFAULT_DEBUG_BLUEPRINTS).split(',')
+    names = [name.strip() for name in names if name.strip()]
+    for name in names:
+        if name not in BLUEPRINTS:
+            raise ValueError('Unknown blueprint: {}'.format(name))
+    return names
+
+def create_app(config: Optional[db_config.AppConfig] = None) -> Flask:
+    """
+    Creates the Flask app, with the blueprints of the configuration, and sets up the logging of the process.
+    `flask run` and `gunicorn 'app:create_app()'` both call it.
+
+    It doesn't connect to the database: the connection pool is created on first use, so that an app preloaded by the
+    master process of gunicorn (see gunicorn.conf.py) gets one pool per worker process, created after the fork.
+
+    Args:
+        config (db_config.AppConfig, optional): The configuration. Defaults to the current one.
+
+    Returns:
+        Flask: The app.
+    """
+    # Load the configuration once at startup, it is reloaded on SIGHUP or, in debug mode, through '/admin/config/reload'
+    config = config or db_config.get_config()
+    app = Flask(__name__)
+    app.json = api_json_provider.create_json_provider(app, config)
+    # The testing blueprints are left out unless the app runs in debug mode (FLASK_DEBUG)
+    for name in blueprint_names(config.section('api'), app.debug):
+        module_name, attribute = BLUEPRINTS[name]
+        app.register_blueprint(getattr(import_module(module_name), attribute))
+    CORS(app)
+
+    db_config.install_reload_signal_handler()
+    db_logging.configure_logging(config)
+    return app
 
 
 def main():
@@ -25,5 +83,11 @@ if __name__ == "__main__":
     # By running the following line, it will launch of Integration Tests between the python and postgres containers
     # do so with the following command: `docker exec virtualization-level-1-prototype-app-python-1 python3 app.py`
     # Otherwise, this app is meant to be launched and runs automatically with the raising of the docker container
+    from testing import db_actions_it
+    from testing import config_it
+    from testing import schema_it
+    from testing import cache_it
     db_actions_it.initial_testing_console()
-    
\ No newline at end of file
+    config_it.config_testing_console()
+    cache_it.cache_testing_console()
+    schema_it.schema_testing_console()
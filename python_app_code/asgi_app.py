@@ -0,0 +1,24 @@
+from quart import Quart
+from quart_cors import cors
+from rest_api import async_tasks_operations_api
+from rest_api import async_due_by_operations_api
+from database_operations import db_config, db_logging, async_db_pool
+
+# This script defines the asyncio (ASGI) variant of the app, serving the same task and due date endpoints as app.py.
+# It requires the optional packages of requirements-async.txt and is launched with an ASGI server, e.g.:
+# `hypercorn asgi_app:app --bind 0.0.0.0:5001`
+
+#Declare Quart app
+app = Quart(__name__)
+app.register_blueprint(async_tasks_operations_api.tasks_api)
+app.register_blueprint(async_due_by_operations_api.due_by_api)
+app = cors(app)
+
+# Load the configuration once at startup, it is reloaded on SIGHUP
+db_config.get_config()
+db_config.install_reload_signal_handler()
+db_logging.configure_logging()
+
+@app.after_serving
+async def close_database_pool():
+    await async_db_pool.close_pool()
@@ -0,0 +1,182 @@
+from database_operations import async_db_pool as adbp, db_cache as dbch, db_due_by_actions as dbdba, db_models as dbmo
+from datetime import date
+from typing import Optional, Tuple
+import logging
+
+# This script defines the asyncio variant of the operations of db_due_by_actions, on top of asyncpg.
+# The functions return the same values as their synchronous counterparts.
+
+logger = logging.getLogger(__name__)
+
+async def get_due_by(task_id: int) -> list:
+    """
+    Retrieve all due dates of a given task from the Due_by table, see db_due_by_actions.get_due_by().
+
+    Args:
+        task_id (int): The ID of the task.
+
+    Returns:
+        list: A list of DueBy records (see db_models), sorted by due date.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    return (await get_versioned_due_by(task_id))[1]
+
+async def get_versioned_due_by(task_id: int) -> Tuple[Optional[str], list]:
+    """
+    Retrieve all due dates of a given task along with their version, see db_due_by_actions.get_versioned_due_by().
+
+    Args:
+        task_id (int): The ID of the task.
+
+    Returns:
+        tuple: A tuple containing the version of the due dates (None if the task has no due date) and the list
+               of their DueBy records.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    select_query = ('SELECT {0}, (SELECT {1} FROM app."Due_by" WHERE task_id = $1) FROM app."Due_by" WHERE task_id = $1 '
+                    'ORDER BY due_date').format(dbdba.DUE_BY_SELECT_LIST, dbdba.DUE_DATES_VERSION)
+    try:
+        async with adbp.connection() as conn:
+            rows = await conn.fetch(select_query, int(task_id))
+            return (rows[0][-1] if rows else None), dbmo.from_rows(dbmo.DueBy, [tuple(row)[:-1] for row in rows])
+    except Exception as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+async def get_due_by_version(task_id: int) -> Optional[str]:
+    """
+    Retrieve a version of all due dates of a given task, see db_due_by_actions.get_due_by_version().
+
+    Args:
+        task_id (int): The ID of the task.
+
+    Returns:
+        str: A digest of the row versions (xmin) of the task's due dates, None if the task has no due date.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    select_query = 'SELECT {0} FROM app."Due_by" WHERE task_id = $1'.format(dbdba.DUE_DATES_VERSION)
+    try:
+        async with adbp.connection() as conn:
+            return await conn.fetchval(select_query, int(task_id))
+    except Exception as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+def compose_due_by_filters(due_from: Optional[str] = None, due_to: Optional[str] = None, active: bool = True,
+                           after: Optional[Tuple[str, int]] = None) -> Tuple[str, list]:
+    """
+    Composes the WHERE clause that selects due dates by date range, see db_due_by_actions.compose_due_by_filters().
+
+    Returns:
+        tuple: A tuple containing the WHERE clause, with '$n' placeholders, and the list of its parameters.
+    """
+    conditions = ['d.is_active' if active else 'NOT d.is_active']
+    params = []
+    if due_from is not None:
+        params.append(date.fromisoformat(due_from))
+        conditions.append('d.due_date >= ${}'.format(len(params)))
+    if due_to is not None:
+        params.append(date.fromisoformat(due_to))
+        conditions.append('d.due_date <= ${}'.format(len(params)))
+    if after is not None:
+        params.extend((date.fromisoformat(after[0]), int(after[1])))
+        conditions.append('(d.due_date, d.task_id) > (${0}, ${1})'.format(len(params) - 1, len(params)))
+    return ' WHERE ' + ' AND '.join(conditions), params
+
+async def get_due_dates_in_range(due_from: Optional[str] = None, due_to: Optional[str] = None, active: bool = True,
+                                 limit: Optional[int] = None, after: Optional[Tuple[str, int]] = None) -> list:
+    """
+    Retrieve one page of the due dates of every task within a date range, see db_due_by_actions.get_due_dates_in_range().
+
+    Returns:
+        list: A list of DueByWithTask records (see db_models).
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    where_clause, params = compose_due_by_filters(due_from, due_to, active, after)
+    select_query = ('SELECT d.due_date, d.is_active, d.task_id, t.task_name, t.task_status '
+                    'FROM app."Due_by" AS d JOIN app."Task" AS t ON t.id = d.task_id'
+                    '{0} ORDER BY d.due_date, d.task_id').format(where_clause)
+    if limit is not None:
+        params.append(limit)
+        select_query += ' LIMIT ${}'.format(len(params))
+    try:
+        async with adbp.connection() as conn:
+            return dbmo.from_rows(dbmo.DueByWithTask, await conn.fetch(select_query, *params))
+    except Exception as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+async def get_due_dates_histogram(due_from: Optional[str] = None, due_to: Optional[str] = None, active: bool = True) -> list:
+    """
+    Count the due dates of every task per day within a date range, see db_due_by_actions.get_due_dates_histogram().
+
+    Returns:
+        list: A list of dictionaries with the 'due_date' and 'count' keys, sorted by due date.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    where_clause, params = compose_due_by_filters(due_from, due_to, active)
+    select_query = ('SELECT d.due_date, count(*) AS count FROM app."Due_by" AS d'
+                    '{0} GROUP BY d.due_date ORDER BY d.due_date').format(where_clause)
+    try:
+        async with adbp.connection() as conn:
+            return [dict(row) for row in await conn.fetch(select_query, *params)]
+    except Exception as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+async def execute_apply_due_date(conn, task_id: int, due_date: str, mode: str) -> Tuple[str, Optional[str]]:
+    """
+    Runs the due date state machine of db_due_by_actions.apply_due_date() on a connection, within its transaction.
+
+    Args:
+        conn (asyncpg.Connection): The connection, inside a transaction.
+        task_id (int): The ID of the task.
+        due_date (str): The due date to be inserted or updated ('YYYY-MM-DD').
+        mode (str): One of MODE_CREATE, MODE_UPDATE or MODE_UPSERT of db_due_by_actions.
+
+    Returns:
+        tuple: A tuple containing the outcome (one of the DUE_DATE_* values of db_due_by_actions) and a message
+               describing it, the message is None if nothing was changed.
+    """
+    task_id = int(task_id)
+    # asyncpg runs a single statement per call, so both statements of the state machine are sent one after the other
+    await conn.execute(dbdba.APPLY_DUE_DATE_LOCK_QUERY, task_id)
+    row = await conn.fetchrow(dbdba.APPLY_DUE_DATE_CHANGE_QUERY, task_id, date.fromisoformat(due_date), mode)
+    return dbdba.describe_due_date_outcome(task_id, mode, tuple(row))
+
+async def apply_due_date(task_id: int, due_date: str, mode: str = dbdba.MODE_UPSERT) -> Tuple[str, Optional[str]]:
+    """
+    Insert or update a due date for a task in the Due_by table, see db_due_by_actions.apply_due_date().
+
+    Args:
+        task_id (int): The ID of the task.
+        due_date (str): The new due date to be inserted or updated ('YYYY-MM-DD').
+        mode (str, optional): One of MODE_CREATE, MODE_UPDATE or MODE_UPSERT of db_due_by_actions. Defaults to MODE_UPSERT.
+
+    Returns:
+        tuple: A tuple containing the outcome (one of the DUE_DATE_* values of db_due_by_actions) and a message
+               describing it, the message is None if nothing was changed.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    try:
+        async with adbp.connection() as conn:
+            outcome, msg = await execute_apply_due_date(conn, task_id, due_date, mode)
+    except Exception as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+    if msg is not None:
+        dbch.invalidate_due_by(task_id)
+    return outcome, msg
@@ -0,0 +1,91 @@
+from database_operations import db_config as dbc
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+import asyncio
+
+# This script defines the pool of asynchronous PostgreSQL connections used by the asyncio database layer.
+# It requires the optional 'asyncpg' package (see requirements-async.txt).
+
+_pool = None
+_pool_lock: Optional[asyncio.Lock] = None
+# The event loop the pool was created on, and the pools being closed there after a reload
+_pool_loop: Optional[asyncio.AbstractEventLoop] = None
+_closing_pools: set = set()
+
+async def get_pool():
+    """
+    Returns the asyncpg pool of the running event loop, creating it from the configuration on first use.
+    It uses the same [postgresql] and [pool] sections as the synchronous pool.
+
+    Returns:
+        asyncpg.Pool: The shared pool.
+    """
+    global _pool, _pool_lock, _pool_loop
+    if _pool is None:
+        if _pool_lock is None:
+            _pool_lock = asyncio.Lock()
+        async with _pool_lock:
+            if _pool is None:
+                import asyncpg
+                config = dbc.get_config()
+                pool_config = config.section('pool')
+                connect_params = dict(config.connect_params)
+                if "port" in connect_params:
+                    connect_params["port"] = int(connect_params["port"])
+                _pool = await asyncpg.create_pool(min_size=int(pool_config.get("min_size", 1)),
+                                                  max_size=int(pool_config.get("max_size", 10)),
+                                                  max_inactive_connection_lifetime=float(pool_config.get("ping_after", 30)),
+                                                  **connect_params)
+                _pool_loop = asyncio.get_running_loop()
+    return _pool
+
+async def close_pool() -> None:
+    """
+    Closes the pool, a new one is created on next use.
+    """
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.close()
+
+def close_pool_on_reload(config: dbc.AppConfig) -> None:
+    """
+    Reload listener replacing the pool, as db_pool does, so that the new [postgresql] and [pool] sections are used.
+    It is called outside of the event loop (e.g. by the SIGHUP handler), so the pool is detached right away and
+    gracefully closed on its loop, once the connections in use are released. A new pool is created on next use.
+
+    Args:
+        config (AppConfig): The new configuration.
+    """
+    global _pool
+    pool, _pool = _pool, None
+    loop = _pool_loop
+    if pool is None or loop is None or loop.is_closed():
+        return
+
+    def close() -> None:
+        task = loop.create_task(pool.close())
+        _closing_pools.add(task)
+        task.add_done_callback(_closing_pools.discard)
+
+    loop.call_soon_threadsafe(close)
+
+dbc.add_reload_listener(close_pool_on_reload)
+
+@asynccontextmanager
+async def connection() -> AsyncIterator:
+    """
+    Borrows a connection from the pool for the duration of an 'async with' block.
+    The block runs inside a transaction that is committed when it exits normally and rolled back if it raises.
+
+    Yields:
+        asyncpg.Connection: The borrowed connection.
+
+    Raises:
+        asyncio.TimeoutError: If no connection became available before the pool's checkout timeout.
+    """
+    pool = await get_pool()
+    timeout = float(dbc.get_config().section('pool').get("checkout_timeout", 5))
+    async with pool.acquire(timeout=timeout) as conn:
+        async with conn.transaction():
+            yield conn
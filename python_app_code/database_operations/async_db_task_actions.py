@@ -0,0 +1,451 @@
+from database_operations import async_db_pool as adbp, async_db_due_by_actions as adbdba
+from database_operations import db_cache as dbch, db_due_by_actions as dbdba, db_models as dbmo, db_task_actions as dbta
+from datetime import date
+import json
+from typing import AsyncIterator, Callable, Optional, Sequence, Tuple
+import logging
+
+# This script defines the asyncio variant of the operations of db_task_actions, on top of asyncpg.
+# The functions return the same values as their synchronous counterparts. Lookups aren't cached, but writes
+# invalidate the cache so that a backend shared with the synchronous app stays consistent.
+
+logger = logging.getLogger(__name__)
+
+def to_date(value: Optional[str]) -> Optional[date]:
+    """
+    Converts a 'YYYY-MM-DD' string into a date, as asyncpg only accepts date objects for date parameters.
+    """
+    return date.fromisoformat(value) if value is not None else None
+
+def compose_task_filters(task_status: Optional[Sequence[str]] = None, created_from: Optional[str] = None,
+                         created_to: Optional[str] = None, exclude_removed: bool = False,
+                         after_id: Optional[int] = None) -> Tuple[str, list]:
+    """
+    Composes the WHERE clause that filters the Tasks table, see db_task_actions.compose_task_filters().
+
+    Returns:
+        tuple: A tuple containing the WHERE clause (empty if there is no filter), with '$n' placeholders,
+               and the list of its parameters.
+    """
+    conditions = []
+    params = []
+    if task_status:
+        params.append(list(task_status))
+        conditions.append('task_status = ANY(${}::varchar[])'.format(len(params)))
+    if created_from is not None:
+        params.append(to_date(created_from))
+        conditions.append('creation_date >= ${}'.format(len(params)))
+    if created_to is not None:
+        params.append(to_date(created_to))
+        conditions.append('creation_date <= ${}'.format(len(params)))
+    if exclude_removed:
+        conditions.append('task_status NOT IN (\'Deleted\', \'Dropped\')')
+    if after_id is not None:
+        params.append(int(after_id))
+        conditions.append('id > ${}'.format(len(params)))
+
+    if len(conditions) == 0:
+        return '', params
+    return ' WHERE ' + ' AND '.join(conditions), params
+
+def make_tasks(rows: list, include: Optional[str]) -> list:
+    """
+    Builds the records of the selected tasks, with the due dates embedded by INCLUDE_DUE_BY of db_task_actions, which
+    asyncpg returns as JSON text, turned back into dates. See db_task_actions.make_tasks().
+    """
+    tasks = dbmo.from_rows(dbta.TASK_MODELS[include], rows)
+    if include == dbta.INCLUDE_DUE_BY:
+        for task in tasks:
+            task.due_by = [{"due_date": date.fromisoformat(due_by["due_date"]), "is_active": due_by["is_active"]}
+                           for due_by in json.loads(task.due_by)]
+    return tasks
+
+def compose_tasks_query(limit: Optional[int] = None, after_id: Optional[int] = None,
+                        task_status: Optional[Sequence[str]] = None, created_from: Optional[str] = None,
+                        created_to: Optional[str] = None, exclude_removed: bool = False,
+                        include: Optional[str] = None) -> Tuple[str, list]:
+    """
+    Composes the query of get_tasks(), see db_task_actions.compose_tasks_query().
+
+    Returns:
+        tuple: A tuple containing the query, with '$n' placeholders, and the list of its parameters.
+    """
+    where_clause, params = compose_task_filters(task_status, created_from, created_to, exclude_removed, after_id)
+    select_query = 'SELECT {0} FROM app."Task" AS t{1} ORDER BY t.id ASC'.format(dbta.TASK_SELECT_LISTS[include], where_clause)
+    if limit is not None:
+        params.append(limit)
+        select_query += ' LIMIT ${}'.format(len(params))
+    return select_query, params
+
+def compose_tasks_version_query(limit: Optional[int] = None, after_id: Optional[int] = None,
+                                task_status: Optional[Sequence[str]] = None, created_from: Optional[str] = None,
+                                created_to: Optional[str] = None, exclude_removed: bool = False,
+                                include: Optional[str] = None) -> Tuple[str, list]:
+    """
+    Composes the query of get_tasks_version(), see db_task_actions.compose_tasks_version_query().
+
+    Returns:
+        tuple: A tuple containing the query, with '$n' placeholders, and the list of its parameters.
+    """
+    where_clause, params = compose_task_filters(task_status, created_from, created_to, exclude_removed, after_id)
+    if limit is None:
+        select_query = 'SELECT count(*) || \':\' || coalesce(max(t.xmin::text::bigint), 0)'
+        if include is not None:
+            # The placeholders of the filters are numbered, they are used by both clauses
+            select_query += (' || \'/\' || (SELECT count(*) || \':\' || coalesce(max(d.xmin::text::bigint), 0) '
+                             'FROM app."Due_by" AS d WHERE d.task_id IN (SELECT id FROM app."Task"{0}))').format(where_clause)
+        return select_query + ' FROM app."Task" AS t{0}'.format(where_clause), params
+    row_version = 't.xmin::text'
+    if include is not None:
+        row_version += ' || \'/\' || ' + dbta.DUE_BY_VERSION
+    params.append(limit)
+    page_query = 'SELECT t.id, {0} AS row_version FROM app."Task" AS t{1} ORDER BY t.id ASC LIMIT ${2}'.format(
+                    row_version, where_clause, len(params))
+    select_query = ('SELECT count(*) || \':\' || coalesce(md5(string_agg(id::text || \':\' || row_version::text, \',\' ORDER BY id)), \'\') '
+                    'FROM ({0}) AS page').format(page_query)
+    return select_query, params
+
+async def get_tasks(limit: Optional[int] = None, after_id: Optional[int] = None, task_status: Optional[Sequence[str]] = None,
+                    created_from: Optional[str] = None, created_to: Optional[str] = None, exclude_removed: bool = False,
+                    include: Optional[str] = None) -> list:
+    """
+    Retrieve one page of the Tasks table, see db_task_actions.get_tasks().
+
+    Returns:
+        list: A list of records (see db_models), sorted by ID in ascending order.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    select_query, params = compose_tasks_query(limit, after_id, task_status, created_from, created_to, exclude_removed,
+                                               include)
+    try:
+        async with adbp.connection() as conn:
+            return make_tasks(await conn.fetch(select_query, *params), include)
+    except Exception as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+async def get_tasks_version(limit: Optional[int] = None, after_id: Optional[int] = None, task_status: Optional[Sequence[str]] = None,
+                            created_from: Optional[str] = None, created_to: Optional[str] = None,
+                            exclude_removed: bool = False, include: Optional[str] = None) -> str:
+    """
+    Retrieve a version of the tasks that get_tasks() would return, see db_task_actions.get_tasks_version().
+
+    Returns:
+        str: The version of the page, or of the whole list without 'limit'.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    select_query, params = compose_tasks_version_query(limit, after_id, task_status, created_from, created_to,
+                                                       exclude_removed, include)
+    try:
+        async with adbp.connection() as conn:
+            return await conn.fetchval(select_query, *params)
+    except Exception as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+async def get_versioned_tasks(limit: Optional[int] = None, after_id: Optional[int] = None,
+                              task_status: Optional[Sequence[str]] = None, created_from: Optional[str] = None,
+                              created_to: Optional[str] = None, exclude_removed: bool = False,
+                              include: Optional[str] = None,
+                              unchanged: Optional[Callable[[str], bool]] = None) -> Tuple[str, Optional[list]]:
+    """
+    Retrieve the version of the tasks that get_tasks() would return, then the tasks themselves unless the caller
+    already has them, from the same snapshot, see db_task_actions.get_versioned_tasks().
+
+    Returns:
+        tuple: A tuple containing the version and the list of records, None if 'unchanged' accepted the version.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    version_query, version_params = compose_tasks_version_query(limit, after_id, task_status, created_from,
+                                                                created_to, exclude_removed, include)
+    select_query, params = compose_tasks_query(limit, after_id, task_status, created_from, created_to, exclude_removed,
+                                               include)
+    try:
+        async with adbp.connection() as conn:
+            await conn.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+            version = await conn.fetchval(version_query, *version_params)
+            if unchanged is not None and unchanged(version):
+                return version, None
+            return version, make_tasks(await conn.fetch(select_query, *params), include)
+    except Exception as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+async def search_tasks(terms: Sequence[str], limit: int, after: Optional[Tuple[float, int]] = None,
+                       task_status: Optional[Sequence[str]] = None, exclude_removed: bool = False, fuzzy: bool = True,
+                       max_candidates: Optional[int] = None) -> Tuple[list, bool]:
+    """
+    Search the tasks by keyword, the most relevant first, see db_task_actions.search_tasks().
+
+    Returns:
+        tuple: A list of TaskSearchResult records (see db_models), sorted by descending rank, then by ID, and whether
+               matching tasks were left out by 'max_candidates' (False on an empty page).
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    text = ' '.join(terms)
+    fuzzy = fuzzy and len(text) >= dbta.SEARCH_MIN_FUZZY_LENGTH
+    where_clause, params = compose_task_filters(task_status, exclude_removed=exclude_removed)
+    params.extend((' & '.join(term + ':*' for term in terms), text))
+    query_param, text_param = len(params) - 1, len(params)
+    match = 'search_vector @@ q.query OR q.text <% task_name' if fuzzy else 'search_vector @@ q.query'
+    rank = 'ts_rank(t.search_vector, q.query)'
+    if fuzzy:
+        rank += ' + word_similarity(q.text, t.task_name)'
+    candidates_query = ('SELECT creation_date, id, search_vector, task_descrip, task_name, task_status '
+                        'FROM app."Task"{0}{1}({2})').format(where_clause, ' AND ' if where_clause else ' WHERE ', match)
+    if max_candidates is None:
+        candidates_columns = 'NULL::bigint AS candidates'
+        where_clauses = []
+    else:
+        params.append(max_candidates + 1)
+        candidates_query += ' ORDER BY id DESC LIMIT ${}'.format(len(params))
+        candidates_columns = 'count(*) OVER () AS candidates, row_number() OVER (ORDER BY t.id DESC) AS candidate'
+        params.append(max_candidates)
+        where_clauses = ['m.candidate <= ${}'.format(len(params))]
+    ranked_query = ('SELECT t.creation_date, t.id, ({0})::float8 AS rank, t.task_descrip, t.task_name, t.task_status, {1} '
+                    'FROM (SELECT to_tsquery(\'simple\', ${2}) AS query, ${3}::text AS text) AS q, '
+                    'LATERAL ({4}) AS t').format(rank, candidates_columns, query_param, text_param, candidates_query)
+    if after is not None:
+        params.extend(after)
+        where_clauses.append('(m.rank < ${0} OR (m.rank = ${0} AND m.id > ${1}))'.format(len(params) - 1, len(params)))
+    select_query = 'SELECT {0}, m.candidates FROM ({1}) AS m'.format(
+                        ', '.join('m.' + column for column in dbmo.TaskSearchResult.COLUMNS), ranked_query)
+    if where_clauses:
+        select_query += ' WHERE ' + ' AND '.join(where_clauses)
+    params.append(limit)
+    select_query += ' ORDER BY m.rank DESC, m.id ASC LIMIT ${}'.format(len(params))
+    try:
+        async with adbp.connection() as conn:
+            return dbta.make_search_results(await conn.fetch(select_query, *params), max_candidates)
+    except Exception as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+async def export_tasks(include_due_by: bool = False, task_status: Optional[Sequence[str]] = None,
+                       created_from: Optional[str] = None, created_to: Optional[str] = None,
+                       exclude_removed: bool = False) -> AsyncIterator[tuple]:
+    """
+    Stream the rows of the Tasks table through a server-side cursor, see db_task_actions.export_tasks().
+
+    Yields:
+        tuple: One row per task sorted by ID, with the values of EXPORT_COLUMNS (or EXPORT_COLUMNS_WITH_DUE_BY)
+               of db_task_actions.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    where_clause, params = compose_task_filters(task_status, created_from, created_to, exclude_removed)
+    if include_due_by:
+        select_query = ('SELECT id, task_name, task_descrip, creation_date, task_status, d.due_date '
+                        'FROM app."Task" AS t LEFT JOIN app."Due_by" AS d ON d.task_id = t.id AND d.is_active'
+                        '{0} ORDER BY id ASC').format(where_clause)
+    else:
+        select_query = ('SELECT id, task_name, task_descrip, creation_date, task_status '
+                        'FROM app."Task"{0} ORDER BY id ASC').format(where_clause)
+    try:
+        async with adbp.connection() as conn:
+            async for row in conn.cursor(select_query, *params, prefetch=dbta.EXPORT_BATCH_SIZE):
+                yield tuple(row)
+    except Exception as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+async def get_a_task(task_id: int, include: Optional[str] = None) -> list:
+    """
+    Retrieve one task from the Tasks table, see db_task_actions.get_a_task().
+
+    Returns:
+        list: A list with the record of the task (see db_models), empty if the task doesn't exist.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    return (await get_versioned_task(task_id, include))[1]
+
+async def get_versioned_task(task_id: int, include: Optional[str] = None) -> Tuple[Optional[str], list]:
+    """
+    Retrieve one task from the Tasks table along with its version, see db_task_actions.get_versioned_task().
+
+    Returns:
+        tuple: A tuple containing the version of the task (None if the task doesn't exist) and the list with its record.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    version = 't.xmin::text' if include is None else 't.xmin::text || \'/\' || ' + dbta.DUE_BY_VERSION
+    select_query = 'SELECT {0}, {1} FROM app."Task" AS t WHERE t.id = $1'.format(dbta.TASK_SELECT_LISTS[include], version)
+    try:
+        async with adbp.connection() as conn:
+            rows = await conn.fetch(select_query, int(task_id))
+            return (rows[0][-1] if rows else None), make_tasks([tuple(row)[:-1] for row in rows], include)
+    except Exception as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+async def get_task_version(task_id: int, include: Optional[str] = None) -> Optional[str]:
+    """
+    Retrieve the version of one task, see db_task_actions.get_task_version().
+
+    Returns:
+        str: The row version (xmin) of the task, None if the task doesn't exist.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    select_query = 'SELECT t.xmin::text FROM app."Task" AS t WHERE t.id = $1'
+    if include is not None:
+        select_query = 'SELECT t.xmin::text || \'/\' || {0} FROM app."Task" AS t WHERE t.id = $1'.format(dbta.DUE_BY_VERSION)
+    try:
+        async with adbp.connection() as conn:
+            return await conn.fetchval(select_query, int(task_id))
+    except Exception as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+async def insert_into_task_table(task_name: str, task_descrip: str = None, creation_date: str = None,
+                                 task_status: str = None, due_date: str = None) -> int:
+    """
+    Inserts a new task, and its optional due date, into the database, see db_task_actions.insert_into_task_table().
+
+    Returns:
+        int: The ID of the newly inserted task.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    new_ids = await insert_tasks_batch([{"task_name": task_name, "task_descrip": task_descrip, "creation_date": creation_date,
+                                         "task_status": task_status, "due_date": due_date}])
+    return new_ids[0]
+
+async def insert_tasks_batch(tasks: Sequence[dict]) -> list:
+    """
+    Inserts several tasks, and their optional due dates, in a single transaction, see db_task_actions.insert_tasks_batch().
+    The rows are sent as arrays and expanded by the database, so a batch takes a single statement per table.
+
+    Returns:
+        list: The IDs of the newly inserted tasks, in the same order as the given tasks.
+
+    Raises:
+        Exception: If there is an error while executing the SQL queries or connecting to the database.
+    """
+    if len(tasks) == 0:
+        return []
+    # WITH ORDINALITY and the ORDER BY keep the RETURNING rows in the order of the given tasks
+    insert_tasks_query = '''
+        INSERT INTO app."Task" (task_name, task_descrip, creation_date, task_status)
+        SELECT name, descrip, COALESCE(created, CURRENT_DATE), COALESCE(status, 'Created')
+        FROM unnest($1::varchar[], $2::varchar[], $3::date[], $4::varchar[]) WITH ORDINALITY AS t(name, descrip, created, status, position)
+        ORDER BY position
+        RETURNING id'''
+    insert_due_dates_query = 'INSERT INTO app."Due_by" (task_id, due_date, is_active) SELECT unnest($1::int[]), unnest($2::date[]), true'
+    try:
+        async with adbp.connection() as conn:
+            rows = await conn.fetch(insert_tasks_query, [task.get("task_name") for task in tasks],
+                                    [task.get("task_descrip") for task in tasks],
+                                    [to_date(task.get("creation_date")) for task in tasks],
+                                    [task.get("task_status") for task in tasks])
+            new_ids = [row["id"] for row in rows]
+
+            due_dates = [(new_id, to_date(task["due_date"])) for new_id, task in zip(new_ids, tasks)
+                         if task.get("due_date") is not None]
+            if due_dates:
+                await conn.execute(insert_due_dates_query, [task_id for task_id, _ in due_dates],
+                                   [due_date for _, due_date in due_dates])
+    except Exception as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+    # Missing tasks may have been cached under the new IDs
+    dbch.get_cache().invalidate(*[key for new_id in new_ids for key in dbch.task_keys(new_id)])
+    return new_ids
+
+async def update_task(task_id: int, task_name: str = None, task_descrip: str = None,
+                      task_creation_date: str = None, task_status: str = None, due_date: str = None) -> bool:
+    """
+    Updates the data of a Task including its possible due-date, in a single transaction, see db_task_actions.update_task().
+
+    Returns:
+        bool: True if the task is successfully updated, False if the task doesn't exist.
+
+    Raises:
+        ValueError: If no values are provided for the update.
+        Exception: Raises an exception if there is an error during the update process.
+    """
+    task_id = int(task_id)
+    update_query = None
+    values = []
+    if any(value is not None for value in (task_name, task_descrip, task_creation_date, task_status)):
+        columns, values = dbta.compose_task_insert_update_values(task_name, task_descrip, to_date(task_creation_date), task_status)
+        assignments = ', '.join('"{0}" = ${1}'.format(column, position) for position, column in enumerate(columns, start=2))
+        update_query = 'UPDATE app."Task" SET {0} WHERE id = $1 RETURNING id'.format(assignments)
+    elif due_date is None:
+        raise ValueError("No values to insert or update")
+    try:
+        async with adbp.connection() as conn:
+            found = True
+            if update_query is not None:
+                found = await conn.fetchval(update_query, task_id, *values) is not None
+
+            # if due date is provided, apply it within the same transaction
+            if found and due_date is not None:
+                outcome, _ = await adbdba.execute_apply_due_date(conn, task_id, due_date, dbdba.MODE_UPSERT)
+                found = outcome != dbdba.DUE_DATE_TASK_NOT_FOUND
+    except Exception as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+    if found:
+        dbch.invalidate_task(task_id)
+    return found
+
+async def delete_task(task_id: int) -> bool:
+    """
+    Updates the state of a Task to be 'DELETED', see db_task_actions.delete_task().
+
+    Returns:
+        bool: True if the task's state is updated, False if the task doesn't exist.
+
+    Raises:
+        Exception: If an error occurs during the deletion process.
+    """
+    update_query = 'UPDATE app."Task" SET task_status = \'Deleted\' WHERE id = $1 RETURNING id'
+    try:
+        async with adbp.connection() as conn:
+            found = await conn.fetchval(update_query, int(task_id)) is not None
+    except Exception as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+    if found:
+        dbch.invalidate_task(task_id)
+    return found
+
+async def update_tasks_status(task_ids: Sequence[int], task_status: str) -> Tuple[list, list, list]:
+    """
+    Changes the status of several tasks at once, in a single statement, see db_task_actions.update_tasks_status().
+
+    Returns:
+        tuple: The ids of the updated tasks, of the tasks skipped as they already had the status and of the missing
+               tasks, each list in the order of task_ids.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    try:
+        async with adbp.connection() as conn:
+            rows = await conn.fetch(dbta.TASK_STATUS_CHANGE_QUERY, list(task_ids), task_status)
+    except Exception as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+    updated, skipped, missing = dbta.split_status_change(task_ids, [tuple(row) for row in rows])
+    dbch.get_cache().invalidate(*[key for task_id in updated for key in dbch.task_keys(task_id)])
+    return updated, skipped, missing
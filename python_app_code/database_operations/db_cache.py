@@ -0,0 +1,348 @@
+from database_operations import db_config as dbc
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional, Tuple
+import pickle
+import threading
+import time
+import logging
+
+# This script defines the read-through cache placed in front of the task and due date lookups
+
+logger = logging.getLogger(__name__)
+
+class CacheBackend:
+    """
+    Storage used by the cache. Subclasses must implement get(), set(), delete() and clear().
+    """
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Looks a key up.
+
+        Args:
+            key (str): The key.
+
+        Returns:
+            tuple: A tuple containing True and the cached value if the key was found, (False, None) otherwise.
+        """
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Stores a value.
+
+        Args:
+            key (str): The key.
+            value (Any): The value.
+            ttl (float): The number of seconds after which the value expires.
+        """
+        raise NotImplementedError
+
+    def delete(self, keys: Iterable[str]) -> None:
+        """
+        Removes keys, missing keys are ignored.
+
+        Args:
+            keys (Iterable[str]): The keys.
+        """
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """
+        Removes every key.
+        """
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        """
+        Returns the backend's own counters.
+
+        Returns:
+            dict: The counters, e.g. the number of evictions and of stored entries.
+        """
+        return {}
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process LRU storage, bounded to 'max_entries' entries. It is only shared by the threads of one process.
+    """
+
+    def __init__(self, max_entries: int = 10000) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._evictions = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"evictions": self._evictions, "entries": len(self._entries)}
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Storage shared by every process of the app, kept in a Redis server. Its size is bounded by the server's
+    'maxmemory' setting, which should use an LRU eviction policy such as 'allkeys-lru'.
+
+    Any client implementing get(), setex(), delete() and scan_iter() can be given instead of a real connection,
+    e.g. an in-process stand-in while testing.
+    """
+
+    def __init__(self, url: Optional[str] = None, client: Any = None, prefix: str = 'simple-app:') -> None:
+        """
+        Args:
+            url (str, optional): The URL of the Redis server, used when no client is given. Defaults to None.
+            client (Any, optional): An already created client. Defaults to None.
+            prefix (str, optional): The prefix added to every key. Defaults to 'simple-app:'.
+
+        Raises:
+            ImportError: If no client is given and the optional 'redis' package is not installed.
+        """
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url or 'redis://localhost:6379/0')
+        self._client = client
+        self._prefix = prefix
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        data = self._client.get(self._prefix + key)
+        if data is None:
+            return False, None
+        return True, pickle.loads(data)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._client.setex(self._prefix + key, max(1, int(ttl)), pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+    def delete(self, keys: Iterable[str]) -> None:
+        keys = [self._prefix + key for key in keys]
+        if keys:
+            self._client.delete(*keys)
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=self._prefix + '*'))
+        if keys:
+            self._client.delete(*keys)
+
+class Cache:
+    """
+    Read-through cache with a time to live, per-key invalidation and hit/miss/eviction counters.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = 60.0, enabled: bool = True) -> None:
+        """
+        Args:
+            backend (CacheBackend): The storage of the cached values.
+            ttl (float, optional): The number of seconds a value is kept. Defaults to 60.0.
+            enabled (bool, optional): If False, every lookup goes to the loader. Defaults to True.
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+        # Incremented by each invalidation, a value loaded while an invalidation happened isn't stored
+        self._generation = 0
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Returns the cached value of a key, calling the loader and caching its result on a miss.
+
+        Args:
+            key (str): The key.
+            loader (Callable[[], Any]): The function reading the value from the database.
+
+        Returns:
+            Any: The value. It is shared with other callers and must not be modified.
+        """
+        if not self.enabled:
+            return loader()
+        try:
+            found, value = self.backend.get(key)
+        except Exception as error:
+            # An unavailable shared backend must not make the lookups fail
+            logger.warning('Cache backend error: %s', error)
+            found, value = False, None
+            with self._lock:
+                self._errors += 1
+        if found:
+            with self._lock:
+                self._hits += 1
+            return value
+
+        with self._lock:
+            self._misses += 1
+            generation = self._generation
+        value = loader()
+        with self._lock:
+            unchanged = generation == self._generation
+        if unchanged:
+            try:
+                self.backend.set(key, value, self.ttl)
+            except Exception as error:
+                logger.warning('Cache backend error: %s', error)
+                with self._lock:
+                    self._errors += 1
+        return value
+
+    def invalidate(self, *keys: str) -> None:
+        """
+        Removes keys from the cache, to be called once the change of the underlying rows is committed.
+
+        Args:
+            *keys (str): The keys.
+        """
+        with self._lock:
+            self._generation += 1
+        if not self.enabled:
+            return
+        try:
+            self.backend.delete(keys)
+        except Exception as error:
+            logger.warning('Cache backend error: %s', error)
+            with self._lock:
+                self._errors += 1
+
+    def clear(self) -> None:
+        """
+        Removes every key from the cache.
+        """
+        with self._lock:
+            self._generation += 1
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the cache's counters.
+
+        Returns:
+            dict: The numbers of hits, misses, backend errors and the backend's own counters (e.g. evictions).
+        """
+        stats = {"evictions": 0}
+        stats.update(self.backend.stats())
+        with self._lock:
+            stats.update({"hits": self._hits, "misses": self._misses, "errors": self._errors})
+        return stats
+
+
+# Variants of a task's cached row embedding its due dates, named after the 'include' values of db_task_actions
+TASK_KEY_VARIANTS = ('due_by', 'active_due_by')
+
+def task_key(task_id, variant: Optional[str] = None) -> str:
+    """
+    Returns the cache key of a task's row, or of one of its variants (see TASK_KEY_VARIANTS).
+    """
+    if variant is None:
+        return 'task:{}'.format(int(task_id))
+    return 'task:{0}:{1}'.format(int(task_id), variant)
+
+def due_by_key(task_id) -> str:
+    """
+    Returns the cache key of a task's due dates.
+    """
+    return 'due_by:{}'.format(int(task_id))
+
+def task_keys(task_id) -> Tuple[str, ...]:
+    """
+    Returns every cache key of a task: its row, the variants of its row and its due dates.
+    """
+    return (task_key(task_id),) + tuple(task_key(task_id, variant) for variant in TASK_KEY_VARIANTS) + (due_by_key(task_id),)
+
+_cache: Optional[Cache] = None
+_cache_lock = threading.Lock()
+
+def create_cache(config: dbc.AppConfig) -> Cache:
+    """
+    Creates a cache from the [cache] section of the configuration.
+
+    Args:
+        config (AppConfig): The configuration.
+
+    Returns:
+        Cache: The new cache.
+
+    Raises:
+        ValueError: If the configured backend is unknown.
+    """
+    cache_config = config.section('cache')
+    backend_name = cache_config.get('backend', 'memory')
+    if backend_name == 'memory':
+        backend = MemoryCacheBackend(int(cache_config.get('max_entries', 10000)))
+    elif backend_name == 'redis':
+        backend = RedisCacheBackend(cache_config.get('redis_url'))
+    else:
+        raise ValueError('Unknown cache backend: {}'.format(backend_name))
+    return Cache(backend, float(cache_config.get('ttl_seconds', 60)),
+                 cache_config.get('enabled', 'true').lower() == 'true')
+
+def get_cache() -> Cache:
+    """
+    Returns the process-wide cache, creating it from the configuration on first use.
+    It is created again with the new settings whenever the configuration is reloaded.
+
+    Returns:
+        Cache: The shared cache.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_cache(dbc.get_config())
+    return _cache
+
+def reset_cache() -> None:
+    """
+    Drops the process-wide cache, a new one is created on next use.
+    """
+    global _cache
+    with _cache_lock:
+        _cache = None
+
+dbc.add_reload_listener(lambda config: reset_cache())
+
+def invalidate_task(task_id) -> None:
+    """
+    Removes a task's row and due dates from the cache. The due dates are included since changing a task's status
+    can deactivate them.
+
+    Args:
+        task_id: The ID of the task.
+    """
+    get_cache().invalidate(*task_keys(task_id))
+
+def invalidate_due_by(task_id) -> None:
+    """
+    Removes a task's due dates from the cache, along with the variants of the task's row embedding them.
+
+    Args:
+        task_id: The ID of the task.
+    """
+    get_cache().invalidate(due_by_key(task_id), *(task_key(task_id, variant) for variant in TASK_KEY_VARIANTS))
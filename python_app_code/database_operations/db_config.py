@@ -1,7 +1,32 @@
 from configparser import ConfigParser
+from types import MappingProxyType
+from typing import Callable, Mapping, Optional
+import os
+import signal
+import threading
+import logging
 
 # This script contains the configuration parameters for the database connection
 
+logger = logging.getLogger(__name__)
+
+# Default location of the INI file, relative to this script so it doesn't depend on the working directory.
+# It can be changed with the DATABASE_CONFIG_FILE environment variable.
+DEFAULT_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database.ini')
+
+# Environment variables following the naming of the postgres image (see compose.yaml) that override the INI file.
+# Any other value can be overridden with an environment variable named <SECTION>_<KEY>, e.g. POOL_MAX_SIZE.
+POSTGRES_ENV_OVERRIDES = {
+    "host": "POSTGRES_HOST",
+    "port": "POSTGRES_PORT",
+    "database": "POSTGRES_DB",
+    "user": "POSTGRES_USER",
+    "password": "POSTGRES_PASSWORD",
+}
+
+# Connection parameters of database.ini whose libpq keyword differs
+LIBPQ_KEYWORDS = {"database": "dbname"}
+
 def load_config(filename='database_operations/database.ini', section='postgresql'):
     """
     Load the configuration parameters from the specified INI file.
@@ -28,4 +53,166 @@ def load_config(filename='database_operations/database.ini', section='postgresql
     else:
         raise Exception('Section {0} not found in the {1} file'.format(section, filename))
 
-    return config
\ No newline at end of file
+    return config
+
+def make_dsn(params: Mapping[str, str]) -> str:
+    """
+    Builds a libpq connection string out of connection parameters.
+
+    Args:
+        params (Mapping[str, str]): The connection parameters, e.g. host, database, user and password.
+
+    Returns:
+        str: The connection string, with every value quoted as required by libpq.
+    """
+    def quote(value: str) -> str:
+        return "'" + str(value).replace('\\', '\\\\').replace("'", "\\'") + "'"
+    # libpq only knows 'dbname', psycopg2.connect() translates 'database' for keyword arguments only
+    return ' '.join('{0}={1}'.format(LIBPQ_KEYWORDS.get(key, key), quote(value)) for key, value in params.items())
+
+class AppConfig:
+    """
+    Immutable, already parsed snapshot of the configuration.
+
+    Attributes:
+        filename (str): The INI file the snapshot was loaded from.
+        sections (Mapping[str, Mapping[str, str]]): Read-only view of every section, with environment overrides applied.
+        connect_params (Mapping[str, str]): Read-only view of the 'postgresql' section.
+        dsn (str): The libpq connection string built from 'connect_params'.
+    """
+    __slots__ = ('filename', 'sections', 'connect_params', 'dsn')
+
+    def __init__(self, filename: str, sections: dict) -> None:
+        object.__setattr__(self, 'filename', filename)
+        object.__setattr__(self, 'sections', MappingProxyType({name: MappingProxyType(dict(values))
+                                                               for name, values in sections.items()}))
+        object.__setattr__(self, 'connect_params', self.sections.get('postgresql', MappingProxyType({})))
+        object.__setattr__(self, 'dsn', make_dsn(self.connect_params))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('AppConfig is immutable')
+
+    def section(self, name: str) -> Mapping[str, str]:
+        """
+        Returns one section of the configuration.
+
+        Args:
+            name (str): The name of the section.
+
+        Returns:
+            Mapping[str, str]: A read-only view of the section, empty if the section doesn't exist.
+        """
+        return self.sections.get(name, MappingProxyType({}))
+
+def read_config(filename: Optional[str] = None, environ: Optional[Mapping[str, str]] = None) -> AppConfig:
+    """
+    Reads the INI file and applies the environment variable overrides on top of it.
+
+    Args:
+        filename (str, optional): The path to the INI file. Defaults to the DATABASE_CONFIG_FILE environment
+                                  variable or to the database.ini file next to this script.
+        environ (Mapping[str, str], optional): The environment to read overrides from. Defaults to os.environ.
+
+    Returns:
+        AppConfig: The parsed configuration.
+
+    Raises:
+        Exception: If the 'postgresql' section is not found in the INI file.
+    """
+    environ = os.environ if environ is None else environ
+    filename = filename or environ.get('DATABASE_CONFIG_FILE') or DEFAULT_CONFIG_FILE
+    parser = ConfigParser()
+    parser.read(filename)
+    if not parser.has_section('postgresql'):
+        raise Exception('Section {0} not found in the {1} file'.format('postgresql', filename))
+
+    sections = {name: dict(parser.items(name)) for name in parser.sections()}
+    for name, values in sections.items():
+        for key in values:
+            env_name = '{0}_{1}'.format(name, key).upper()
+            if env_name in environ:
+                values[key] = environ[env_name]
+    for key, env_name in POSTGRES_ENV_OVERRIDES.items():
+        if env_name in environ:
+            sections['postgresql'][key] = environ[env_name]
+    return AppConfig(filename, sections)
+
+
+_config: Optional[AppConfig] = None
+_config_lock = threading.Lock()
+_reload_listeners: list = []
+
+def get_config() -> AppConfig:
+    """
+    Returns the configuration, reading it only the first time it is needed.
+    This is what every caller on the request path must use, as it never touches the filesystem once loaded.
+
+    Returns:
+        AppConfig: The current configuration.
+    """
+    config = _config
+    if config is None:
+        with _config_lock:
+            if _config is None:
+                _set_config(read_config())
+            config = _config
+    return config
+
+def _set_config(config: AppConfig) -> None:
+    global _config
+    _config = config
+
+def reload_config() -> AppConfig:
+    """
+    Reads the configuration again and replaces the current one, without restarting the app.
+    Every registered reload listener is then called with the new configuration.
+
+    Returns:
+        AppConfig: The new configuration.
+
+    Raises:
+        Exception: If the new configuration can't be read, in which case the current one is kept.
+    """
+    config = read_config()
+    with _config_lock:
+        _set_config(config)
+        listeners = list(_reload_listeners)
+    for listener in listeners:
+        listener(config)
+    return config
+
+def add_reload_listener(listener: Callable[[AppConfig], None]) -> None:
+    """
+    Registers a function to be called each time the configuration is reloaded.
+
+    Args:
+        listener (Callable[[AppConfig], None]): The function, it receives the new configuration.
+    """
+    with _config_lock:
+        _reload_listeners.append(listener)
+
+def install_reload_signal_handler(signum: int = getattr(signal, 'SIGHUP', 0)) -> bool:
+    """
+    Makes the process reload its configuration when it receives the given signal (SIGHUP by default).
+
+    Args:
+        signum (int, optional): The signal to listen to. Defaults to SIGHUP.
+
+    Returns:
+        bool: True if the handler was installed, False if it can't be (no SIGHUP on the platform or not
+              called from the main thread).
+    """
+    def reload():
+        try:
+            reload_config()
+        except Exception as error:
+            logger.error('Configuration reload failed: %s', error)
+
+    def handler(received_signum, frame):
+        # The reload takes locks the interrupted main thread may hold, so it is done on its own thread
+        threading.Thread(target=reload, name='config-reload', daemon=True).start()
+
+    if not signum or threading.current_thread() is not threading.main_thread():
+        return False
+    signal.signal(signum, handler)
+    return True
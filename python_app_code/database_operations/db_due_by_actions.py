@@ -1,41 +1,105 @@
-from database_operations import db_config as dbc
+from database_operations import db_cache as dbch, db_metrics as dbm, db_models as dbmo, db_pool as dbp, db_statements as dbst
 import psycopg2
 from psycopg2 import sql
 from psycopg2.extras import RealDictCursor
 from typing import Optional, Tuple
+import logging
 
 # This script defines all operations that can be done on the Due_by table
 
+logger = logging.getLogger(__name__)
+
+# Columns of the selected due dates, in the order of the fields of their record
+DUE_BY_SELECT_LIST = ', '.join(dbmo.DueBy.COLUMNS)
+
+# Version of the due dates of a task: a digest of their row versions (xmin)
+DUE_DATES_VERSION = 'md5(string_agg(due_date::text || \':\' || xmin::text, \',\' ORDER BY due_date))'
+
+# Fixed queries, run as prepared statements (see db_statements).
+# The due dates are selected along with their version, as their last column, so that both come from the same snapshot.
+dbst.register('due_by_select', 'SELECT {0}, (SELECT {1} FROM app."Due_by" WHERE task_id = $1) '
+                               'FROM app."Due_by" WHERE task_id = $1 ORDER BY due_date'.format(DUE_BY_SELECT_LIST, DUE_DATES_VERSION),
+              ('integer',))
+dbst.register('due_by_version', 'SELECT {0} FROM app."Due_by" WHERE task_id = $1'.format(DUE_DATES_VERSION), ('integer',))
+dbst.register('due_by_select_one', 'SELECT {0} FROM app."Due_by" WHERE task_id = $1 AND due_date = $2'.format(DUE_BY_SELECT_LIST),
+              ('integer', 'date'))
+dbst.register('due_by_insert', 'INSERT INTO app."Due_by" (task_id, due_date) VALUES ($1, $2)', ('integer', 'date'))
+
 def get_due_by(task_id: str) -> list:
     """
     Retrieve all due dates of a given task from the Due_by table.
+    The result is read through the cache, which is invalidated by every write to the task's due dates. It isn't timed
+    itself, get_versioned_due_by() is.
 
     Args:
         task_id (str): The ID of the task.
 
     Returns:
-        list: A list of dictionaries representing the rows retrieved from the Due_by table.
-              Each dictionary contains the column names as keys and the corresponding values.
-              The returned list is sorted by the due_date column placing the earliest date first.
+        list: A list of DueBy records (see db_models), sorted by due date placing the earliest date first.
 
     Raises:
         Exception: If there is an error while executing the SQL query or connecting to the database.
 
     """
-    
-    select_query_base = 'SELECT * FROM app."Due_by" WHERE task_id = {0} ORDER BY due_date'
-    select_query = sql.SQL(select_query_base).format(sql.Literal(task_id))
-    config  = dbc.load_config()
+    return get_versioned_due_by(task_id)[1]
+
+@dbm.timed
+def get_versioned_due_by(task_id: str) -> Tuple[Optional[str], list]:
+    """
+    Retrieve all due dates of a given task along with their version, read by the same query.
+    Both are cached together (see get_due_by()), so the version always describes the returned due dates, even when
+    the cached ones are older than those in the database.
+
+    Args:
+        task_id (str): The ID of the task.
+
+    Returns:
+        tuple: A tuple containing the version of the due dates, as returned by get_due_by_version() (None if the task
+               has no due date), and the list returned by get_due_by().
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    def load() -> tuple:
+        with dbp.connection() as conn:
+            with conn.cursor() as cur:
+                dbst.execute(cur, 'due_by_select', (task_id,))
+                rows = cur.fetchall()
+                return (rows[0][-1] if rows else None), dbmo.from_rows(dbmo.DueBy, [row[:-1] for row in rows])
+
     try:
-        with psycopg2.connect(**config) as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(select_query)
-                return cur.fetchall()
+        return dbch.get_cache().get_or_load(dbch.due_by_key(task_id), load)
 
     except (Exception, psycopg2.DatabaseError) as error:
-        print(error)
+        logger.error('Database operation failed: %s', error)
         raise error
 
+@dbm.timed
+def get_due_by_version(task_id: str) -> Optional[str]:
+    """
+    Retrieve a version of all due dates of a given task without reading the due dates themselves.
+    The version changes whenever one of the task's due dates is added or updated.
+
+    Args:
+        task_id (str): The ID of the task.
+
+    Returns:
+        str: A digest of the row versions (xmin) of the task's due dates, None if the task has no due date.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    try:
+        with dbp.connection() as conn:
+            with conn.cursor() as cur:
+                dbst.execute(cur, 'due_by_version', (task_id,))
+                return cur.fetchone()[0]
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+@dbm.timed
 def get_specific_due_by(task_id: str, due_date: str) -> list:
     """ Retrieve a specific due date of a given task from the Due_by table.
 
@@ -44,29 +108,138 @@ def get_specific_due_by(task_id: str, due_date: str) -> list:
         due_date (str): The due date of the task.
 
     Returns:
-        list: A list of dictionaries representing the rows retrieved from the "Due_by" table.
-              Each dictionary contains the column names as keys and the corresponding values.
+        list: A list with the DueBy record (see db_models) of the due date, empty if it doesn't exist.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+
+    try:
+        with dbp.connection() as conn:
+            with conn.cursor() as cur:
+                dbst.execute(cur, 'due_by_select_one', (task_id, due_date))
+                return dbmo.from_rows(dbmo.DueBy, cur)
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+def compose_due_by_filters(due_from: Optional[str] = None, due_to: Optional[str] = None, active: bool = True,
+                           after: Optional[Tuple[str, int]] = None) -> Tuple[sql.Composable, list]:
+    """
+    Composes the WHERE clause that selects due dates by date range, for the due date listing and its histogram.
+    With 'active' set to True, the clause matches the predicate of the partial index 'due_by_active_due_date_idx' of
+    the v1.0.1 design.
+
+    Args:
+        due_from (str, optional): Only keep due dates on or after this date ('YYYY-MM-DD'). Defaults to None.
+        due_to (str, optional): Only keep due dates on or before this date ('YYYY-MM-DD'). Defaults to None.
+        active (bool, optional): If True only active due dates are kept, if False only inactive ones. Defaults to True.
+        after (Tuple[str, int], optional): Only keep due dates after this (due_date, task_id) pair (keyset pagination).
+                                           Defaults to None.
+
+    Returns:
+        tuple: A tuple containing the composed WHERE clause and the list of its parameters.
+    """
+    conditions = [sql.SQL('d.is_active') if active else sql.SQL('NOT d.is_active')]
+    params = []
+    if due_from is not None:
+        conditions.append(sql.SQL('d.due_date >= %s'))
+        params.append(due_from)
+    if due_to is not None:
+        conditions.append(sql.SQL('d.due_date <= %s'))
+        params.append(due_to)
+    if after is not None:
+        conditions.append(sql.SQL('(d.due_date, d.task_id) > (%s::date, %s)'))
+        params.extend(after)
+    return sql.SQL(' WHERE ') + sql.SQL(' AND ').join(conditions), params
+
+def compose_due_dates_query(due_from: Optional[str] = None, due_to: Optional[str] = None, active: bool = True,
+                            limit: Optional[int] = None, after: Optional[Tuple[str, int]] = None) -> Tuple[sql.Composable, list]:
+    """
+    Composes the query of get_due_dates_in_range(), whose arguments it takes.
+
+    Returns:
+        tuple: A tuple containing the composed query and the list of its parameters.
+    """
+    where_clause, params = compose_due_by_filters(due_from, due_to, active, after)
+    select_query = sql.SQL('SELECT d.due_date, d.is_active, d.task_id, t.task_name, t.task_status '
+                           'FROM app."Due_by" AS d JOIN app."Task" AS t ON t.id = d.task_id'
+                           '{0} ORDER BY d.due_date, d.task_id').format(where_clause)
+    if limit is not None:
+        select_query += sql.SQL(' LIMIT %s')
+        params.append(limit)
+    return select_query, params
+
+@dbm.timed
+def get_due_dates_in_range(due_from: Optional[str] = None, due_to: Optional[str] = None, active: bool = True,
+                           limit: Optional[int] = None, after: Optional[Tuple[str, int]] = None) -> list:
+    """
+    Retrieve one page of the due dates of every task within a date range, along with their task's name and status,
+    sorted by due date (then by task ID).
+
+    Pagination is keyset based: the next page is requested with the (due_date, task_id) of the last due date
+    of the current page as 'after'. The active due dates are read through a partial index.
+
+    Args:
+        due_from (str, optional): Only return due dates on or after this date ('YYYY-MM-DD'). Defaults to None.
+        due_to (str, optional): Only return due dates on or before this date ('YYYY-MM-DD'). Defaults to None.
+        active (bool, optional): If True only active due dates are returned, if False only inactive ones. Defaults to True.
+        limit (int, optional): The maximum number of due dates to return. Defaults to None, returning every match.
+        after (Tuple[str, int], optional): Only return due dates after this (due_date, task_id) pair. Defaults to None.
+
+    Returns:
+        list: A list of DueByWithTask records (see db_models).
 
     Raises:
         Exception: If there is an error while executing the SQL query or connecting to the database.
     """
+    select_query, params = compose_due_dates_query(due_from, due_to, active, limit, after)
+    try:
+        with dbp.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(select_query, params)
+                return dbmo.from_rows(dbmo.DueByWithTask, cur)
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+@dbm.timed
+def get_due_dates_histogram(due_from: Optional[str] = None, due_to: Optional[str] = None, active: bool = True) -> list:
+    """
+    Count the due dates of every task per day within a date range, e.g. for calendar views.
+    Days without any due date are left out.
 
-    select_query_base = 'SELECT * FROM app."Due_by" WHERE task_id = {0} AND due_date = {1}'
-    select_query = sql.SQL(select_query_base).format(sql.Literal(task_id), sql.Literal(due_date))
-    config  = dbc.load_config()
+    Args:
+        due_from (str, optional): Only count due dates on or after this date ('YYYY-MM-DD'). Defaults to None.
+        due_to (str, optional): Only count due dates on or before this date ('YYYY-MM-DD'). Defaults to None.
+        active (bool, optional): If True only active due dates are counted, if False only inactive ones. Defaults to True.
+
+    Returns:
+        list: A list of dictionaries with the 'due_date' and 'count' keys, sorted by due date.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    where_clause, params = compose_due_by_filters(due_from, due_to, active)
+    select_query = sql.SQL('SELECT d.due_date, count(*) AS count FROM app."Due_by" AS d'
+                           '{0} GROUP BY d.due_date ORDER BY d.due_date').format(where_clause)
     try:
-        with psycopg2.connect(**config) as conn:
+        with dbp.connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(select_query)
+                cur.execute(select_query, params)
                 return cur.fetchall()
 
     except (Exception, psycopg2.DatabaseError) as error:
-        print(error)
+        logger.error('Database operation failed: %s', error)
         raise error
 
+@dbm.timed
 def insert_due_date(conn: psycopg2.extensions.connection, task_id: int, due_date: str) -> None:
     """
-    Inserts a due date for a task into the database.
+    Inserts a due date for a task into the database, within the current transaction of the connection, which the
+    caller commits (e.g. along with the insertion of the task).
 
     Args:
         conn (psycopg2.extensions.connection): The database connection object.
@@ -80,132 +253,162 @@ def insert_due_date(conn: psycopg2.extensions.connection, task_id: int, due_date
         Exception: If there is an error while executing the SQL query or connecting to the database.
 
     """
-    insert_query_base = "INSERT INTO app.\"Due_by\"({columns}) VALUES({values});"
-    insert_query = sql.SQL(insert_query_base).format(
-                        columns=sql.SQL(',').join(map(sql.Identifier, ("task_id", "due_date"))),
-                        values=sql.SQL(',').join(map(sql.Literal, (task_id, due_date)))
-                    )
-    
-    # print(insert_query.as_string(conn)) # DEBUG
     try:
         with  conn.cursor() as cur:
-            cur.execute(insert_query, (task_id, due_date))
-            conn.commit()
+            dbst.execute(cur, 'due_by_insert', (task_id, due_date))
             return None
     except (Exception, psycopg2.DatabaseError) as error:
-        print(error)
+        logger.error('Database operation failed: %s', error)
         raise error
 
-def insert_into_due_by_table(task_id: int, due_date: str) -> str:
-    """
-    Insert or update a due date for a task in the Due_by table.
+# Outcomes of apply_due_date()
+DUE_DATE_INSERTED = "inserted"
+DUE_DATE_ACTIVATED = "activated"
+DUE_DATE_DEACTIVATED = "deactivated"
+DUE_DATE_TASK_NOT_FOUND = "task_not_found"
+DUE_DATE_ALREADY_EXISTS = "already_exists"
+DUE_DATE_NOT_FOUND = "not_found"
 
-    Parameters:
-    - task_id (int): The ID of the task.
-    - due_date (str): The new due date to be inserted or updated.
+# Modes of apply_due_date()
+MODE_CREATE = "create"
+MODE_UPDATE = "update"
+MODE_UPSERT = "upsert"
 
-    Logic:
-    1. Check if the task has an active due date.
-    2. If there is an active due date and the new due date is different from the active one,
-       update the corresponding row to set 'is_active' to False.
-    3. If the new due date is the same as the active one, end the process.
-    4. Check if the new due date is already present in the table with 'is_active' set to False.
-       If it is, update that row to set 'is_active' to True.
-       If it is present with 'is_active' set to True, the due date is deactivated.
-    5. If the new due date is not present, add a new row with the new due date and set 'is_active' to True.
+# Both statements are sent in a single round trip. The first one locks the task's row so that concurrent changes
+# of the same task's due dates are serialized, the second one then runs with a fresh snapshot taken after the lock
+# was granted: it deactivates the active due date if it is a different one, inserts the new due date or toggles it
+# if it is already present, and reports what happened.
+APPLY_DUE_DATE_QUERY = """
+SELECT id FROM app."Task" WHERE id = %(task_id)s FOR UPDATE;
+WITH task AS (
+    SELECT id FROM app."Task" WHERE id = %(task_id)s
+), current_due_date AS (
+    SELECT is_active FROM app."Due_by" WHERE task_id = %(task_id)s AND due_date = %(due_date)s::date
+), allowed AS (
+    SELECT id FROM task
+    WHERE %(mode)s = 'upsert'
+       OR (%(mode)s = 'create' AND NOT EXISTS (SELECT 1 FROM current_due_date))
+       OR (%(mode)s = 'update' AND EXISTS (SELECT 1 FROM current_due_date))
+), deactivated AS (
+    UPDATE app."Due_by" AS d SET is_active = false
+    FROM allowed AS a
+    WHERE d.task_id = a.id AND d.is_active AND d.due_date <> %(due_date)s::date
+    RETURNING d.due_date
+), upserted AS (
+    INSERT INTO app."Due_by" AS d (task_id, due_date, is_active)
+    SELECT id, %(due_date)s::date, true FROM allowed
+    ON CONFLICT (task_id, due_date) DO UPDATE SET is_active = NOT d.is_active
+    RETURNING d.is_active, (d.xmax = 0) AS inserted
+)
+SELECT EXISTS (SELECT 1 FROM task) AS task_found,
+       EXISTS (SELECT 1 FROM current_due_date) AS due_date_found,
+       u.is_active, u.inserted
+FROM (SELECT 1) AS one LEFT JOIN upserted AS u ON true
+"""
+
+# The two statements of APPLY_DUE_DATE_QUERY, with positional placeholders ($1: task_id, $2: due_date, $3: mode)
+APPLY_DUE_DATE_LOCK_QUERY, APPLY_DUE_DATE_CHANGE_QUERY = (dbst.to_positional(statement.strip(), ("task_id", "due_date", "mode"))
+                                                          for statement in APPLY_DUE_DATE_QUERY.split(';', 1))
+dbst.register('due_by_apply_lock', APPLY_DUE_DATE_LOCK_QUERY, ('integer',))
+dbst.register('due_by_apply_change', APPLY_DUE_DATE_CHANGE_QUERY, ('integer', 'date', 'text'))
+
+def execute_apply_due_date(cur: psycopg2.extensions.cursor, task_id: int, due_date: str, mode: str) -> Tuple[str, Optional[str]]:
+    """
+    Runs the due date state machine described in apply_due_date() with the given cursor,
+    as part of the transaction the cursor's connection is in.
+
+    Args:
+        cur (psycopg2.extensions.cursor): The database cursor object.
+        task_id (int): The ID of the task.
+        due_date (str): The due date to be inserted or updated.
+        mode (str): One of MODE_CREATE, MODE_UPDATE or MODE_UPSERT.
 
-    Raises:
-        Exception: If an error occurs during the deletion process.
-    
     Returns:
-    - str: A message indicating the result of the operation.
+        tuple: A tuple containing the outcome (one of the DUE_DATE_* values) and a message describing it,
+               the message is None if nothing was changed.
     """
-    select_query, update_deactivate_query, update_activate_query, insert_query = prep_insert_due_date_queries(task_id, due_date)
-    config = dbc.load_config()
-    msg: Optional[str] = None
-    try:
-        with psycopg2.connect(**config) as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # Check if the task has an active due date
-                cur.execute(select_query)
-                rows = cur.fetchall()
-                further_modification_necessary: bool = True
-                due_date_already_present: bool = False
-                if rows:
-                    further_modification_necessary, due_date_already_present, msg = check_current_due_date(cur, rows, due_date,
-                                                                                                    update_deactivate_query)
-                # If modification is necessary, and due date is already present, activate row
-                if further_modification_necessary:
-                    if due_date_already_present:
-                        cur.execute(update_activate_query)
-                        msg = f"Updated active due date for task id: {task_id}"
-                    else:
-                        # If modification is necessary, and new due date is not present, insert a new row
-                        cur.execute(insert_query)
-                        msg = f"Insert new active due date for task id: {task_id}"
-                    conn.commit()
-                return msg
-    except (Exception, psycopg2.DatabaseError) as error:
-        print(error)
-        raise error
-    
-def prep_insert_due_date_queries(task_id: int, due_date: str) -> Tuple[str, str, str, str]:
+    dbst.execute_batch(cur, (('due_by_apply_lock', (task_id,)), ('due_by_apply_change', (task_id, due_date, mode))))
+    return describe_due_date_outcome(task_id, mode, cur.fetchone())
+
+def describe_due_date_outcome(task_id: int, mode: str, result_row: tuple) -> Tuple[str, Optional[str]]:
     """
-    Prepare SQL queries for inserting/updating due dates.
+    Turns the row returned by APPLY_DUE_DATE_QUERY into the outcome of the due date change.
 
     Args:
         task_id (int): The ID of the task.
-        due_date (str): The due date of the task.
+        mode (str): One of MODE_CREATE, MODE_UPDATE or MODE_UPSERT.
+        result_row (tuple): The row returned by the query (task_found, due_date_found, is_active, inserted).
 
     Returns:
-        tuple: A tuple containing the following SQL queries:
-            - select_query (str): The SELECT query for retrieving the existing due date for the task.
-            - update_deactivate_query (str): The UPDATE query for deactivating the existing due date for the task.
-            - update_activate_query (str): The UPDATE query for activating a new due date for the task.
-            - insert_query (str): The INSERT query for inserting a new due date for the task.
-    """
-    select_query_base = 'SELECT * FROM app."Due_by" WHERE task_id = {0}'
-    select_query = sql.SQL(select_query_base).format(sql.Literal(task_id))
-    update_deactivate_query_base = 'UPDATE app."Due_by" SET is_active = false WHERE task_id = {0} AND is_active = true'
-    update_activate_query_base = 'UPDATE app."Due_by" SET is_active = true WHERE task_id = {0} AND due_date = {1}'
-    update_deactivate_query = sql.SQL(update_deactivate_query_base).format(sql.Literal(task_id))
-    update_activate_query = sql.SQL(update_activate_query_base).format(sql.Literal(task_id), sql.Literal(due_date))
-    insert_query_base = 'INSERT INTO app."Due_by" (task_id, due_date, is_active) VALUES ({0}, {1}, true)'
-    insert_query = sql.SQL(insert_query_base).format(sql.Literal(task_id), sql.Literal(due_date))
-    return select_query, update_deactivate_query, update_activate_query, insert_query
-
-def check_current_due_date(cur: psycopg2.extensions.cursor, due_date_rows: list, due_date: str,
-                            update_deactivate_query: str) -> tuple:
-    """
-    Check the current due date and perform necessary modifications as described in the logic of insert_into_due_by_table().
+        tuple: A tuple containing the outcome (one of the DUE_DATE_* values) and a message describing it,
+               the message is None if nothing was changed.
+    """
+    task_found, due_date_found, is_active, inserted = result_row
+    if not task_found:
+        return DUE_DATE_TASK_NOT_FOUND, None
+    if mode == MODE_CREATE and due_date_found:
+        return DUE_DATE_ALREADY_EXISTS, None
+    if mode == MODE_UPDATE and not due_date_found:
+        return DUE_DATE_NOT_FOUND, None
+    if inserted:
+        return DUE_DATE_INSERTED, f"Insert new active due date for task id: {task_id}"
+    if is_active:
+        return DUE_DATE_ACTIVATED, f"Updated active due date for task id: {task_id}"
+    return DUE_DATE_DEACTIVATED, "New due date is the same as the active one. The date is deactivated."
+
+@dbm.timed
+def apply_due_date(task_id: int, due_date: str, mode: str = MODE_UPSERT) -> Tuple[str, Optional[str]]:
+    """
+    Insert or update a due date for a task in the Due_by table, atomically and in a single round trip.
+
+    Logic:
+    1. If the task doesn't exist, nothing is changed.
+    2. In MODE_CREATE, nothing is changed if the due date is already present for the task.
+       In MODE_UPDATE, nothing is changed if the due date is not present for the task.
+    3. If the task has an active due date different from the new one, it is deactivated.
+    4. If the new due date is not present, a new row is added with 'is_active' set to True.
+       If it is present and inactive, it is activated.
+       If it is present and active (it is the same as the active one), it is deactivated.
+
+    Concurrent calls for the same task are serialized by a lock on the task's row, so a task never ends up
+    with more than one active due date.
 
     Args:
-        cur (psycopg2.extensions.cursor): The database cursor object.
-        due_date_rows (list): A list of dictionaries representing the rows of due dates.
-        due_date (str): The new due date to be checked.
-        update_deactivate_query (str): The SQL query to deactivate the previous old due date.
+        task_id (int): The ID of the task.
+        due_date (str): The new due date to be inserted or updated.
+        mode (str, optional): One of MODE_CREATE, MODE_UPDATE or MODE_UPSERT. Defaults to MODE_UPSERT.
+
+    Returns:
+        tuple: A tuple containing the outcome (one of the DUE_DATE_* values) and a message describing it,
+               the message is None if nothing was changed.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    try:
+        with dbp.connection() as conn:
+            with conn.cursor() as cur:
+                outcome, msg = execute_apply_due_date(cur, task_id, due_date, mode)
+
+        if msg is not None:
+            dbch.invalidate_due_by(task_id)
+        return outcome, msg
+    except (Exception, psycopg2.DatabaseError) as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+def insert_into_due_by_table(task_id: int, due_date: str) -> str:
+    """
+    Insert or update a due date for a task in the Due_by table, following the logic of apply_due_date().
 
+    Parameters:
+    - task_id (int): The ID of the task.
+    - due_date (str): The new due date to be inserted or updated.
+
+    Raises:
+        Exception: If an error occurs during the deletion process.
+    
     Returns:
-        tuple: A tuple containing the following values:
-            - further_modification_necessary (bool): Indicates whether further modification is necessary after this function.
-            - due_date_already_present (bool): Indicates whether the due date is already present.
-            - msg (str): A message indicating the result of the operation.
-    """
-    further_modification_necessary = True
-    due_date_already_present = False
-    active_due_date = None
-    for row in due_date_rows:
-        if row["is_active"]:
-            active_due_date = row["due_date"]
-        if str(row["due_date"]) == due_date:
-            due_date_already_present = True
-    # If the new due date is different from the active one, update the active row
-    # Otherwise, just deactivate the active row
-    if str(active_due_date) != due_date:
-        cur.execute(update_deactivate_query) # Deactivate previous old due date
-        msg: str = "Updated active due date"
-    else:
-        cur.execute(update_deactivate_query) # Deactivate due date
-        further_modification_necessary = False
-        msg = "New due date is the same as the active one. The date is deactivated."
-    return further_modification_necessary, due_date_already_present, msg
+    - str: A message indicating the result of the operation, None if the task doesn't exist.
+    """
+    return apply_due_date(task_id, due_date, MODE_UPSERT)[1]
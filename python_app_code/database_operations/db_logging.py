@@ -0,0 +1,254 @@
+from database_operations import db_config as dbc
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import uuid
+
+# This script defines the structured logging of the app. Records are written as one JSON object per line by a
+# background thread: the threads serving requests only put them on a bounded queue, and records are dropped (and
+# counted) rather than blocking a request when the queue is full. Every record carries the correlation id of the
+# request it was logged for. The settings are read from the [logging] section of database.ini.
+
+SLOW_QUERY_LOGGER = 'database_operations.slow_query'
+ACCESS_LOGGER = 'rest_api.access'
+
+# Attributes every LogRecord has, the other ones were passed with 'extra' and are written as fields of the record
+RESERVED_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'correlation_id'}
+
+_correlation_id: contextvars.ContextVar = contextvars.ContextVar('correlation_id', default=None)
+
+def new_correlation_id() -> str:
+    return uuid.uuid4().hex
+
+def set_correlation_id(correlation_id: Optional[str]) -> contextvars.Token:
+    """
+    Sets the correlation id of the records logged by the current thread (or asyncio task).
+
+    Args:
+        correlation_id (str, optional): The correlation id, None to clear it.
+
+    Returns:
+        contextvars.Token: The token restoring the previous correlation id with reset_correlation_id().
+    """
+    return _correlation_id.set(correlation_id)
+
+def reset_correlation_id(token: contextvars.Token) -> None:
+    _correlation_id.reset(token)
+
+def get_correlation_id() -> Optional[str]:
+    return _correlation_id.get()
+
+class CorrelationIdFilter(logging.Filter):
+    """
+    Adds the current correlation id to the records. It must run on the thread logging them, i.e. before the queue.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = _correlation_id.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as a single line JSON object, with the fields passed through 'extra' at the top level.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        document = {"timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+                    "level": record.levelname,
+                    "logger": record.name,
+                    "message": record.getMessage(),
+                    "correlation_id": getattr(record, 'correlation_id', None)}
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRIBUTES:
+                document[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            document["exception"] = record.exc_text
+        return json.dumps(document, default=str)
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that never blocks: records are dropped and counted when the queue is full.
+    """
+
+    def __init__(self, record_queue: queue.Queue) -> None:
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Resolves the message and the traceback of a record, which may reference objects that change once the
+        logging call returns, and leaves the formatting to the listener's thread.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class LogSettings:
+    """
+    Immutable snapshot of the [logging] section used on the request path.
+
+    Attributes:
+        level (int): The minimum level of the logged records.
+        slow_query_seconds (float): The duration above which a database operation is logged as slow.
+        request_sample_rate (float): The fraction of the successful requests logged by the access log.
+    """
+    __slots__ = ('level', 'slow_query_seconds', 'request_sample_rate')
+
+    def __init__(self, config: dbc.AppConfig) -> None:
+        section = config.section('logging')
+        object.__setattr__(self, 'level', logging.getLevelName(section.get('level', 'INFO').upper()))
+        object.__setattr__(self, 'slow_query_seconds', float(section.get('slow_query_ms', 100)) / 1000)
+        object.__setattr__(self, 'request_sample_rate', float(section.get('request_sample_rate', 0.01)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('LogSettings is immutable')
+
+
+_settings: Optional[LogSettings] = None
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+_logging_lock = threading.Lock()
+
+def get_settings() -> LogSettings:
+    """
+    Returns the logging settings, reading them from the configuration on first use.
+
+    Returns:
+        LogSettings: The current settings.
+    """
+    global _settings
+    if _settings is None:
+        _settings = LogSettings(dbc.get_config())
+    return _settings
+
+def apply_settings(config: dbc.AppConfig) -> None:
+    """
+    Replaces the logging settings with those of the given configuration, e.g. once it is reloaded.
+
+    Args:
+        config (dbc.AppConfig): The configuration.
+    """
+    global _settings
+    _settings = LogSettings(config)
+    logging.getLogger().setLevel(_settings.level)
+
+dbc.add_reload_listener(apply_settings)
+
+def configure_logging(config: Optional[dbc.AppConfig] = None) -> None:
+    """
+    Sends the records of every logger to the queue and starts the thread writing them to the standard output.
+    Calling it again once logging is configured does nothing.
+
+    Args:
+        config (dbc.AppConfig, optional): The configuration. Defaults to the current one.
+    """
+    global _listener, _queue_handler
+    with _logging_lock:
+        if _listener is not None:
+            return
+        config = config or dbc.get_config()
+        record_queue = queue.Queue(maxsize=int(config.section('logging').get('queue_size', 10000)))
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(JsonFormatter())
+        _queue_handler = DroppingQueueHandler(record_queue)
+        _queue_handler.addFilter(CorrelationIdFilter())
+        root = logging.getLogger()
+        root.addHandler(_queue_handler)
+        apply_settings(config)
+        _listener = QueueListener(record_queue, output, respect_handler_level=True)
+        _listener.start()
+    atexit.register(stop_logging)
+
+def stop_logging() -> None:
+    """
+    Writes the queued records and stops the logging thread. The records logged afterwards are handled by the
+    default handler of the logging module until configure_logging() is called again, e.g. in a forked worker.
+    """
+    global _listener, _queue_handler
+    with _logging_lock:
+        listener, _listener = _listener, None
+        handler, _queue_handler = _queue_handler, None
+    if handler is not None:
+        logging.getLogger().removeHandler(handler)
+    if listener is not None:
+        listener.stop()
+
+def reset_after_fork() -> None:
+    """
+    Starts the logging thread again in a newly forked worker: the thread of the parent process isn't running in the
+    child, and its queue may have been locked by it when the parent forked. The records the parent had queued are
+    left to the parent.
+    """
+    global _listener, _queue_handler, _logging_lock
+    _logging_lock = threading.Lock()
+    handler, _queue_handler = _queue_handler, None
+    if handler is not None:
+        logging.getLogger().removeHandler(handler)
+    if _listener is not None:
+        _listener = None
+        configure_logging()
+
+def stats() -> dict:
+    """
+    Returns the counters of the logging queue.
+
+    Returns:
+        dict: The number of records waiting to be written ('queued') and of records dropped ('dropped').
+    """
+    handler = _queue_handler
+    if handler is None:
+        return {"queued": 0, "dropped": 0}
+    return {"queued": handler.queue.qsize(), "dropped": handler.dropped}
+
+def should_sample(rate: float) -> bool:
+    """
+    Decides whether one occurrence of a high-volume event is logged, so that a fraction 'rate' of them is.
+    """
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+def redact(value):
+    """
+    Returns what the logs may show of a parameter: numbers, booleans and None as they are, only the type (and the
+    length of collections) of anything else, which may hold user data.
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple, set, dict)):
+        return '<{0} of {1}>'.format(type(value).__name__, len(value))
+    return '<{0}>'.format(type(value).__name__)
+
+def log_slow_query(operation: str, duration: float, params: dict) -> None:
+    """
+    Logs a database operation that took longer than the slow query threshold.
+
+    Args:
+        operation (str): The name of the operation, e.g. 'db_task_actions.get_tasks'.
+        duration (float): Its duration in seconds.
+        params (dict): Its arguments by name, they are redacted.
+    """
+    logging.getLogger(SLOW_QUERY_LOGGER).warning('Slow database operation', extra={
+        "operation": operation,
+        "duration_ms": round(duration * 1000, 3),
+        "threshold_ms": round(get_settings().slow_query_seconds * 1000, 3),
+        "params": {name: redact(value) for name, value in params.items()}})
@@ -0,0 +1,107 @@
+from database_operations import db_logging as dbl
+from functools import wraps
+from typing import Callable
+import inspect
+import threading
+import time
+from prometheus_client import Counter, Histogram
+
+# This script defines the Prometheus metrics of the database layer: the duration and the number of rows of each
+# database operation, and the connections used. The metrics are exposed by rest_api/metrics_operations_api.py.
+# With several worker processes, PROMETHEUS_MULTIPROC_DIR must point to a directory shared by the workers (see the
+# multiprocess mode of prometheus_client).
+
+DB_OPERATION_DURATION = Histogram('db_operation_duration_seconds', 'Duration of the database operations.', ['operation'],
+                                  buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+DB_OPERATION_ERRORS = Counter('db_operation_errors_total', 'Database operations that raised an error.', ['operation'])
+DB_ROWS_RETURNED = Counter('db_rows_returned_total', 'Rows returned by the database operations.', ['operation'])
+DB_CONNECTIONS_OPENED = Counter('db_connections_opened_total', 'Connections opened by the pool.')
+DB_CHECKOUTS = Counter('db_connection_checkouts_total', 'Connections checked out of the pool.')
+
+# Number of connections checked out by the current thread since the last reset, i.e. by the request being served
+_checkouts = threading.local()
+
+def record_checkout() -> None:
+    """
+    Counts a connection checked out of the pool.
+    """
+    DB_CHECKOUTS.inc()
+    _checkouts.count = getattr(_checkouts, 'count', 0) + 1
+
+def reset_checkouts() -> int:
+    """
+    Resets the number of connections checked out by the current thread.
+
+    Returns:
+        int: The number of connections checked out since the previous reset.
+    """
+    count = getattr(_checkouts, 'count', 0)
+    _checkouts.count = 0
+    return count
+
+def count_rows(result) -> int:
+    """
+    Returns the number of rows of a database operation's result: the length of a list, or of the first list of a
+    tuple (e.g. returned along with its version), 0 for anything else.
+    """
+    if isinstance(result, tuple):
+        result = next((item for item in result if isinstance(item, list)), None)
+    return len(result) if isinstance(result, list) else 0
+
+def timed(func: Callable) -> Callable:
+    """
+    Decorates a database operation so that its duration, errors and returned rows are recorded, labelled with
+    '<module>.<function>'. The rows yielded by a generator are counted, and its duration runs until it is exhausted.
+    Operations slower than the slow query threshold are also logged (see db_logging.log_slow_query()).
+
+    Args:
+        func (Callable): The database operation.
+
+    Returns:
+        Callable: The decorated operation.
+    """
+    operation = '{0}.{1}'.format(func.__module__.rsplit('.', 1)[-1], func.__name__)
+    # Children of the labelled metrics are resolved once, so that recording costs a timer and two increments
+    duration = DB_OPERATION_DURATION.labels(operation)
+    errors = DB_OPERATION_ERRORS.labels(operation)
+    rows = DB_ROWS_RETURNED.labels(operation)
+    signature = inspect.signature(func)
+
+    def record_duration(started: float, args: tuple, kwargs: dict) -> None:
+        elapsed = time.perf_counter() - started
+        duration.observe(elapsed)
+        if elapsed >= dbl.get_settings().slow_query_seconds:
+            # Only slow calls pay for binding their arguments to the parameter names
+            bound = signature.bind_partial(*args, **kwargs)
+            dbl.log_slow_query(operation, elapsed, bound.arguments)
+
+    if inspect.isgeneratorfunction(func):
+        @wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            count = 0
+            try:
+                for row in func(*args, **kwargs):
+                    count += 1
+                    yield row
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                record_duration(started, args, kwargs)
+                rows.inc(count)
+        return generator_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            record_duration(started, args, kwargs)
+        rows.inc(count_rows(result))
+        return result
+    return wrapper
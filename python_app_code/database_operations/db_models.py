@@ -0,0 +1,96 @@
+from dataclasses import dataclass, fields
+from datetime import date
+from itertools import starmap
+from typing import Iterable, Optional
+
+# This script defines the records returned by the lookups of db_task_actions and db_due_by_actions.
+#
+# They are slotted dataclasses built straight from the tuples of plain cursors, which takes a fraction of the memory
+# of one dictionary per row. Their fields are declared in alphabetical order and the queries select the columns in
+# that same order (see COLUMNS), so that a row is turned into a record positionally, and so that orjson, which
+# serializes dataclasses natively, writes the same documents as Flask's provider with its sorted keys.
+
+@dataclass(slots=True)
+class Task:
+    """
+    A row of the Task table.
+    """
+    creation_date: date
+    id: int
+    task_descrip: Optional[str]
+    task_name: str
+    task_status: str
+
+@dataclass(slots=True)
+class TaskWithDueBy:
+    """
+    A row of the Task table with every due date of the task, as a 'due_by' list of {'due_date', 'is_active'}.
+    """
+    creation_date: date
+    due_by: list
+    id: int
+    task_descrip: Optional[str]
+    task_name: str
+    task_status: str
+
+@dataclass(slots=True)
+class TaskWithActiveDueBy:
+    """
+    A row of the Task table with the active due date of the task, None if it has none.
+    """
+    creation_date: date
+    due_date: Optional[date]
+    id: int
+    task_descrip: Optional[str]
+    task_name: str
+    task_status: str
+
+@dataclass(slots=True)
+class TaskSearchResult:
+    """
+    A row of the Task table matching a search, with its relevance (the higher the better).
+    """
+    creation_date: date
+    id: int
+    rank: float
+    task_descrip: Optional[str]
+    task_name: str
+    task_status: str
+
+@dataclass(slots=True)
+class DueBy:
+    """
+    A row of the Due_by table.
+    """
+    due_date: date
+    is_active: bool
+    task_id: int
+
+@dataclass(slots=True)
+class DueByWithTask:
+    """
+    A row of the Due_by table along with the name and the status of its task.
+    """
+    due_date: date
+    is_active: bool
+    task_id: int
+    task_name: str
+    task_status: str
+
+# Columns each record is built from, in the order they must be selected
+for _model in (Task, TaskWithDueBy, TaskWithActiveDueBy, TaskSearchResult, DueBy, DueByWithTask):
+    _model.COLUMNS = tuple(field.name for field in fields(_model))
+
+def from_rows(model: type, rows: Iterable[tuple]) -> list:
+    """
+    Builds one record per row.
+
+    Args:
+        model (type): The record type.
+        rows (Iterable[tuple]): The rows, with the values of model.COLUMNS.
+
+    Returns:
+        list: The records.
+    """
+    return list(starmap(model, rows))
+
@@ -0,0 +1,346 @@
+from database_operations import db_config as dbc, db_metrics as dbm
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator, Mapping, Optional, Tuple
+import threading
+import time
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import PoolError
+import logging
+
+# This script defines the process-wide pool of PostgreSQL connections shared by every database operation
+
+logger = logging.getLogger(__name__)
+
+class PoolTimeoutError(PoolError):
+    """
+    Raised when no connection could be checked out of the pool before the wait timeout expired.
+    """
+
+class PooledConnection(psycopg2.extensions.connection):
+    """
+    Connection opened by the pool. It keeps track of the statements prepared on it (see db_statements).
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.prepared_statements = set()
+
+class ConnectionPool:
+    """
+    Thread-safe pool of PostgreSQL connections.
+
+    Connections are handed to one thread at a time, so the pool can be shared by all of Flask's threaded workers.
+    Idle connections are reused last-in first-out and are pinged before being handed out again when they have been
+    idle for longer than 'ping_after' seconds, stale or broken connections are transparently replaced.
+    """
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10,
+                 timeout: float = 5.0, ping_after: float = 30.0, connection_factory: type = None) -> None:
+        """
+        Initializes the pool and opens its first 'min_size' connections.
+
+        Args:
+            dsn (str): The libpq connection string given to psycopg2.connect().
+            min_size (int, optional): The number of connections opened upfront and always kept open. Defaults to 1.
+            max_size (int, optional): The maximum number of connections open at the same time. Defaults to 10.
+            timeout (float, optional): The maximum number of seconds a checkout waits for a free connection. Defaults to 5.0.
+            ping_after (float, optional): The number of idle seconds after which a connection is pinged before reuse. Defaults to 30.0.
+            connection_factory (type, optional): The class of the opened connections, a subclass of PooledConnection
+                                                 (e.g. to instrument them). Defaults to PooledConnection.
+
+        Raises:
+            ValueError: If the sizes are not consistent.
+        """
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError('Invalid pool sizes: min_size={0}, max_size={1}'.format(min_size, max_size))
+        self._dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._connection_factory = connection_factory or PooledConnection
+        self._idle: deque = deque()
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {"checkouts": 0, "waits": 0, "timeouts": 0, "failures": 0,
+                       "connections_opened": 0, "connections_closed": 0, "reconnects": 0}
+
+        for _ in range(min_size):
+            try:
+                self._size += 1
+                self._idle.append((self._connect(), time.monotonic()))
+            except (Exception, psycopg2.DatabaseError) as error:
+                # The database may not be up yet, missing connections are opened on demand
+                self._size -= 1
+                logger.warning('Could not open the initial connections: %s', error)
+                break
+
+    def _connect(self) -> psycopg2.extensions.connection:
+        """
+        Opens a new connection to the database and counts it.
+
+        Returns:
+            psycopg2.extensions.connection: The new connection.
+        """
+        try:
+            conn = psycopg2.connect(self._dsn, connection_factory=self._connection_factory)
+        except (Exception, psycopg2.DatabaseError):
+            with self._cond:
+                self._stats["failures"] += 1
+            raise
+        with self._cond:
+            self._stats["connections_opened"] += 1
+        dbm.DB_CONNECTIONS_OPENED.inc()
+        return conn
+
+    def _discard(self, conn: psycopg2.extensions.connection) -> None:
+        """
+        Closes a connection that is no longer usable, ignoring any error while doing so.
+
+        Args:
+            conn (psycopg2.extensions.connection): The connection to close.
+        """
+        try:
+            if not conn.closed:
+                conn.close()
+        except (Exception, psycopg2.DatabaseError):
+            pass
+        with self._cond:
+            self._stats["connections_closed"] += 1
+
+    @staticmethod
+    def _is_alive(conn: psycopg2.extensions.connection) -> bool:
+        """
+        Checks whether a connection is still usable by running a trivial query on it.
+
+        Args:
+            conn (psycopg2.extensions.connection): The connection to check.
+
+        Returns:
+            bool: True if the server answered, False otherwise.
+        """
+        if conn.closed:
+            return False
+        try:
+            with conn.cursor() as cur:
+                cur.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except (Exception, psycopg2.DatabaseError):
+            return False
+
+    def getconn(self, timeout: Optional[float] = None) -> psycopg2.extensions.connection:
+        """
+        Checks a connection out of the pool, waiting for one to be returned if the pool is exhausted.
+
+        Args:
+            timeout (float, optional): Overrides the pool's checkout timeout, in seconds. Defaults to None.
+
+        Returns:
+            psycopg2.extensions.connection: A connection ready to be used. It must be given back with putconn().
+
+        Raises:
+            PoolTimeoutError: If no connection became available before the timeout expired.
+            PoolError: If the pool has been closed.
+            Exception: If a new connection to the database could not be opened.
+        """
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        conn, last_used = None, None
+        with self._cond:
+            waited = False
+            while True:
+                if self._closed:
+                    raise PoolError('Connection pool is closed')
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Reserve a slot, the connection itself is opened outside of the lock
+                    self._size += 1
+                    break
+                if not waited:
+                    waited = True
+                    self._stats["waits"] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    self._stats["failures"] += 1
+                    raise PoolTimeoutError('Timed out after waiting for a free database connection')
+                self._cond.wait(remaining)
+
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif conn.closed or (time.monotonic() - last_used > self.ping_after and not self._is_alive(conn)):
+                self._discard(conn)
+                conn = self._connect()
+                with self._cond:
+                    self._stats["reconnects"] += 1
+        except (Exception, psycopg2.DatabaseError):
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._stats["checkouts"] += 1
+        return conn
+
+    def putconn(self, conn: psycopg2.extensions.connection, close: bool = False) -> None:
+        """
+        Gives a connection back to the pool. Any transaction left open is rolled back.
+
+        Args:
+            conn (psycopg2.extensions.connection): The connection previously obtained with getconn().
+            close (bool, optional): If True, the connection is closed instead of being reused. Defaults to False.
+        """
+        keep = not close and not conn.closed
+        if keep and conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except (Exception, psycopg2.DatabaseError):
+                keep = False
+        if keep:
+            with self._cond:
+                keep = not self._closed
+                if keep:
+                    self._idle.append((conn, time.monotonic()))
+                    self._cond.notify()
+        if not keep:
+            self._discard(conn)
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+
+    def closeall(self) -> None:
+        """
+        Closes every idle connection and stops handing out new ones.
+        Connections still checked out are closed when they are given back.
+        """
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the pool's counters.
+
+        Returns:
+            dict: The counters of checkouts, waits, timeouts, failures, opened/closed connections and reconnects,
+                  along with the current number of open and idle connections and the maximum one.
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats["size"] = self._size
+            stats["idle"] = len(self._idle)
+        stats["max_size"] = self.max_size
+        return stats
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+# Number of processes serving the app, each one with its own pool (see gunicorn.conf.py)
+_worker_count = 1
+
+def set_worker_count(workers: int) -> None:
+    """
+    Sets the number of worker processes sharing the connection budget, the pool is sized on its next creation.
+
+    Args:
+        workers (int): The number of worker processes.
+    """
+    global _worker_count
+    _worker_count = max(1, int(workers))
+
+def pool_sizes(pool_config: Mapping[str, str], workers: int = 1) -> Tuple[int, int]:
+    """
+    Computes the sizes of the pool of one worker process, so that the pools of all the workers together never open
+    more than 'connection_budget' connections. Without a budget, every worker gets 'max_size' connections.
+
+    Args:
+        pool_config (Mapping[str, str]): The [pool] section of the configuration.
+        workers (int, optional): The number of worker processes. Defaults to 1.
+
+    Returns:
+        Tuple[int, int]: The minimum and maximum sizes of the pool.
+    """
+    max_size = int(pool_config.get("max_size", 10))
+    budget = int(pool_config.get("connection_budget", 0))
+    if budget > 0:
+        if budget < workers:
+            logger.warning('The connection budget (%d) is lower than the number of workers (%d), '
+                           'each worker still gets one connection', budget, workers)
+        max_size = max(1, min(max_size, budget // workers))
+    return min(int(pool_config.get("min_size", 1)), max_size), max_size
+
+def get_pool() -> ConnectionPool:
+    """
+    Returns the process-wide connection pool, creating it from the configuration on first use.
+    The pool is closed and created again with the new settings whenever the configuration is reloaded.
+
+    Returns:
+        ConnectionPool: The shared connection pool.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = dbc.get_config()
+                pool_config = config.section('pool')
+                min_size, max_size = pool_sizes(pool_config, _worker_count)
+                _pool = ConnectionPool(config.dsn,
+                                       min_size=min_size,
+                                       max_size=max_size,
+                                       timeout=float(pool_config.get("checkout_timeout", 5)),
+                                       ping_after=float(pool_config.get("ping_after", 30)))
+    return _pool
+
+def close_pool() -> None:
+    """
+    Closes the process-wide connection pool, a new one is created on next use.
+    """
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.closeall()
+
+def reset_after_fork() -> None:
+    """
+    Forgets the pool inherited from the parent process, in a newly forked worker. Its connections belong to the
+    parent and are left untouched (closing them would end the parent's sessions), a new pool is created on next use.
+    """
+    global _pool, _pool_lock
+    _pool = None
+    # The lock may have been held by another thread of the parent when it forked
+    _pool_lock = threading.Lock()
+
+dbc.add_reload_listener(lambda config: close_pool())
+
+@contextmanager
+def connection() -> Iterator[psycopg2.extensions.connection]:
+    """
+    Borrows a connection from the process-wide pool for the duration of a 'with' block.
+
+    The block runs inside a transaction that is committed when it exits normally and rolled back if it raises,
+    the connection is then given back to the pool.
+
+    Yields:
+        psycopg2.extensions.connection: The borrowed connection.
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    dbm.record_checkout()
+    try:
+        with conn:
+            yield conn
+    finally:
+        pool.putconn(conn)
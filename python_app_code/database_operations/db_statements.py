@@ -0,0 +1,235 @@
+from database_operations import db_config as dbc
+from typing import Sequence, Tuple, Union
+import re
+import threading
+import psycopg2
+import psycopg2.extensions
+
+# This script defines the registry of the server-side prepared statements used by the fixed (hot) queries.
+# Each statement is prepared once per pooled connection, on its first use, and then executed with bound parameters,
+# so the database parses and plans it only once per connection.
+
+# Positional placeholders of the statements' queries
+PLACEHOLDER = re.compile(r'\$(\d+)')
+
+def to_positional(query: str, names: Tuple[str, ...]) -> str:
+    """
+    Converts a query using psycopg2's named placeholders into one using the server's positional placeholders.
+
+    Args:
+        query (str): The query, with '%(name)s' placeholders.
+        names (Tuple[str, ...]): The names of the placeholders, in the order of their positions.
+
+    Returns:
+        str: The query, with '$1', '$2', ... placeholders.
+    """
+    for position, name in enumerate(names, start=1):
+        query = query.replace('%({})s'.format(name), '${}'.format(position))
+    return query
+
+class PreparedStatement:
+    """
+    A fixed query with '$n' placeholders, along with the SQL used to prepare and to execute it.
+    """
+    __slots__ = ("name", "query", "param_types", "prepare_sql", "execute_sql")
+
+    def __init__(self, name: str, query: str, param_types: Sequence[str] = ()) -> None:
+        """
+        Args:
+            name (str): The name of the statement, unique within the registry.
+            query (str): A single SQL statement with '$1', '$2', ... placeholders.
+            param_types (Sequence[str], optional): The SQL types of the parameters. Defaults to ().
+        """
+        self.name = name
+        self.query = query
+        self.param_types = tuple(param_types)
+        types = ' ({})'.format(', '.join(self.param_types)) if self.param_types else ''
+        self.prepare_sql = 'PREPARE {0}{1} AS {2}'.format(name, types, query)
+        placeholders = ' ({})'.format(', '.join(['%s'] * len(self.param_types))) if self.param_types else ''
+        self.execute_sql = 'EXECUTE {0}{1}'.format(name, placeholders)
+
+class StatementRegistry:
+    """
+    Thread-safe registry of prepared statements, counting how often each one is prepared and executed.
+
+    The statements prepared on a connection are tracked by the connection itself (see db_pool.PooledConnection),
+    connections that don't track them run the statement's query directly instead.
+    """
+
+    def __init__(self) -> None:
+        self._statements = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def register(self, name: str, query: str, param_types: Sequence[str] = ()) -> PreparedStatement:
+        """
+        Adds a statement to the registry.
+
+        Args:
+            name (str): The name of the statement.
+            query (str): A single SQL statement with '$1', '$2', ... placeholders.
+            param_types (Sequence[str], optional): The SQL types of the parameters. Defaults to ().
+
+        Returns:
+            PreparedStatement: The registered statement.
+
+        Raises:
+            ValueError: If another statement is already registered under the same name.
+        """
+        statement = PreparedStatement(name, query, param_types)
+        with self._lock:
+            if name in self._statements:
+                raise ValueError('Statement already registered: {}'.format(name))
+            self._statements[name] = statement
+            self._stats[name] = {"prepares": 0, "executions": 0, "hits": 0, "unprepared": 0}
+        return statement
+
+    def compose(self, conn: psycopg2.extensions.connection,
+                calls: Sequence[Tuple[str, Sequence]]) -> Tuple[str, Union[list, dict]]:
+        """
+        Composes the SQL running the given statements, preceded by the PREPARE of the ones not yet prepared on the
+        connection. The statements are marked as prepared, the SQL must therefore be executed right away.
+
+        Args:
+            conn (psycopg2.extensions.connection): The connection the SQL is executed on.
+            calls (Sequence[Tuple[str, Sequence]]): The names of the statements to run, with their parameters.
+
+        Returns:
+            tuple: A tuple containing the SQL, made of one or more statements, and its parameters (None if there is none).
+        """
+        prepared = getattr(conn, 'prepared_statements', None)
+        if prepared is not None and not is_enabled():
+            prepared = None
+        parts = []
+        with self._lock:
+            statements = [self._statements[name] for name, _ in calls]
+            for statement in statements:
+                stats = self._stats[statement.name]
+                if prepared is None:
+                    stats["unprepared"] += 1
+                elif statement.name in prepared:
+                    stats["executions"] += 1
+                    stats["hits"] += 1
+                else:
+                    stats["executions"] += 1
+                    stats["prepares"] += 1
+
+        # Without any parameter, psycopg2 sends the SQL as is and '%' must then not be escaped
+        if any(len(call_params) for _, call_params in calls):
+            escape = lambda text: text.replace('%', '%%')
+        else:
+            escape = lambda text: text
+
+        if prepared is None:
+            # The queries are run directly, with their placeholders turned into named ones of psycopg2
+            params = {}
+            for index, (statement, (_, call_params)) in enumerate(zip(statements, calls)):
+                parts.append(PLACEHOLDER.sub(lambda match: '%(p{0}_{1})s'.format(index, match.group(1)),
+                                             escape(statement.query)))
+                params.update({'p{0}_{1}'.format(index, position): value
+                               for position, value in enumerate(call_params, start=1)})
+            return ';\n'.join(parts), params or None
+
+        params = []
+        for statement, (_, call_params) in zip(statements, calls):
+            if statement.name not in prepared:
+                parts.append(escape(statement.prepare_sql))
+                prepared.add(statement.name)
+            parts.append(statement.execute_sql)
+            params.extend(call_params)
+        return ';\n'.join(parts), params or None
+
+    def execute(self, cur: psycopg2.extensions.cursor, name: str, params: Sequence = ()) -> None:
+        """
+        Executes a statement with the given cursor, preparing it on the cursor's connection first if needed.
+        Its rows are then fetched from the cursor as usual.
+
+        Args:
+            cur (psycopg2.extensions.cursor): The cursor.
+            name (str): The name of the statement.
+            params (Sequence, optional): The values of its parameters. Defaults to ().
+        """
+        self.execute_batch(cur, ((name, params),))
+
+    def execute_batch(self, cur: psycopg2.extensions.cursor, calls: Sequence[Tuple[str, Sequence]]) -> None:
+        """
+        Executes several statements with the given cursor in a single round trip, preparing them on the cursor's
+        connection first if needed. The rows of the last statement are then fetched from the cursor as usual.
+
+        Args:
+            cur (psycopg2.extensions.cursor): The cursor.
+            calls (Sequence[Tuple[str, Sequence]]): The names of the statements to run, with their parameters.
+        """
+        query, params = self.compose(cur.connection, calls)
+        try:
+            cur.execute(query, params)
+        except (Exception, psycopg2.DatabaseError):
+            # The failed batch may have stopped before or after its PREPARE statements, so every statement of the
+            # connection is deallocated and prepared again on next use. The transaction is lost anyway.
+            forget_prepared(cur.connection)
+            raise
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the registry's counters.
+
+        Returns:
+            dict: Per statement, the number of times it was prepared, executed, executed without having to be prepared
+                  first (hits) and run directly on a connection without prepared statements (unprepared).
+        """
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+def forget_prepared(conn: psycopg2.extensions.connection) -> None:
+    """
+    Deallocates every prepared statement of a connection and forgets them, ignoring any error while doing so.
+    The connection is left without any open transaction.
+
+    Args:
+        conn (psycopg2.extensions.connection): The connection.
+    """
+    prepared = getattr(conn, 'prepared_statements', None)
+    if prepared is None:
+        return
+    prepared.clear()
+    try:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute('DEALLOCATE ALL')
+        conn.rollback()
+    except (Exception, psycopg2.DatabaseError):
+        pass
+
+def is_enabled() -> bool:
+    """
+    Tells whether prepared statements are enabled by the [pool] section of the configuration ('prepare_statements').
+    They must be disabled when the database is reached through a pooler that doesn't keep a session per client
+    (e.g. PgBouncer in transaction mode).
+    """
+    return dbc.get_config().section('pool').get('prepare_statements', 'true').lower() == 'true'
+
+_registry = StatementRegistry()
+
+def register(name: str, query: str, param_types: Sequence[str] = ()) -> PreparedStatement:
+    """
+    Adds a statement to the process-wide registry, see StatementRegistry.register().
+    """
+    return _registry.register(name, query, param_types)
+
+def execute(cur: psycopg2.extensions.cursor, name: str, params: Sequence = ()) -> None:
+    """
+    Executes a statement of the process-wide registry, see StatementRegistry.execute().
+    """
+    _registry.execute(cur, name, params)
+
+def execute_batch(cur: psycopg2.extensions.cursor, calls: Sequence[Tuple[str, Sequence]]) -> None:
+    """
+    Executes several statements of the process-wide registry in a single round trip, see StatementRegistry.execute_batch().
+    """
+    _registry.execute_batch(cur, calls)
+
+def stats() -> dict:
+    """
+    Returns the counters of the process-wide registry, see StatementRegistry.stats().
+    """
+    return _registry.stats()
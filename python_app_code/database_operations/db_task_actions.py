@@ -1,66 +1,552 @@
-from database_operations import db_config as dbc, db_due_by_actions as dbdba
+from database_operations import db_cache as dbch, db_metrics as dbm, db_models as dbmo, db_pool as dbp, db_statements as dbst, db_due_by_actions as dbdba
 import psycopg2
 from psycopg2 import sql
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import execute_values
+from datetime import date
+from typing import Callable, Iterator, Optional, Sequence, Tuple
+import logging
 
 # This script defines all operations that can be done on the Task table
 
+logger = logging.getLogger(__name__)
+
+# Columns of the rows produced by export_tasks()
+EXPORT_COLUMNS = ("id", "task_name", "task_descrip", "creation_date", "task_status")
+EXPORT_COLUMNS_WITH_DUE_BY = EXPORT_COLUMNS + ("due_date",)
+# Number of rows fetched from the server-side cursor at a time by export_tasks()
+EXPORT_BATCH_SIZE = 2000
+
+# Values of the 'include' argument of the task lookups, embedding the due dates of each task in the same query:
+# every due date of the task as a 'due_by' list of {'due_date', 'is_active'}, or its active due date only as 'due_date'
+INCLUDE_DUE_BY = "due_by"
+INCLUDE_ACTIVE_DUE_BY = "active_due_by"
+INCLUDES = (INCLUDE_DUE_BY, INCLUDE_ACTIVE_DUE_BY)
+# Search terms shorter than this (all of them together) are only matched as word prefixes: nearly every name would be
+# similar to them
+SEARCH_MIN_FUZZY_LENGTH = 3
+# Record type of the selected tasks for each 'include' value (None when the due dates are not included)
+TASK_MODELS = {None: dbmo.Task, INCLUDE_DUE_BY: dbmo.TaskWithDueBy, INCLUDE_ACTIVE_DUE_BY: dbmo.TaskWithActiveDueBy}
+# Expressions of the columns embedding the due dates of a selected task (aliased 't'), by field of its record
+EMBEDDED_DUE_BY_COLUMNS = {
+    "due_by": 'COALESCE((SELECT json_agg(json_build_object(\'due_date\', d.due_date, \'is_active\', d.is_active) '
+              'ORDER BY d.due_date) FROM app."Due_by" AS d WHERE d.task_id = t.id), \'[]\'::json) AS due_by',
+    "due_date": '(SELECT d.due_date FROM app."Due_by" AS d WHERE d.task_id = t.id AND d.is_active '
+                'ORDER BY d.due_date DESC LIMIT 1) AS due_date',
+}
+# Select list of the tasks for each 'include' value, in the order of the fields of their record
+TASK_SELECT_LISTS = {include: ', '.join(EMBEDDED_DUE_BY_COLUMNS.get(column, 't.' + column) for column in model.COLUMNS)
+                     for include, model in TASK_MODELS.items()}
+# Version of the due dates of a selected task (aliased 't'), added to the task's own version when they are included
+DUE_BY_VERSION = ('coalesce((SELECT string_agg(d.due_date::text || \':\' || d.xmin::text, \',\' ORDER BY d.due_date) '
+                  'FROM app."Due_by" AS d WHERE d.task_id = t.id), \'\')')
+
+# Fixed queries, run as prepared statements (see db_statements).
+# Missing values of an insert fall back on the same defaults as the table's, those of an update keep the current ones.
+# A task is selected along with its version, as its last column, so that both come from the same snapshot.
+dbst.register('task_version', 'SELECT xmin::text FROM app."Task" WHERE id = $1', ('integer',))
+dbst.register('task_version_due_by', 'SELECT t.xmin::text || \'/\' || {0} FROM app."Task" AS t WHERE t.id = $1'.format(DUE_BY_VERSION),
+              ('integer',))
+for include, select_list in TASK_SELECT_LISTS.items():
+    dbst.register('task_select' if include is None else 'task_select_' + include,
+                  'SELECT {0}, {1} FROM app."Task" AS t WHERE t.id = $1'.format(
+                      select_list, 't.xmin::text' if include is None else 't.xmin::text || \'/\' || ' + DUE_BY_VERSION),
+                  ('integer',))
+dbst.register('task_insert', 'INSERT INTO app."Task" (task_name, task_descrip, creation_date, task_status) '
+                             'VALUES ($1, $2, COALESCE($3, CURRENT_DATE), COALESCE($4, \'Created\')) RETURNING id',
+              ('varchar', 'varchar', 'date', 'varchar'))
+dbst.register('task_update', 'UPDATE app."Task" SET task_name = COALESCE($2, task_name), task_descrip = COALESCE($3, task_descrip), '
+                             'creation_date = COALESCE($4, creation_date), task_status = COALESCE($5, task_status) '
+                             'WHERE id = $1 RETURNING id',
+              ('integer', 'varchar', 'varchar', 'date', 'varchar'))
+dbst.register('task_delete', 'UPDATE app."Task" SET task_status = \'Deleted\' WHERE id = $1 RETURNING id', ('integer',))
+# Changes the status of the tasks of a list of ids in a single statement. The tasks already having the new status are
+# left untouched, so they don't fire the task_status_update_trigger. Each existing task is returned along with whether
+# it was updated, the tasks being read from the snapshot taken before the update.
+TASK_STATUS_CHANGE_QUERY = (
+    'WITH updated AS (UPDATE app."Task" SET task_status = $2 WHERE id = ANY($1) AND task_status <> $2 RETURNING id) '
+    'SELECT t.id, u.id IS NOT NULL AS updated FROM app."Task" AS t LEFT JOIN updated AS u ON u.id = t.id '
+    'WHERE t.id = ANY($1)')
+dbst.register('task_status_change', TASK_STATUS_CHANGE_QUERY, ('integer[]', 'varchar'))
+
+@dbm.timed
 def get_all_tasks() -> list:
     """ Retrieve all data from the Tasks table.
 
     Returns:
-        list: A list of dictionaries representing the rows retrieved from the Tasks table.
-              Each dictionary contains the column names as keys and the corresponding values as values.
-              The list is sorted by the ID column in ascending order.
-              Returns None if an error occurs during the database operation.
+        list: A list of Task records (see db_models), sorted by ID in ascending order.
 
     Raises:
         Exception: If there is an error while executing the SQL query or connecting to the database.
     """
 
-    select_query = 'SELECT * FROM app."Task" ORDER BY id ASC'
-    config  = dbc.load_config()
+    select_query = 'SELECT {0} FROM app."Task" AS t ORDER BY t.id ASC'.format(TASK_SELECT_LISTS[None])
     try:
-        with psycopg2.connect(**config) as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with dbp.connection() as conn:
+            with conn.cursor() as cur:
                 cur.execute(select_query)
-                return cur.fetchall()
+                return dbmo.from_rows(dbmo.Task, cur)
 
     except (Exception, psycopg2.DatabaseError) as error:
-        print(error)
+        logger.error('Database operation failed: %s', error)
         raise error
     
-def get_a_task(task_id: str) -> list:
+def compose_task_filters(task_status: Optional[Sequence[str]] = None, created_from: Optional[str] = None,
+                         created_to: Optional[str] = None, exclude_removed: bool = False,
+                         after_id: Optional[int] = None) -> Tuple[sql.Composable, list]:
+    """
+    Composes the WHERE clause that filters the Tasks table, so the filtering is done by the database.
+    The status filters are served by the indexes of the v1.1 schema: 'task_status_id_idx' for 'task_status', and the
+    partial index 'task_not_removed_id_idx' for 'exclude_removed', whose predicate the clause matches.
+
+    Args:
+        task_status (Sequence[str], optional): Only keep tasks with one of these statuses. Defaults to None.
+        created_from (str, optional): Only keep tasks created on or after this date ('YYYY-MM-DD'). Defaults to None.
+        created_to (str, optional): Only keep tasks created on or before this date ('YYYY-MM-DD'). Defaults to None.
+        exclude_removed (bool, optional): If True, tasks with the 'Deleted' or 'Dropped' status are left out. Defaults to False.
+        after_id (int, optional): Only keep tasks whose ID is greater than this one (keyset pagination). Defaults to None.
+
+    Returns:
+        tuple: A tuple containing the composed WHERE clause (empty if there is no filter) and the list of its parameters.
+    """
+    conditions = []
+    params = []
+    if task_status:
+        conditions.append(sql.SQL('task_status = ANY(%s)'))
+        params.append(list(task_status))
+    if created_from is not None:
+        conditions.append(sql.SQL('creation_date >= %s'))
+        params.append(created_from)
+    if created_to is not None:
+        conditions.append(sql.SQL('creation_date <= %s'))
+        params.append(created_to)
+    if exclude_removed:
+        conditions.append(sql.SQL('task_status NOT IN (\'Deleted\', \'Dropped\')'))
+    if after_id is not None:
+        conditions.append(sql.SQL('id > %s'))
+        params.append(after_id)
+
+    if len(conditions) == 0:
+        return sql.SQL(''), params
+    return sql.SQL(' WHERE ') + sql.SQL(' AND ').join(conditions), params
+
+def make_tasks(rows, include: Optional[str]) -> list:
+    """
+    Builds the records of the selected tasks. The due dates embedded by INCLUDE_DUE_BY, which the database returns
+    as JSON, are turned back into dates so that they are serialized like those of db_due_by_actions.get_due_by().
+
+    Args:
+        rows (Iterable[tuple]): The rows, selected with TASK_SELECT_LISTS[include].
+        include (str, optional): The 'include' value the tasks were selected with.
+
+    Returns:
+        list: The records, of type TASK_MODELS[include].
+    """
+    tasks = dbmo.from_rows(TASK_MODELS[include], rows)
+    if include == INCLUDE_DUE_BY:
+        for task in tasks:
+            for due_by in task.due_by:
+                due_by["due_date"] = date.fromisoformat(due_by["due_date"])
+    return tasks
+
+def compose_tasks_query(limit: Optional[int] = None, after_id: Optional[int] = None,
+                        task_status: Optional[Sequence[str]] = None, created_from: Optional[str] = None,
+                        created_to: Optional[str] = None, exclude_removed: bool = False,
+                        include: Optional[str] = None) -> Tuple[sql.Composable, list]:
+    """
+    Composes the query of get_tasks(), whose arguments it takes.
+
+    Returns:
+        tuple: A tuple containing the composed query and the list of its parameters.
+    """
+    where_clause, params = compose_task_filters(task_status, created_from, created_to, exclude_removed, after_id)
+    select_query = sql.SQL('SELECT {0} FROM app."Task" AS t{1} ORDER BY t.id ASC').format(
+                        sql.SQL(TASK_SELECT_LISTS[include]), where_clause)
+    if limit is not None:
+        select_query += sql.SQL(' LIMIT %s')
+        params.append(limit)
+    return select_query, params
+
+@dbm.timed
+def get_tasks(limit: Optional[int] = None, after_id: Optional[int] = None, task_status: Optional[Sequence[str]] = None,
+              created_from: Optional[str] = None, created_to: Optional[str] = None, exclude_removed: bool = False,
+              include: Optional[str] = None) -> list:
+    """
+    Retrieve one page of the Tasks table, filtered and paginated by the database.
+
+    Pagination is keyset based: the next page is requested with the ID of the last task of the current page
+    as 'after_id', which keeps every page as cheap as the first one.
+
+    Args:
+        limit (int, optional): The maximum number of tasks to return. Defaults to None, returning every matching task.
+        after_id (int, optional): Only return tasks whose ID is greater than this one. Defaults to None.
+        task_status (Sequence[str], optional): Only return tasks with one of these statuses. Defaults to None.
+        created_from (str, optional): Only return tasks created on or after this date ('YYYY-MM-DD'). Defaults to None.
+        created_to (str, optional): Only return tasks created on or before this date ('YYYY-MM-DD'). Defaults to None.
+        exclude_removed (bool, optional): If True, tasks with the 'Deleted' or 'Dropped' status are left out. Defaults to False.
+        include (str, optional): One of INCLUDES, to embed the due dates of each task. Defaults to None.
+
+    Returns:
+        list: A list of records (Task, or TaskWithDueBy and TaskWithActiveDueBy with 'include', see db_models),
+              sorted by ID in ascending order.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    select_query, params = compose_tasks_query(limit, after_id, task_status, created_from, created_to, exclude_removed,
+                                               include)
+    try:
+        with dbp.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(select_query, params)
+                return make_tasks(cur, include)
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+def compose_tasks_version_query(limit: Optional[int] = None, after_id: Optional[int] = None,
+                                task_status: Optional[Sequence[str]] = None, created_from: Optional[str] = None,
+                                created_to: Optional[str] = None, exclude_removed: bool = False,
+                                include: Optional[str] = None) -> Tuple[sql.Composable, list]:
+    """
+    Composes the query of get_tasks_version(), whose arguments it takes.
+
+    A page ('limit' given) is versioned by a digest of the row versions of its tasks. The whole list is versioned
+    more cheaply, without digesting each row: by the number of matching tasks (and of their due dates if included)
+    and the greatest of their row versions, which changes when one of them is added, updated or removed.
+
+    Returns:
+        tuple: A tuple containing the composed query and the list of its parameters.
+    """
+    where_clause, params = compose_task_filters(task_status, created_from, created_to, exclude_removed, after_id)
+    if limit is None:
+        select_query = sql.SQL('SELECT count(*) || \':\' || coalesce(max(t.xmin::text::bigint), 0)')
+        if include is not None:
+            select_query += sql.SQL(' || \'/\' || (SELECT count(*) || \':\' || coalesce(max(d.xmin::text::bigint), 0) '
+                                    'FROM app."Due_by" AS d WHERE d.task_id IN (SELECT id FROM app."Task"{0}))').format(
+                                where_clause)
+            params = params + params
+        select_query += sql.SQL(' FROM app."Task" AS t{0}').format(where_clause)
+        return select_query, params
+    row_version = 't.xmin::text'
+    if include is not None:
+        row_version += ' || \'/\' || ' + DUE_BY_VERSION
+    page_query = sql.SQL('SELECT t.id, {0} AS row_version FROM app."Task" AS t{1} ORDER BY t.id ASC LIMIT %s').format(
+                    sql.SQL(row_version), where_clause)
+    params.append(limit)
+    select_query = sql.SQL('SELECT count(*) || \':\' || coalesce(md5(string_agg(id::text || \':\' || row_version::text, \',\' ORDER BY id)), \'\') '
+                           'FROM ({0}) AS page').format(page_query)
+    return select_query, params
+
+@dbm.timed
+def get_tasks_version(limit: Optional[int] = None, after_id: Optional[int] = None, task_status: Optional[Sequence[str]] = None,
+                      created_from: Optional[str] = None, created_to: Optional[str] = None,
+                      exclude_removed: bool = False, include: Optional[str] = None) -> str:
+    """
+    Retrieve a version of the tasks that get_tasks() would return with the same arguments, without reading
+    the rows themselves. The version changes whenever one of these tasks is created, updated or removed,
+    or whenever one of their due dates changes if they are included.
+
+    Args:
+        The same arguments as get_tasks().
+
+    Returns:
+        str: A digest of the ID and the row version (xmin) of every task of the page, or a summary of the versions
+             of the matching tasks without 'limit' (see compose_tasks_version_query()).
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    select_query, params = compose_tasks_version_query(limit, after_id, task_status, created_from, created_to,
+                                                       exclude_removed, include)
+    try:
+        with dbp.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(select_query, params)
+                return cur.fetchone()[0]
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+@dbm.timed
+def get_versioned_tasks(limit: Optional[int] = None, after_id: Optional[int] = None,
+                        task_status: Optional[Sequence[str]] = None, created_from: Optional[str] = None,
+                        created_to: Optional[str] = None, exclude_removed: bool = False, include: Optional[str] = None,
+                        unchanged: Optional[Callable[[str], bool]] = None) -> Tuple[str, Optional[list]]:
+    """
+    Retrieve the version of the tasks that get_tasks() would return with the same arguments, then the tasks
+    themselves unless the caller already has them. Both are read by the same repeatable read transaction, so the
+    version always describes the returned tasks.
+
+    Args:
+        The same arguments as get_tasks(), and:
+        unchanged (Callable[[str], bool], optional): Tells whether the caller already has the tasks of a version,
+                                                     which are then not read. Defaults to None, always reading them.
+
+    Returns:
+        tuple: A tuple containing the version, as returned by get_tasks_version(), and the list returned by
+               get_tasks(), None if 'unchanged' accepted the version.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    version_query, version_params = compose_tasks_version_query(limit, after_id, task_status, created_from,
+                                                                created_to, exclude_removed, include)
+    select_query, params = compose_tasks_query(limit, after_id, task_status, created_from, created_to, exclude_removed,
+                                               include)
+    try:
+        with dbp.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+                cur.execute(version_query, version_params)
+                version = cur.fetchone()[0]
+                if unchanged is not None and unchanged(version):
+                    return version, None
+                cur.execute(select_query, params)
+                return version, make_tasks(cur, include)
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+def compose_task_search_query(terms: Sequence[str], limit: int, after: Optional[Tuple[float, int]] = None,
+                              task_status: Optional[Sequence[str]] = None, exclude_removed: bool = False,
+                              fuzzy: bool = True, max_candidates: Optional[int] = None) -> Tuple[sql.Composable, list]:
+    """
+    Composes the query of search_tasks(), whose arguments it takes.
+
+    Every term is matched as a word prefix against the 'search_vector' column (index 'task_search_vector_idx'), and,
+    with 'fuzzy', the whole text is also matched by word similarity against the names ('task_name_trgm_idx'). Only the
+    'max_candidates' newest matching tasks are ranked, which bounds the cost of the terms matching most of the table.
+    Since they are the same ones for every page of a search (short of new tasks), the pages stay consistent. Every row
+    ends with the number of candidates found, one more than 'max_candidates' when the others were left out (NULL
+    without 'max_candidates').
+
+    Returns:
+        tuple: A tuple containing the composed query and the list of its parameters.
+    """
+    text = ' '.join(terms)
+    fuzzy = fuzzy and len(text) >= SEARCH_MIN_FUZZY_LENGTH
+    params = [' & '.join(term + ':*' for term in terms), text]
+    where_clause, filter_params = compose_task_filters(task_status, exclude_removed=exclude_removed)
+    params.extend(filter_params)
+    match = 'search_vector @@ q.query OR q.text <%% task_name' if fuzzy else 'search_vector @@ q.query'
+    rank = 'ts_rank(t.search_vector, q.query)'
+    if fuzzy:
+        rank += ' + word_similarity(q.text, t.task_name)'
+    candidates_query = sql.SQL('SELECT creation_date, id, search_vector, task_descrip, task_name, task_status '
+                               'FROM app."Task"{0}{1}({2})').format(
+                            where_clause, sql.SQL(' AND ' if where_clause != sql.SQL('') else ' WHERE '), sql.SQL(match))
+    if max_candidates is None:
+        # Every match is ranked: without a window function, the query is flattened and the keyset filtered in the scan
+        ranked_query = sql.SQL('SELECT t.creation_date, t.id, ({0})::float8 AS rank, t.task_descrip, t.task_name, '
+                               't.task_status, NULL::bigint AS candidates '
+                               'FROM (SELECT to_tsquery(\'simple\', %s) AS query, %s::text AS text) AS q, '
+                               'LATERAL ({1}) AS t').format(sql.SQL(rank), candidates_query)
+        where_clauses = []
+    else:
+        # The newest matching tasks are ranked, one extra telling whether the others were left out
+        candidates_query += sql.SQL(' ORDER BY id DESC LIMIT %s')
+        params.append(max_candidates + 1)
+        ranked_query = sql.SQL('SELECT t.creation_date, t.id, ({0})::float8 AS rank, t.task_descrip, t.task_name, '
+                               't.task_status, count(*) OVER () AS candidates, '
+                               'row_number() OVER (ORDER BY t.id DESC) AS candidate '
+                               'FROM (SELECT to_tsquery(\'simple\', %s) AS query, %s::text AS text) AS q, '
+                               'LATERAL ({1}) AS t').format(sql.SQL(rank), candidates_query)
+        where_clauses = [sql.SQL('m.candidate <= %s')]
+        params.append(max_candidates)
+    if after is not None:
+        where_clauses.append(sql.SQL('(m.rank < %s OR (m.rank = %s AND m.id > %s))'))
+        params.extend((after[0], after[0], after[1]))
+    select_query = sql.SQL('SELECT {0}, m.candidates FROM ({1}) AS m').format(
+                        sql.SQL(', '.join('m.' + column for column in dbmo.TaskSearchResult.COLUMNS)), ranked_query)
+    if where_clauses:
+        select_query += sql.SQL(' WHERE ') + sql.SQL(' AND ').join(where_clauses)
+    select_query += sql.SQL(' ORDER BY m.rank DESC, m.id ASC LIMIT %s')
+    params.append(limit)
+    return select_query, params
+
+def make_search_results(rows: list, max_candidates: Optional[int]) -> Tuple[list, bool]:
+    """
+    Builds the results of search_tasks() from the rows of its query, which end with the number of candidates found.
+
+    Returns:
+        tuple: The TaskSearchResult records and whether matching tasks were left out by 'max_candidates'.
+    """
+    truncated = max_candidates is not None and bool(rows) and rows[0][-1] > max_candidates
+    return dbmo.from_rows(dbmo.TaskSearchResult, [tuple(row)[:-1] for row in rows]), truncated
+
+@dbm.timed
+def search_tasks(terms: Sequence[str], limit: int, after: Optional[Tuple[float, int]] = None,
+                 task_status: Optional[Sequence[str]] = None, exclude_removed: bool = False, fuzzy: bool = True,
+                 max_candidates: Optional[int] = None) -> Tuple[list, bool]:
+    """
+    Search the tasks whose name or description contain words starting with every one of the given terms, or, with
+    'fuzzy', whose name is similar to them (e.g. with a typo), the most relevant first.
+
+    Pagination is keyset based, on the rank and the ID of the last task of the current page.
+
+    Args:
+        terms (Sequence[str]): The words searched, lowercase and made of word characters only (see SEARCH_TERM_PATTERN
+                               of api_operations_utils).
+        limit (int): The maximum number of tasks to return.
+        after (tuple, optional): The (rank, id) of the last task of the previous page. Defaults to None.
+        task_status (Sequence[str], optional): Only return tasks with one of these statuses. Defaults to None.
+        exclude_removed (bool, optional): If True, tasks with the 'Deleted' or 'Dropped' status are left out. Defaults to False.
+        fuzzy (bool, optional): Whether the names similar to the terms match too, if they are long enough
+                                (SEARCH_MIN_FUZZY_LENGTH). Defaults to True.
+        max_candidates (int, optional): The maximum number of matching tasks that are ranked, the newest ones, the
+                                        others being left out of the results. Defaults to None, every one.
+
+    Returns:
+        tuple: A list of TaskSearchResult records (see db_models), sorted by descending rank, then by ID, and whether
+               matching tasks were left out by 'max_candidates' (False on an empty page).
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    select_query, params = compose_task_search_query(terms, limit, after, task_status, exclude_removed, fuzzy,
+                                                     max_candidates)
+    try:
+        with dbp.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(select_query, params)
+                return make_search_results(cur.fetchall(), max_candidates)
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+@dbm.timed
+def export_tasks(include_due_by: bool = False, task_status: Optional[Sequence[str]] = None,
+                 created_from: Optional[str] = None, created_to: Optional[str] = None,
+                 exclude_removed: bool = False) -> Iterator[tuple]:
+    """
+    Stream the rows of the Tasks table, optionally joined with their active due date.
+
+    The rows are read through a server-side (named) cursor, EXPORT_BATCH_SIZE rows at a time, so memory usage
+    stays bounded whatever the size of the table. The pooled connection is held until the generator is exhausted
+    or closed.
+
+    Args:
+        include_due_by (bool, optional): If True, each row ends with the task's active due date (None if it has none).
+                                         Defaults to False.
+        task_status (Sequence[str], optional): Only export tasks with one of these statuses. Defaults to None.
+        created_from (str, optional): Only export tasks created on or after this date ('YYYY-MM-DD'). Defaults to None.
+        created_to (str, optional): Only export tasks created on or before this date ('YYYY-MM-DD'). Defaults to None.
+        exclude_removed (bool, optional): If True, tasks with the 'Deleted' or 'Dropped' status are left out. Defaults to False.
+
+    Yields:
+        tuple: One row per task sorted by ID, with the values of EXPORT_COLUMNS (or EXPORT_COLUMNS_WITH_DUE_BY).
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    where_clause, params = compose_task_filters(task_status, created_from, created_to, exclude_removed)
+    if include_due_by:
+        select_query = sql.SQL('SELECT id, task_name, task_descrip, creation_date, task_status, d.due_date '
+                               'FROM app."Task" AS t LEFT JOIN app."Due_by" AS d ON d.task_id = t.id AND d.is_active'
+                               '{0} ORDER BY id ASC').format(where_clause)
+    else:
+        select_query = sql.SQL('SELECT id, task_name, task_descrip, creation_date, task_status '
+                               'FROM app."Task"{0} ORDER BY id ASC').format(where_clause)
+    try:
+        with dbp.connection() as conn:
+            with conn.cursor(name='export_tasks') as cur:
+                cur.itersize = EXPORT_BATCH_SIZE
+                cur.execute(select_query, params)
+                for row in cur:
+                    yield row
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+def get_a_task(task_id: str, include: Optional[str] = None) -> list:
     """
     Retrieve one task from the Tasks table.
+    The result is read through the cache, which is invalidated by every write to the task (or to its due dates
+    if they are included). It isn't timed itself, get_versioned_task() is.
 
     Args:
         task_id (str): The ID of the task to retrieve.
+        include (str, optional): One of INCLUDES, to embed the due dates of the task. Defaults to None.
 
     Returns:
-        list: A list of dictionaries representing the retrieved task(s).
-              Each dictionary contains the column names as keys and the corresponding values.
+        list: A list with the record of the task (Task, or TaskWithDueBy and TaskWithActiveDueBy with 'include',
+              see db_models), empty if the task doesn't exist.
 
     Raises:
         Exception: If there is an error while executing the SQL query or connecting to the database.
 
     """
-    select_query_base = 'SELECT * FROM app."Task" WHERE id = {0}'
-    select_query = sql.SQL(select_query_base).format(sql.Literal(task_id))
-    config  = dbc.load_config()
+    return get_versioned_task(task_id, include)[1]
+
+@dbm.timed
+def get_versioned_task(task_id: str, include: Optional[str] = None) -> Tuple[Optional[str], list]:
+    """
+    Retrieve one task from the Tasks table along with its version, read by the same query.
+    Both are cached together (see get_a_task()), so the version always describes the returned record, even when
+    the cached record is older than the task in the database.
+
+    Args:
+        task_id (str): The ID of the task to retrieve.
+        include (str, optional): One of INCLUDES, to embed the due dates of the task. Defaults to None.
+
+    Returns:
+        tuple: A tuple containing the version of the task, as returned by get_task_version() (None if the task
+               doesn't exist), and the list returned by get_a_task().
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    def load() -> tuple:
+        with dbp.connection() as conn:
+            with conn.cursor() as cur:
+                dbst.execute(cur, 'task_select' if include is None else 'task_select_' + include, (task_id,))
+                rows = cur.fetchall()
+                return (rows[0][-1] if rows else None), make_tasks([row[:-1] for row in rows], include)
+
     try:
-        with psycopg2.connect(**config) as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(select_query)
-                return cur.fetchall()
+        return dbch.get_cache().get_or_load(dbch.task_key(task_id, include), load)
 
     except (Exception, psycopg2.DatabaseError) as error:
-        print(error)
+        logger.error('Database operation failed: %s', error)
         raise error
     
+@dbm.timed
+def get_task_version(task_id: str, include: Optional[str] = None) -> Optional[str]:
+    """
+    Retrieve the version of one task without reading the task itself.
+    The version changes whenever the task is updated, or whenever one of its due dates changes if they are included.
+
+    Args:
+        task_id (str): The ID of the task.
+        include (str, optional): One of INCLUDES. Defaults to None.
+
+    Returns:
+        str: The row version (xmin) of the task, None if the task doesn't exist.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    try:
+        with dbp.connection() as conn:
+            with conn.cursor() as cur:
+                dbst.execute(cur, 'task_version' if include is None else 'task_version_due_by', (task_id,))
+                row = cur.fetchone()
+                return row[0] if row else None
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+@dbm.timed
 def insert_into_task_table(task_name: str, task_descrip: str = None, creation_date: str = None,
                             task_status: str = None, due_date: str = None) -> int:
     """Inserts a new task into the database and returns the new task's ID.
+    The task and its optional due date are inserted in the same transaction: either both are or none is.
 
     Args:
         task_name (str): The name of the task.
@@ -76,40 +562,74 @@ def insert_into_task_table(task_name: str, task_descrip: str = None, creation_da
         Exception: If there is an error while executing the SQL query or connecting to the database.
 
     """
-    str = compose_task_insert_update_values(task_name, task_descrip, creation_date, task_status)
-
-    # Doc about how to compose SQL https://www.psycopg.org/docs/sql.html
-    insert_query_base = "INSERT INTO app.\"Task\"({columns}) VALUES({values}) RETURNING id;"
-    insert_query = sql.SQL(insert_query_base).format(
-                        columns=sql.SQL(',').join(map(sql.Identifier, str[0])),
-                        values=sql.SQL(',').join(map(sql.Literal, str[1]))
-                    )
-
     new_id = None
-    config = dbc.load_config()
 
     try:
-        with  psycopg2.connect(**config) as conn:
+        with dbp.connection() as conn:
             with  conn.cursor() as cur:
-                # print(insert_query.as_string(conn)) # DEBUG
                 # execute the INSERT statement
-                cur.execute(insert_query)
+                dbst.execute(cur, 'task_insert', (task_name, task_descrip, creation_date, task_status))
 
                 # get the generated id back
                 rows = cur.fetchone()
                 if rows:
                     new_id = rows[0]
 
-                # commit the changes to the database
-                conn.commit()
-
-            # if due date is provided, insert it
+            # if due date is provided, insert it, both being committed when the connection is released
             if due_date is not None:
                 dbdba.insert_due_date(conn, new_id, due_date)
-            
-            return new_id
+
+        # A missing task may have been cached under the new ID
+        dbch.invalidate_task(new_id)
+        return new_id
     except (Exception, psycopg2.DatabaseError) as error:
-        print(error)
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+@dbm.timed
+def insert_tasks_batch(tasks: Sequence[dict]) -> list:
+    """
+    Inserts several tasks, and their optional due dates, in a single transaction using multi-row inserts.
+    Either every task is inserted or none is.
+
+    Args:
+        tasks (Sequence[dict]): The tasks to insert, each one with a 'task_name' and optionally a 'task_descrip',
+                                'creation_date', 'task_status' and 'due_date'.
+
+    Returns:
+        list: The IDs of the newly inserted tasks, in the same order as the given tasks.
+
+    Raises:
+        Exception: If there is an error while executing the SQL queries or connecting to the database.
+    """
+    if len(tasks) == 0:
+        return []
+    insert_tasks_query = 'INSERT INTO app."Task" (task_name, task_descrip, creation_date, task_status) VALUES %s RETURNING id'
+    # Missing values fall back on the same defaults as the table's
+    insert_tasks_template = "(%s, %s, COALESCE(%s::date, CURRENT_DATE), COALESCE(%s, 'Created'))"
+    insert_due_dates_query = 'INSERT INTO app."Due_by" (task_id, due_date, is_active) VALUES %s'
+    insert_due_dates_template = '(%s, %s, true)'
+    values = [(task.get("task_name"), task.get("task_descrip"), task.get("creation_date"), task.get("task_status"))
+              for task in tasks]
+    try:
+        with dbp.connection() as conn:
+            with conn.cursor() as cur:
+                # A single page keeps the RETURNING rows in the order of the VALUES list
+                rows = execute_values(cur, insert_tasks_query, values, insert_tasks_template,
+                                      page_size=len(values), fetch=True)
+                new_ids = [row[0] for row in rows]
+
+                due_dates = [(new_id, task["due_date"]) for new_id, task in zip(new_ids, tasks)
+                             if task.get("due_date") is not None]
+                if due_dates:
+                    execute_values(cur, insert_due_dates_query, due_dates, insert_due_dates_template,
+                                   page_size=len(due_dates))
+
+        # Missing tasks may have been cached under the new IDs
+        dbch.get_cache().invalidate(*[key for new_id in new_ids for key in dbch.task_keys(new_id)])
+        return new_ids
+    except (Exception, psycopg2.DatabaseError) as error:
+        logger.error('Database operation failed: %s', error)
         raise error
 
 def compose_task_insert_update_values(task_name: str, task_descrip: str, creation_date: str, task_status: str) -> tuple:
@@ -150,49 +670,56 @@ def compose_task_insert_update_values(task_name: str, task_descrip: str, creatio
     
     return (tuple(column_names), tuple(values))
 
+@dbm.timed
 def update_task(task_id: str, task_name: str = None, task_descrip: str = None,
-                 task_creation_date: str = None, task_status: str = None, due_date: str = None) -> None:
+                 task_creation_date: str = None, task_status: str = None, due_date: str = None) -> bool:
     """
     Updates the data of a Task including its possible due-date.
 
+    The update, the task's existence check (through the rows returned by the UPDATE) and the due date change
+    are all done in a single transaction, on a single pooled connection.
+
     Args:
         task_id (str): The ID of the task to be updated.
         task_name (str, optional): The new name of the task. Defaults to None.
         task_descrip (str, optional): The new description of the task. Defaults to None.
         task_creation_date (str, optional): The new creation date of the task. Defaults to None.
         task_status (str, optional): The new status of the task. Defaults to None.
-        due_date (str, optional): The new due date of the task. Defaults to None.
+        due_date (str, optional): The new due date of the task, applied as described in
+                                  db_due_by_actions.apply_due_date(). Defaults to None.
 
     Returns:
-        None: Returns None if the task is successfully updated.
+        bool: True if the task is successfully updated, False if the task doesn't exist.
 
     Raises:
+        ValueError: If no values are provided for the update.
         Exception: Raises an exception if there is an error during the update process.
     """
-    update_query_base = 'UPDATE app."Task" SET {0} WHERE id = {1}'
-    str = compose_task_insert_update_values(task_name, task_descrip, task_creation_date, task_status)
-    update_query = sql.SQL(update_query_base).format(
-                        sql.SQL(',').join(map(lambda x: sql.SQL('{0} = {1}').format(sql.Identifier(x[0]), sql.Literal(x[1])), zip(str[0], str[1]))),
-                        sql.Literal(task_id)
-                    )
-    config = dbc.load_config()
+    has_task_values = any(value is not None for value in (task_name, task_descrip, task_creation_date, task_status))
+    if not has_task_values and due_date is None:
+        raise ValueError("No values to insert or update")
     try:
-        with psycopg2.connect(**config) as conn:
-            # return update_query.as_string(conn) # DEBUG
+        found = True
+        with dbp.connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(update_query)
-                conn.commit()
-
-                # if due date is provided, insert it
-                if due_date is not None:
-                    dbdba.insert_into_due_by_table(task_id, due_date)
-
-                return None
+                if has_task_values:
+                    dbst.execute(cur, 'task_update', (task_id, task_name, task_descrip, task_creation_date, task_status))
+                    found = cur.fetchone() is not None
+
+                # if due date is provided, apply it within the same transaction
+                if found and due_date is not None:
+                    outcome, _ = dbdba.execute_apply_due_date(cur, task_id, due_date, dbdba.MODE_UPSERT)
+                    found = outcome != dbdba.DUE_DATE_TASK_NOT_FOUND
+
+        if found:
+            dbch.invalidate_task(task_id)
+        return found
     except (Exception, psycopg2.DatabaseError) as error:
-        print(error)
+        logger.error('Database operation failed: %s', error)
         raise error
 
-def delete_task(task_id: str) -> None:
+@dbm.timed
+def delete_task(task_id: str) -> bool:
     """Updates the state of a Task to be 'DELETED'.
 
     Args:
@@ -202,19 +729,68 @@ def delete_task(task_id: str) -> None:
         Exception: If an error occurs during the deletion process.
 
     Returns:
-        None
+        bool: True if the task's state is updated, False if the task doesn't exist.
     """
-    update_query_base = 'UPDATE app."Task" SET task_status = \'Deleted\' WHERE id = {0}'
-    update_query = sql.SQL(update_query_base).format(sql.Literal(task_id))
-    config = dbc.load_config()
     try:
-        with psycopg2.connect(**config) as conn:
-            print(update_query.as_string(conn))
+        with dbp.connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(update_query)
-                conn.commit()
-                return None
+                dbst.execute(cur, 'task_delete', (task_id,))
+                found = cur.fetchone() is not None
+
+        if found:
+            dbch.invalidate_task(task_id)
+        return found
 
     except (Exception, psycopg2.DatabaseError) as error:
-        print(error)
-        raise error
\ No newline at end of file
+        logger.error('Database operation failed: %s', error)
+        raise error
+
+def split_status_change(task_ids: Sequence[int], rows) -> Tuple[list, list, list]:
+    """
+    Sorts the ids given to a status change by outcome, out of the rows of TASK_STATUS_CHANGE_QUERY.
+
+    Args:
+        task_ids (Sequence[int]): The ids of the tasks, without duplicates.
+        rows: The (id, updated) rows returned by the query.
+
+    Returns:
+        tuple: The ids of the updated tasks, of the tasks skipped as they already had the status and of the missing
+               tasks, each list in the order of task_ids.
+    """
+    outcomes = dict(rows)
+    updated, skipped, missing = [], [], []
+    for task_id in task_ids:
+        outcome = outcomes.get(task_id)
+        (missing if outcome is None else updated if outcome else skipped).append(task_id)
+    return updated, skipped, missing
+
+@dbm.timed
+def update_tasks_status(task_ids: Sequence[int], task_status: str) -> Tuple[list, list, list]:
+    """
+    Changes the status of several tasks at once, in a single statement. As for a single task, changing it to 'Deleted'
+    or 'Dropped' deactivates the due dates of the tasks (see the task_status_update_trigger). Unlike update_task(),
+    the tasks already having the status are skipped: their row isn't written, so its version stays the same.
+
+    Args:
+        task_ids (Sequence[int]): The ids of the tasks, without duplicates.
+        task_status (str): The new status of the tasks.
+
+    Returns:
+        tuple: The ids of the updated tasks, of the tasks skipped as they already had the status and of the missing
+               tasks, each list in the order of task_ids.
+
+    Raises:
+        Exception: If there is an error while executing the SQL query or connecting to the database.
+    """
+    try:
+        with dbp.connection() as conn:
+            with conn.cursor() as cur:
+                dbst.execute(cur, 'task_status_change', (list(task_ids), task_status))
+                rows = cur.fetchall()
+
+        updated, skipped, missing = split_status_change(task_ids, rows)
+        dbch.get_cache().invalidate(*[key for task_id in updated for key in dbch.task_keys(task_id)])
+        return updated, skipped, missing
+    except (Exception, psycopg2.DatabaseError) as error:
+        logger.error('Database operation failed: %s', error)
+        raise error
@@ -0,0 +1,98 @@
+import logging
+import os
+
+# prometheus_client writes the metrics of every process in this directory as soon as they are created, i.e. when the
+# modules below are imported
+if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+from flask.helpers import get_debug_flag
+from database_operations import db_config, db_logging, db_pool
+
+# This script defines the production configuration of the Python back-end, served by gunicorn with several pre-forked
+# worker processes, each one with a few threads: `gunicorn --config gunicorn.conf.py 'app:create_app()'`
+# (see compose.yaml).
+# The settings are read from the [server] section of database.ini, they can be overridden like any other setting with
+# an environment variable (e.g. SERVER_WORKERS=8) or on gunicorn's command line.
+#
+# The app is loaded once by the master process and then forked. Each worker creates its own connection pool after
+# the fork, sized so that the pools of all the workers stay within the [pool] 'connection_budget' of the database.
+# A SIGHUP sent to the master gracefully replaces the workers, which read database.ini again.
+# The 'memory' backend of the read-through cache ([cache] section) is private to each process: a write served by one
+# worker would only invalidate the entries of that worker, the others serving the stale ones. With several workers
+# the cache is therefore turned off unless its backend is 'redis', shared by all of them.
+
+logger = logging.getLogger(__name__)
+
+_server_config = db_config.get_config().section('server')
+
+bind = _server_config.get("bind", "0.0.0.0:5000")
+# 0 starts one worker per CPU
+workers = int(_server_config.get("workers", 0)) or os.cpu_count() or 1
+worker_class = 'gthread'
+threads = int(_server_config.get("threads", 4))
+timeout = int(_server_config.get("timeout", 30))
+graceful_timeout = int(_server_config.get("graceful_timeout", 30))
+keepalive = int(_server_config.get("keepalive", 5))
+# Workers are replaced after this many requests (0 never), the jitter avoids replacing them all at once
+max_requests = int(_server_config.get("max_requests", 0))
+max_requests_jitter = int(_server_config.get("max_requests_jitter", 0))
+# In debug mode (FLASK_DEBUG, as for `flask run`), the workers load the code themselves and are restarted whenever it
+# changes
+reload = get_debug_flag()
+preload_app = _server_config.get("preload", "true").lower() == "true" and not reload
+# The access log is written by rest_api/logging_operations_api.py
+accesslog = None
+
+def is_cache_per_process(config: db_config.AppConfig) -> bool:
+    """
+    Tells whether the configuration enables the read-through cache with a backend private to each process.
+    """
+    cache_config = config.section('cache')
+    return cache_config.get('enabled', 'true').lower() == 'true' and cache_config.get('backend', 'memory') == 'memory'
+
+def on_starting(server) -> None:
+    """
+    Empties the directory of the metrics shared by the workers, left over by a previous run, and warns that the cache
+    is turned off if it can't be shared by the workers.
+    """
+    if server.cfg.workers > 1 and is_cache_per_process(db_config.get_config()):
+        logger.warning('The "memory" cache backend is per process, the cache is turned off in the %d workers: '
+                       'set the [cache] backend to "redis" to cache their lookups', server.cfg.workers)
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        for filename in os.listdir(multiproc_dir):
+            if filename.endswith('.db'):
+                os.remove(os.path.join(multiproc_dir, filename))
+
+def post_fork(server, worker) -> None:
+    """
+    Sets up a newly forked worker: it gets its own logging thread and its own connection pool, sized for the
+    current number of workers, and reads the configuration again so that a reload of the master applies to it.
+    A per-process cache is turned off when there are several workers.
+    """
+    db_logging.reset_after_fork()
+    db_pool.reset_after_fork()
+    db_pool.set_worker_count(server.num_workers)
+    try:
+        db_config.reload_config()
+        if server.num_workers > 1 and is_cache_per_process(db_config.get_config()):
+            # Also applies to the reloads of the worker, which read the environment again
+            os.environ['CACHE_ENABLED'] = 'false'
+            db_config.reload_config()
+    except Exception as error:
+        logger.error('Configuration reload failed, the worker keeps the configuration of the master: %s', error)
+
+def post_worker_init(worker) -> None:
+    """
+    Makes the worker reload its configuration on SIGHUP, as gunicorn resets its signal handlers.
+    """
+    db_config.install_reload_signal_handler()
+
+def child_exit(server, worker) -> None:
+    """
+    Removes the live gauges of an exited worker from the metrics shared by the workers.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,36 @@
+from flask import Blueprint, jsonify
+from database_operations import db_cache as dbch, db_config as dbc, db_logging as dbl, db_pool as dbp, db_statements as dbst
+from rest_api import api_admission
+
+# This script defines the REST API endpoints for administrative operations on the running app
+
+admin_api = Blueprint('admin_api', __name__)
+
+@admin_api.route('/admin/config/reload', methods=['POST'])
+def reload_config_route() -> jsonify:
+   """
+   Reloads the configuration (database.ini and its environment variable overrides) without restarting the app.
+
+   Returns:
+      jsonify: A JSON response containing the result of the operation with the following status codes:
+         200: If the configuration was successfully reloaded.
+         500: If the configuration could not be read, the current configuration is then kept.
+   """
+   try:
+      dbc.reload_config()
+      return jsonify({"message": "Configuration reloaded"}), 200
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
+
+@admin_api.route('/admin/stats', methods=['GET'])
+def stats_route() -> jsonify:
+   """
+   Returns the counters of the connection pool, of the cache, of the prepared statements, of the logging queue and
+   of the admission control of this process.
+
+   Returns:
+      jsonify: A JSON response with the 'pool', 'cache', 'statements', 'logging' and 'admission' counters and a 200
+               status code.
+   """
+   return jsonify({"pool": dbp.get_pool().stats(), "cache": dbch.get_cache().stats(),
+                   "statements": dbst.stats(), "logging": dbl.stats(), "admission": api_admission.stats()}), 200
@@ -0,0 +1,211 @@
+import threading
+import time
+from typing import Optional
+from flask import Blueprint, Response, g, jsonify, request
+from prometheus_client import Counter, Gauge
+from database_operations import db_config as dbc
+
+# This script defines the admission control of the blueprints querying the database (see guard()). Each process
+# serves at most 'max_reads' reading requests and 'max_writes' writing ones at a time, the next ones wait in line for
+# at most 'queue_timeout_ms', and the requests that can't be served in time, or that find 'max_queue' requests already
+# waiting, are answered right away with a '503 Service Unavailable'. This keeps a slow database from piling up
+# requests and connections. The settings are read from the [admission] section of database.ini.
+
+READ = 'read'
+WRITE = 'write'
+READ_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+OVERLOADED_ERROR = 'The server is overloaded, retry later.'
+
+ADMISSION_IN_FLIGHT = Gauge('admission_requests_in_flight', 'Requests admitted and being served.', ['kind'],
+                            multiprocess_mode='livesum')
+ADMISSION_QUEUED = Gauge('admission_requests_queued', 'Requests waiting to be admitted.', ['kind'],
+                         multiprocess_mode='livesum')
+ADMISSION_SHED = Counter('admission_requests_shed_total', 'Requests answered with a 503 as the server was saturated.',
+                         ['kind', 'reason'])
+
+class AdmissionLimit:
+   """
+   Thread-safe limit on the number of requests of one kind (reads or writes) served at the same time, with a bounded
+   queue of requests waiting to be admitted.
+   """
+
+   def __init__(self, kind: str, limit: int, max_queue: int, timeout: float) -> None:
+      """
+      Initializes the limit.
+
+      Args:
+         kind (str): READ or WRITE, the label of the metrics.
+         limit (int): The maximum number of requests served at the same time.
+         max_queue (int): The maximum number of requests waiting, the next ones are shed right away.
+         timeout (float): The maximum number of seconds a request waits to be admitted.
+
+      Raises:
+         ValueError: If the limits are not consistent.
+      """
+      if limit < 1 or max_queue < 0:
+         raise ValueError('Invalid admission limits: limit={0}, max_queue={1}'.format(limit, max_queue))
+      self.kind = kind
+      self.limit = limit
+      self.max_queue = max_queue
+      self.timeout = timeout
+      self._active = 0
+      self._waiting = 0
+      self._cond = threading.Condition()
+      self._stats = {"admitted": 0, "queued": 0, "shed_queue_full": 0, "shed_timeout": 0}
+      self._in_flight = ADMISSION_IN_FLIGHT.labels(kind)
+      self._queued = ADMISSION_QUEUED.labels(kind)
+
+   def acquire(self) -> bool:
+      """
+      Admits a request, waiting for one of the requests being served to end if the limit is reached.
+
+      Returns:
+         bool: True if the request was admitted, it must then call release() once served. False if it was shed.
+      """
+      with self._cond:
+         if self._active < self.limit and not self._waiting:
+            return self._admit()
+         if self._waiting >= self.max_queue:
+            return self._shed("queue_full")
+         self._waiting += 1
+         self._stats["queued"] += 1
+         self._queued.inc()
+         try:
+            deadline = time.monotonic() + self.timeout
+            while self._active >= self.limit:
+               remaining = deadline - time.monotonic()
+               if remaining <= 0:
+                  return self._shed("timeout")
+               self._cond.wait(remaining)
+            return self._admit()
+         finally:
+            self._waiting -= 1
+            self._queued.dec()
+
+   def _admit(self) -> bool:
+      self._active += 1
+      self._stats["admitted"] += 1
+      self._in_flight.inc()
+      return True
+
+   def _shed(self, reason: str) -> bool:
+      self._stats["shed_" + reason] += 1
+      ADMISSION_SHED.labels(self.kind, reason).inc()
+      return False
+
+   def release(self) -> None:
+      """
+      Ends a request admitted by acquire(), the first waiting one, if any, is then admitted.
+      """
+      with self._cond:
+         self._active -= 1
+         self._in_flight.dec()
+         self._cond.notify()
+
+   def stats(self) -> dict:
+      """
+      Returns a snapshot of the limit's counters.
+
+      Returns:
+         dict: The counters of admitted, queued and shed requests, along with the current number of requests being
+               served ('active') and waiting ('waiting') and the limits.
+      """
+      with self._cond:
+         stats = dict(self._stats)
+         stats["active"] = self._active
+         stats["waiting"] = self._waiting
+      stats["limit"] = self.limit
+      stats["max_queue"] = self.max_queue
+      return stats
+
+class AdmissionSettings:
+   """
+   Immutable snapshot of the [admission] section, with the limits of the reading and of the writing requests.
+
+   Attributes:
+      limits (dict): The AdmissionLimit of each kind, READ and WRITE, empty when admission control is disabled.
+      retry_after (int): The number of seconds the shed requests are asked to wait before retrying.
+   """
+   __slots__ = ('limits', 'retry_after')
+
+   def __init__(self, config: dbc.AppConfig) -> None:
+      section = config.section('admission')
+      max_queue = int(section.get('max_queue', 16))
+      timeout = float(section.get('queue_timeout_ms', 250)) / 1000
+      limits = {}
+      if section.get('enabled', 'true').lower() == 'true':
+         limits = {READ: AdmissionLimit(READ, int(section.get('max_reads', 6)), max_queue, timeout),
+                   WRITE: AdmissionLimit(WRITE, int(section.get('max_writes', 3)), max_queue, timeout)}
+      object.__setattr__(self, 'limits', limits)
+      object.__setattr__(self, 'retry_after', int(section.get('retry_after_seconds', 1)))
+
+   def __setattr__(self, name, value):
+      raise AttributeError('AdmissionSettings is immutable')
+
+
+_settings: Optional[AdmissionSettings] = None
+_settings_lock = threading.Lock()
+
+def get_settings() -> AdmissionSettings:
+   """
+   Returns the admission settings, creating them from the configuration on first use. They are created again, with
+   new limits, whenever the configuration is reloaded: the requests being served then release their former limit.
+
+   Returns:
+      AdmissionSettings: The current settings.
+   """
+   global _settings
+   if _settings is None:
+      with _settings_lock:
+         if _settings is None:
+            _settings = AdmissionSettings(dbc.get_config())
+   return _settings
+
+def reset_settings() -> None:
+   global _settings
+   with _settings_lock:
+      _settings = None
+
+dbc.add_reload_listener(lambda config: reset_settings())
+
+def admit_request() -> Optional[Response]:
+   """
+   Admits the request under the limit of its kind, or answers it with a 503 if the server is saturated.
+   """
+   settings = get_settings()
+   limit = settings.limits.get(READ if request.method in READ_METHODS else WRITE)
+   if limit is None:
+      return None
+   if not limit.acquire():
+      return jsonify({'error': OVERLOADED_ERROR}), 503, {'Retry-After': str(settings.retry_after)}
+   g.admission_limit = limit
+   return None
+
+def release_request(error) -> None:
+   """
+   Releases the limit of an admitted request, whether or not it raised. Streamed responses release it once the
+   whole body has been sent.
+   """
+   limit = g.pop('admission_limit', None)
+   if limit is not None:
+      limit.release()
+
+def guard(blueprint: Blueprint) -> Blueprint:
+   """
+   Puts the requests served by a blueprint under admission control.
+
+   Args:
+      blueprint (Blueprint): The blueprint.
+
+   Returns:
+      Blueprint: The same blueprint.
+   """
+   blueprint.before_request(admit_request)
+   blueprint.teardown_request(release_request)
+   return blueprint
+
+def stats() -> dict:
+   """
+   Returns the counters of the reading and of the writing requests, empty when admission control is disabled.
+   """
+   return {kind: limit.stats() for kind, limit in get_settings().limits.items()}
@@ -0,0 +1,87 @@
+import decimal
+import uuid
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Union
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+from werkzeug.http import http_date
+from database_operations import db_config as dbc
+
+# This script defines the JSON provider serializing the responses of the app, selected with 'json_provider' in the
+# [api] section of database.ini: "orjson" (the default) or "default" (Flask's provider, on top of the json module).
+
+# The same days come back over and over in the task and due date columns, so their HTTP date strings are kept
+_http_day = lru_cache(maxsize=16384)(http_date)
+
+def default(o: Any) -> Any:
+   """
+   Serializes the types orjson doesn't handle itself, like Flask's default provider does. Dates are written in the
+   HTTP date format (RFC 822) so that the responses don't depend on the selected provider.
+   """
+   if isinstance(o, datetime):
+      return http_date(o)
+   if isinstance(o, date):
+      return _http_day(o)
+   if isinstance(o, (decimal.Decimal, uuid.UUID)):
+      return str(o)
+   if hasattr(o, "__html__"):
+      return str(o.__html__())
+   raise TypeError('Object of type {} is not JSON serializable'.format(type(o).__name__))
+
+class OrjsonProvider(JSONProvider):
+   """
+   JSON provider on top of orjson, producing the same documents as Flask's default provider (sorted keys, dates in
+   the HTTP date format, compact out of debug mode) several times faster. The only difference is that non-ASCII
+   characters are written as UTF-8 instead of being escaped.
+   """
+
+   sort_keys = True
+   compact = None
+   mimetype = "application/json"
+
+   def __init__(self, app: Flask) -> None:
+      import orjson
+      super().__init__(app)
+      self._orjson = orjson
+      self._options = orjson.OPT_PASSTHROUGH_DATETIME
+      if self.sort_keys:
+         self._options |= orjson.OPT_SORT_KEYS
+
+   def dumps(self, obj: Any, **kwargs: Any) -> str:
+      return self._orjson.dumps(obj, default=default, option=self._options).decode()
+
+   def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+      return self._orjson.loads(s)
+
+   def response(self, *args: Any, **kwargs: Any) -> Response:
+      """
+      Serializes the given arguments straight to the bytes of the response, see JSONProvider.response().
+      """
+      obj = self._prepare_response_obj(args, kwargs)
+      options = self._options | self._orjson.OPT_APPEND_NEWLINE
+      if (self.compact is None and self._app.debug) or self.compact is False:
+         options |= self._orjson.OPT_INDENT_2
+      return self._app.response_class(self._orjson.dumps(obj, default=default, option=options), mimetype=self.mimetype)
+
+JSON_PROVIDERS = {"orjson": OrjsonProvider, "default": DefaultJSONProvider}
+
+def create_json_provider(app: Flask, config: dbc.AppConfig) -> JSONProvider:
+   """
+   Creates the JSON provider configured by 'json_provider' in the [api] section.
+
+   Args:
+      app (Flask): The app.
+      config (AppConfig): The configuration.
+
+   Returns:
+      JSONProvider: The provider, to be set as 'app.json'.
+
+   Raises:
+      ValueError: If the configured provider is unknown.
+      ImportError: If the "orjson" provider is configured and the orjson package is not installed.
+   """
+   name = config.section('api').get('json_provider', 'orjson')
+   if name not in JSON_PROVIDERS:
+      raise ValueError('Unknown JSON provider: {}'.format(name))
+   return JSON_PROVIDERS[name](app)
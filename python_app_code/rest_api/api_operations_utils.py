@@ -1,5 +1,116 @@
+import hashlib
+import math
 import re
-from flask import request, jsonify
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Optional, Tuple
+from flask import request, Response
+
+# Values allowed by the 'status_c' constraint of the Task table
+TASK_STATUSES = ('Created', 'Done', 'Deleted', 'Dropped', 'Postponed')
+# Values of the 'include' parameter of the task lookups (see db_task_actions.INCLUDES)
+TASK_INCLUDES = ('due_by', 'active_due_by')
+# Page sizes of the paginated task listing
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Largest value of the 'id' column of the Task table (INTEGER)
+MAX_TASK_ID = 2147483647
+# Task search: page size, and the longest text and the number of words searched at once
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_LENGTH = 200
+MAX_SEARCH_TERMS = 8
+
+# Patterns of the validated values, compiled once
+DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+INTEGER_PATTERN = re.compile(r'-?\d+')
+LIMIT_PATTERN = re.compile(r'\d+')
+# Words of a searched text, the other characters are ignored (and can't alter the full-text query)
+SEARCH_TERM_PATTERN = re.compile(r'\w+')
+
+DUE_DATE_ERROR = "A Due Date must have a valid 'due_date' with the 'YYYY-MM-DD' format."
+NEW_DUE_DATE_ERROR = "A new Due Date must have a valid 'due_date' with the 'YYYY-MM-DD' format."
+
+class FieldRule:
+    """
+    Rule a field of a JSON request body must follow. A missing or null field is valid unless it is required.
+    """
+    __slots__ = ('name', 'max_length', 'choices', 'is_date', 'error')
+
+    def __init__(self, name: str, max_length: Optional[int] = None, choices: Optional[Tuple[str, ...]] = None,
+                 is_date: bool = False, error: Optional[str] = None) -> None:
+       """
+       Args:
+          name (str): The name of the field, its value must be a string.
+          max_length (int, optional): The maximum length of the value. Defaults to None.
+          choices (Tuple[str, ...], optional): The values allowed. Defaults to None.
+          is_date (bool, optional): If True, the value must be an existing date with the 'YYYY-MM-DD' format. Defaults to False.
+          error (str, optional): The error message of an invalid value. Defaults to one describing the rule.
+       """
+       self.name = name
+       self.max_length = max_length
+       self.choices = frozenset(choices) if choices is not None else None
+       self.is_date = is_date
+       if error is None:
+          if is_date:
+             error = "'{}' must be a valid date with the 'YYYY-MM-DD' format.".format(name)
+          elif choices is not None:
+             error = "'{0}' must be one of: {1}.".format(name, ', '.join(choices))
+          else:
+             error = "'{0}' must be a string of at most {1} characters.".format(name, max_length)
+       self.error = error
+
+    def is_valid(self, value: Any) -> bool:
+       if not isinstance(value, str):
+          return False
+       if self.max_length is not None and len(value) > self.max_length:
+          return False
+       if self.choices is not None and value not in self.choices:
+          return False
+       if self.is_date:
+          if DATE_PATTERN.fullmatch(value) is None:
+             return False
+          try:
+             date.fromisoformat(value)
+          except ValueError:
+             return False
+       return True
+
+# Rules of the fields of a task, following the columns of the Task table
+TASK_STATUS_RULE = FieldRule('task_status', choices=TASK_STATUSES)
+TASK_SCHEMA = (
+    FieldRule('task_name', max_length=20),
+    FieldRule('task_descrip', max_length=280),
+    FieldRule('creation_date', is_date=True),
+    TASK_STATUS_RULE,
+    FieldRule('due_date', is_date=True, error=DUE_DATE_ERROR),
+)
+DUE_DATE_RULE = FieldRule('due_date', is_date=True, error=NEW_DUE_DATE_ERROR)
+
+@dataclass(slots=True)
+class TaskRequest:
+    """
+    Validated body of a request creating or updating a task, a None field is left unchanged (or gets its default).
+    """
+    task_name: Optional[str] = None
+    task_descrip: Optional[str] = None
+    creation_date: Optional[str] = None
+    task_status: Optional[str] = None
+    due_date: Optional[str] = None
+
+@dataclass(slots=True)
+class DueDateRequest:
+    """
+    Validated body of a request creating or updating a due date.
+    """
+    due_date: str
+
+@dataclass(slots=True)
+class StatusChangeRequest:
+    """
+    Validated body of a request changing the status of several tasks.
+    """
+    ids: list
+    task_status: str
 
 class api_operations_utils:
     """
@@ -7,93 +118,139 @@ class api_operations_utils:
     """
 
     @staticmethod
-    def parse_received_request(received_request: dict) -> dict:
-        """
-        Parses the received request and extracts relevant information.
+    def read_json_body(received_request: request) -> Tuple[Any, Optional[str]]:
+       """
+       Reads the JSON body of a request, decoding it only once.
 
-        Args:
-            received_request (dict): The received request as a dictionary.
+       Args:
+          received_request (request): The request.
+
+       Returns:
+          tuple: A tuple containing the decoded body and an error message, None if the body is a non-empty JSON document.
+       """
+       if not received_request.is_json:
+          return None, "Request does not contain JSON data"
+       body = received_request.get_json(silent=True)
+       if body is None and received_request.get_data(cache=True):
+          return None, "Invalid JSON format"
+       if not body:
+          return None, 'Empty request body'
+       return body, None
 
-        Returns:
-            dict: A dictionary containing the parsed information from the received request.
-        """
-        parsed_req = {}
-        parsed_req["task_name"] = received_request.get("task_name") if isinstance(received_request, dict) else None
-        parsed_req["task_descrip"] = received_request.get("task_descrip") if isinstance(received_request, dict) else None
-        parsed_req["creation_date"] = received_request.get("creation_date") if isinstance(received_request, dict) else None
-        parsed_req["task_status"] = received_request.get("task_status") if isinstance(received_request, dict) else None
-        parsed_req["due_date"] = received_request.get("due_date") if isinstance(received_request, dict) else None
-        return parsed_req
-    
     @staticmethod
-    def validate_json(received_request: request, needs_to_have_name: bool = True) -> jsonify:
+    def parse_task_body(body: Any, is_new: bool = True) -> Tuple[Optional[TaskRequest], Optional[str]]:
        """
-       Validates the JSON data in the received request.
+       Validates the JSON body of a task against TASK_SCHEMA, in a single pass over its fields.
 
        Args:
-          received_request (request): The request object containing the JSON data.
-          needs_to_have_name (bool, optional): Indicates whether the JSON data needs to have a 'task_name' field. Defaults to True.
+          body (Any): The decoded JSON body.
+          is_new (bool, optional): True for a new task, which must have a 'task_name'. False for an update, which must
+                                   change at least one field. Defaults to True.
 
        Returns:
-          jsonify: A JSON response indicating the validation result.
+          tuple: A tuple containing the task (None if invalid) and an error message, None if the task is valid.
        """
-       if not received_request.json:  # Check if the request body is empty
-          return jsonify({'error': 'Empty request body'}), 400
+       if not isinstance(body, dict):
+          return None, "A Task must be a JSON object."
+       values = []
+       for rule in TASK_SCHEMA:
+          value = body.get(rule.name)
+          if value is not None and not rule.is_valid(value):
+             return None, rule.error
+          values.append(value)
+       task = TaskRequest(*values)
+       if is_new and task.task_name is None:
+          return None, "A new Task must have a 'task_name'."
+       if not is_new and not any(value is not None for value in values):
+          return None, "No values to insert or update"
+       return task, None
 
-       if received_request.is_json:
-          try:
-             req = received_request.get_json()
-             if not needs_to_have_name:
-                return jsonify({"message": "Valid JSON received"}), 200
-             elif api_operations_utils.has_task_name(req):
-                return jsonify({"message": "Valid JSON received"}), 200
-             else:
-                return jsonify({"error": "A new Task must have a 'task_name'."}), 400
-          except Exception as e:
-             return jsonify({"error": "Invalid JSON format", "details": str(e)}), 400
-       else:
-          return jsonify({"error": "Request does not contain JSON data"}), 400
-    
     @staticmethod
-    def has_valid_due_date(new_due_date_to_validate: dict) -> bool:
+    def read_task_request(received_request: request, is_new: bool = True) -> Tuple[Optional[TaskRequest], Optional[str]]:
        """
-       Checks if the JSON data has a field named "due_date" with a valid format.
+       Reads and validates the body of a request creating (or updating) a task, see parse_task_body().
 
        Args:
-          new_due_date_to_validate (dict): The JSON data to validate.
+          received_request (request): The request.
+          is_new (bool, optional): True for a new task, False for an update. Defaults to True.
 
        Returns:
-          bool: True if the JSON data has a valid "due_date" field, False otherwise.
+          tuple: A tuple containing the task (None if invalid) and an error message, None if the task is valid.
        """
-       return ("due_date" in new_due_date_to_validate and 
-            isinstance(new_due_date_to_validate["due_date"], str) and 
-            re.match(r'^\d{4}-\d{2}-\d{2}$', new_due_date_to_validate["due_date"]))
-    
+       body, error = api_operations_utils.read_json_body(received_request)
+       if error is not None:
+          return None, error
+       return api_operations_utils.parse_task_body(body, is_new)
+
     @staticmethod
-    def validate_due_date_json(received_request: request) -> jsonify:
+    def parse_due_date_body(body: Any) -> Tuple[Optional[DueDateRequest], Optional[str]]:
        """
-       Validates the JSON data in the request body to ensure it contains a valid due date.
+       Validates the JSON body of a due date, which must have a valid 'due_date'.
 
        Args:
-          received_request (request): The request object containing the JSON data.
+          body (Any): The decoded JSON body.
 
        Returns:
-          jsonify: A JSON response indicating the result of the validation.
+          tuple: A tuple containing the due date (None if invalid) and an error message, None if the due date is valid.
        """
-       if not received_request.json:  # Check if the request body is empty
-          return jsonify({'error': 'Empty request body'}), 400
+       if not isinstance(body, dict) or not DUE_DATE_RULE.is_valid(body.get("due_date")):
+          return None, DUE_DATE_RULE.error
+       return DueDateRequest(body["due_date"]), None
 
-       if received_request.is_json:
-          try:
-             req = received_request.get_json()
-             if api_operations_utils.has_valid_due_date(req):
-                return jsonify({"message": "Valid JSON received"}), 200
-             else:
-                return jsonify({"error": "A new Due Date must have a valid 'due_date' with the 'YYYY-MM-DD' format."}), 400
-          except Exception as e:
-             return jsonify({"error": "Invalid JSON format", "details": str(e)}), 400
-       else:
-          return jsonify({"error": "Request does not contain JSON data"}), 400
+    @staticmethod
+    def read_due_date_request(received_request: request) -> Tuple[Optional[DueDateRequest], Optional[str]]:
+       """
+       Reads and validates the body of a request creating or updating a due date, see parse_due_date_body().
+
+       Args:
+          received_request (request): The request.
+
+       Returns:
+          tuple: A tuple containing the due date (None if invalid) and an error message, None if the due date is valid.
+       """
+       body, error = api_operations_utils.read_json_body(received_request)
+       if error is not None:
+          return None, error
+       return api_operations_utils.parse_due_date_body(body)
+
+    @staticmethod
+    def parse_status_change_body(body: Any) -> Tuple[Optional[StatusChangeRequest], Optional[str]]:
+       """
+       Validates the JSON body of a status change, with the 'ids' of the tasks and their new 'task_status'.
+
+       Args:
+          body (Any): The decoded JSON body.
+
+       Returns:
+          tuple: A tuple containing the status change (None if invalid) and an error message, None if it is valid.
+                 Repeated ids are only kept once, in the order they first appear.
+       """
+       if not isinstance(body, dict):
+          return None, "A status change must be a JSON object."
+       ids = body.get("ids")
+       if not isinstance(ids, list) or len(ids) == 0:
+          return None, "'ids' must be a non-empty list of task ids."
+       if not all(type(task_id) is int and 0 < task_id <= MAX_TASK_ID for task_id in ids):
+          return None, "'ids' must only contain valid task ids."
+       if not TASK_STATUS_RULE.is_valid(body.get("task_status")):
+          return None, TASK_STATUS_RULE.error
+       return StatusChangeRequest(list(dict.fromkeys(ids)), body["task_status"]), None
+
+    @staticmethod
+    def read_status_change_request(received_request: request) -> Tuple[Optional[StatusChangeRequest], Optional[str]]:
+       """
+       Reads and validates the body of a request changing the status of several tasks, see parse_status_change_body().
+
+       Args:
+          received_request (request): The request.
+
+       Returns:
+          tuple: A tuple containing the status change (None if invalid) and an error message, None if it is valid.
+       """
+       body, error = api_operations_utils.read_json_body(received_request)
+       if error is not None:
+          return None, error
+       return api_operations_utils.parse_status_change_body(body)
 
     @staticmethod
     def is_task_id_valid(task_id: str) -> bool:
@@ -106,23 +263,261 @@ class api_operations_utils:
        Returns:
           bool: True if the task_id is an integer, False otherwise.
        """
-       if task_id is None:
-          return False
-       if not isinstance(task_id, (int, float, str, bool)):
-          return False
-       return re.match(r'^-?\d+$', task_id)
+       return isinstance(task_id, str) and INTEGER_PATTERN.fullmatch(task_id) is not None
    
     @staticmethod
-    def has_task_name(new_task_to_validate: dict) -> bool:
+    def is_date_valid(date_to_validate: str) -> bool:
        """
-       Checks if the given JSON data contains a field named "task_name".
+       Check if the given value is an existing date with the 'YYYY-MM-DD' format.
 
        Args:
-          new_task_to_validate (dict): The JSON data to validate.
+          date_to_validate (str): The value to be checked.
 
        Returns:
-          bool: True if the JSON data has a field named "task_name", False otherwise.
+          bool: True if the value is a valid date, False otherwise.
        """
-       if new_task_to_validate is None:
+       if not isinstance(date_to_validate, str) or DATE_PATTERN.fullmatch(date_to_validate) is None:
+          return False
+       try:
+          date.fromisoformat(date_to_validate)
+          return True
+       except ValueError:
           return False
-       return "task_name" in new_task_to_validate
+
+    @staticmethod
+    def parse_task_list_args(args: dict) -> Tuple[dict, Optional[str]]:
+       """
+       Parses and validates the query string parameters of the task listing.
+
+       Supported parameters:
+          limit: The maximum number of tasks in the page (1 to MAX_PAGE_SIZE).
+          after_id: The ID of the last task of the previous page.
+          task_status: A comma-separated list of statuses to keep.
+          created_from / created_to: The creation date range ('YYYY-MM-DD'), both ends included.
+          exclude_removed: 'true' to leave out 'Deleted' and 'Dropped' tasks.
+          include: 'due_by' or 'active_due_by' to embed the due dates of each task (see parse_include_arg()).
+
+       Args:
+          args (dict): The query string parameters of the request.
+
+       Returns:
+          tuple: A tuple containing the parsed parameters (with the keys 'paginated', 'limit', 'after_id', 'task_status',
+                 'created_from', 'created_to', 'exclude_removed' and 'include') and an error message, None if they are valid.
+       """
+       parsed_args = {"paginated": "limit" in args or "after_id" in args, "limit": None, "after_id": None,
+                      "task_status": None, "created_from": None, "created_to": None, "exclude_removed": False,
+                      "include": None}
+       if parsed_args["paginated"]:
+          limit = args.get("limit", str(DEFAULT_PAGE_SIZE))
+          if LIMIT_PATTERN.fullmatch(limit) is None or not 1 <= int(limit) <= MAX_PAGE_SIZE:
+             return parsed_args, 'Parameter "limit" must be an integer between 1 and {}.'.format(MAX_PAGE_SIZE)
+          parsed_args["limit"] = int(limit)
+          if "after_id" in args:
+             if not api_operations_utils.is_task_id_valid(args["after_id"]):
+                return parsed_args, 'Parameter "after_id" must be a valid integer.'
+             parsed_args["after_id"] = int(args["after_id"])
+
+       parsed_args["task_status"], error = api_operations_utils.parse_task_status_arg(args)
+       if error is not None:
+          return parsed_args, error
+
+       for date_arg in ("created_from", "created_to"):
+          if date_arg in args:
+             if not api_operations_utils.is_date_valid(args[date_arg]):
+                return parsed_args, 'Parameter "{}" must be a valid date with the \'YYYY-MM-DD\' format.'.format(date_arg)
+             parsed_args[date_arg] = args[date_arg]
+
+       if "exclude_removed" in args:
+          if args["exclude_removed"].lower() not in ("true", "false"):
+             return parsed_args, 'Parameter "exclude_removed" must be either "true" or "false".'
+          parsed_args["exclude_removed"] = args["exclude_removed"].lower() == "true"
+
+       parsed_args["include"], error = api_operations_utils.parse_include_arg(args)
+       return parsed_args, error
+
+    @staticmethod
+    def parse_task_status_arg(args: dict) -> Tuple[Optional[list], Optional[str]]:
+       """
+       Parses and validates the 'task_status' query string parameter of the task listing and search, a comma-separated
+       list of statuses to keep.
+
+       Args:
+          args (dict): The query string parameters of the request.
+
+       Returns:
+          tuple: A tuple containing the list of statuses (None if the parameter is absent) and an error message,
+                 None if it is valid.
+       """
+       if "task_status" not in args:
+          return None, None
+       statuses = [status.strip() for status in args["task_status"].split(',') if status.strip()]
+       invalid_statuses = [status for status in statuses if status not in TASK_STATUSES]
+       if len(statuses) == 0 or invalid_statuses:
+          return None, 'Parameter "task_status" must be a comma-separated list of: {}.'.format(', '.join(TASK_STATUSES))
+       return statuses, None
+
+    @staticmethod
+    def parse_task_search_args(args: dict) -> Tuple[dict, Optional[str]]:
+       """
+       Parses and validates the query string parameters of the task search.
+
+       Supported parameters:
+          q: The searched text (at most MAX_SEARCH_LENGTH characters), only its first MAX_SEARCH_TERMS words are
+             searched, lowercased.
+          limit: The maximum number of tasks in the page (1 to MAX_PAGE_SIZE, DEFAULT_SEARCH_PAGE_SIZE by default).
+          after: The 'rank,id' of the last task of the previous page.
+          task_status: A comma-separated list of statuses to keep.
+          exclude_removed: 'true' to leave out 'Deleted' and 'Dropped' tasks.
+
+       Args:
+          args (dict): The query string parameters of the request.
+
+       Returns:
+          tuple: A tuple containing the parsed parameters (with the keys 'terms', 'limit', 'after', the latter being a
+                 (rank, id) tuple, 'task_status' and 'exclude_removed') and an error message, None if they are valid.
+       """
+       parsed_args = {"terms": None, "limit": DEFAULT_SEARCH_PAGE_SIZE, "after": None, "task_status": None,
+                      "exclude_removed": False}
+       text = args.get("q", "")
+       terms = SEARCH_TERM_PATTERN.findall(text.lower())[:MAX_SEARCH_TERMS]
+       if len(text) > MAX_SEARCH_LENGTH or not terms:
+          return parsed_args, 'Parameter "q" must contain at least one word and at most {} characters.'.format(MAX_SEARCH_LENGTH)
+       parsed_args["terms"] = terms
+
+       limit = args.get("limit", str(DEFAULT_SEARCH_PAGE_SIZE))
+       if LIMIT_PATTERN.fullmatch(limit) is None or not 1 <= int(limit) <= MAX_PAGE_SIZE:
+          return parsed_args, 'Parameter "limit" must be an integer between 1 and {}.'.format(MAX_PAGE_SIZE)
+       parsed_args["limit"] = int(limit)
+
+       if "after" in args:
+          after = args["after"].split(',')
+          try:
+             rank = float(after[0])
+          except ValueError:
+             rank = None
+          if (len(after) != 2 or rank is None or not math.isfinite(rank)
+                or not api_operations_utils.is_task_id_valid(after[1])):
+             return parsed_args, 'Parameter "after" must be the \'rank,id\' of the last task of the previous page.'
+          parsed_args["after"] = (rank, int(after[1]))
+
+       parsed_args["task_status"], error = api_operations_utils.parse_task_status_arg(args)
+       if error is not None:
+          return parsed_args, error
+
+       if "exclude_removed" in args:
+          if args["exclude_removed"].lower() not in ("true", "false"):
+             return parsed_args, 'Parameter "exclude_removed" must be either "true" or "false".'
+          parsed_args["exclude_removed"] = args["exclude_removed"].lower() == "true"
+       return parsed_args, None
+
+    @staticmethod
+    def parse_include_arg(args: dict) -> Tuple[Optional[str], Optional[str]]:
+       """
+       Parses and validates the 'include' query string parameter of the task lookups, which embeds the due dates
+       of each task in the response: 'due_by' adds every due date of the task as a 'due_by' list,
+       'active_due_by' adds its active due date only as 'due_date' (null if it has none).
+
+       Args:
+          args (dict): The query string parameters of the request.
+
+       Returns:
+          tuple: A tuple containing the value of the parameter (None if it is absent) and an error message,
+                 None if it is valid.
+       """
+       include = args.get("include")
+       if include is not None and include not in TASK_INCLUDES:
+          return None, 'Parameter "include" must be one of: {}.'.format(', '.join(TASK_INCLUDES))
+       return include, None
+
+    @staticmethod
+    def parse_due_by_range_args(args: dict, paginated: bool = True) -> Tuple[dict, Optional[str]]:
+       """
+       Parses and validates the query string parameters of the due date listing and of its histogram.
+
+       Supported parameters:
+          from / to: The due date range ('YYYY-MM-DD'), both ends included.
+          active: 'true' (default) to keep the active due dates only, 'false' to keep the inactive ones only.
+          limit: The maximum number of due dates in the page (1 to MAX_PAGE_SIZE), paginated listing only.
+          after: The 'due_date,task_id' of the last due date of the previous page, paginated listing only.
+
+       Args:
+          args (dict): The query string parameters of the request.
+          paginated (bool, optional): Whether the 'limit' and 'after' parameters are supported. Defaults to True.
+
+       Returns:
+          tuple: A tuple containing the parsed parameters (with the keys 'due_from', 'due_to', 'active', 'limit' and
+                 'after', the latter being a (due_date, task_id) tuple) and an error message, None if they are valid.
+       """
+       parsed_args = {"due_from": None, "due_to": None, "active": True, "limit": DEFAULT_PAGE_SIZE, "after": None}
+       for date_arg, key in (("from", "due_from"), ("to", "due_to")):
+          if date_arg in args:
+             if not api_operations_utils.is_date_valid(args[date_arg]):
+                return parsed_args, 'Parameter "{}" must be a valid date with the \'YYYY-MM-DD\' format.'.format(date_arg)
+             parsed_args[key] = args[date_arg]
+
+       if "active" in args:
+          if args["active"].lower() not in ("true", "false"):
+             return parsed_args, 'Parameter "active" must be either "true" or "false".'
+          parsed_args["active"] = args["active"].lower() == "true"
+
+       if paginated:
+          limit = args.get("limit", str(DEFAULT_PAGE_SIZE))
+          if LIMIT_PATTERN.fullmatch(limit) is None or not 1 <= int(limit) <= MAX_PAGE_SIZE:
+             return parsed_args, 'Parameter "limit" must be an integer between 1 and {}.'.format(MAX_PAGE_SIZE)
+          parsed_args["limit"] = int(limit)
+          if "after" in args:
+             after = args["after"].split(',')
+             if (len(after) != 2 or not api_operations_utils.is_date_valid(after[0])
+                   or not api_operations_utils.is_task_id_valid(after[1])):
+                return parsed_args, 'Parameter "after" must be the \'due_date,task_id\' of the last due date of the previous page.'
+             parsed_args["after"] = (after[0], int(after[1]))
+
+       return parsed_args, None
+
+    @staticmethod
+    def make_etag(received_request: request, version: str) -> str:
+       """
+       Builds a strong ETag out of the version of the data a GET request returns.
+       The request's path and query string are part of it, since they change the shape of the response.
+
+       Args:
+          received_request (request): The GET request.
+          version (str): The version of the data, as returned by the database (e.g. built from the rows' xmin).
+
+       Returns:
+          str: The ETag, unquoted.
+       """
+       return hashlib.sha1('{0}|{1}'.format(received_request.full_path, version).encode()).hexdigest()
+
+    @staticmethod
+    def has_version(received_request: request, version: str) -> bool:
+       """
+       Checks whether the client already has the data of a version, i.e. whether the 'If-None-Match' header of a
+       request matches the ETag built from it.
+
+       Args:
+          received_request (request): The GET request.
+          version (str): The version of the data, see make_etag().
+
+       Returns:
+          bool: True if the data doesn't need to be sent again.
+       """
+       return received_request.if_none_match.contains_weak(api_operations_utils.make_etag(received_request, version))
+
+    @staticmethod
+    def not_modified_response(received_request: request, etag: str) -> Optional[Response]:
+       """
+       Checks the 'If-None-Match' header of a request against the current ETag of its data.
+
+       Args:
+          received_request (request): The GET request.
+          etag (str): The current ETag, unquoted.
+
+       Returns:
+          Response: An empty '304 Not Modified' response if the client already has the current data, None otherwise.
+       """
+       if not received_request.if_none_match.contains_weak(etag):
+          return None
+       response = Response(status=304)
+       response.set_etag(etag)
+       return response
@@ -0,0 +1,109 @@
+from werkzeug.http import quote_etag
+from quart import request, Blueprint, jsonify
+from database_operations import db_due_by_actions as dbdba, async_db_due_by_actions as dba
+from rest_api import api_operations_utils as aou
+from rest_api.async_tasks_operations_api import not_modified_response, read_json_body
+
+# This script defines the asyncio (Quart) variant of the REST API endpoints of due_by_operations_api.
+# The requests and responses are the same, only the serving model differs.
+
+due_by_api = Blueprint('due_by_api', __name__)
+utils = aou.api_operations_utils()
+
+@due_by_api.route('/tasks/<task_id>/due-by', methods=['GET', 'POST', 'PUT'])
+async def list_due_by_route(task_id: int):
+   """
+   Route handler for listing due dates and performing CRUD operations on due dates, see due_by_operations_api.list_due_by_route().
+   """
+   if not utils.is_task_id_valid(task_id):
+      return jsonify({'error': 'Parameter "task-id" in "/tasks/<task-id>/due-by" must be a valid integer.'}), 400
+   if request.method == 'GET':
+      return await get_task_due_dates(task_id)
+   elif request.method == "POST":
+      return await post_due_date(task_id)
+   elif request.method == "PUT":
+      return await post_due_date(task_id, True)
+
+async def get_task_due_dates(id: str):
+   """
+   Retrieves the due dates for a task with the given ID, see due_by_operations_api.get_task_due_dates().
+   """
+   id = int(id)
+   try:
+      # The current version is only read for a conditional request: the others only run the query of the body
+      if request.if_none_match:
+         version = await dba.get_due_by_version(id)
+         if version is None:
+            return jsonify({'error': 'Task\'s due date with task\'s id {} not found'.format(id)}), 404
+         etag = utils.make_etag(request, version)
+         not_modified = not_modified_response(etag)
+         if not_modified is not None:
+            return not_modified
+
+      # The ETag comes from the version read along with the body, which may differ from the one checked above
+      version, db_response = await dba.get_versioned_due_by(id)
+      if db_response is None or len(db_response) == 0:
+         return jsonify({'error': 'Task\'s due date with task\'s id {} not found'.format(id)}), 404
+      else:
+         return jsonify(db_response), 200, {"ETag": quote_etag(utils.make_etag(request, version))}
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
+
+async def post_due_date(task_id: int, comming_from_put: bool = False):
+   """
+   If invoked form POST method, creates a new due date for a task.
+   If invoked from PUT method, updates the due date for a task.
+   See due_by_operations_api.post_due_date().
+   """
+   id = int(task_id)
+   body, error = await read_json_body()
+   if error is None:
+      parsed_req, error = utils.parse_due_date_body(body)
+   if error is not None:
+      return jsonify({'error': error}), 400
+   try:
+      outcome, msg = await dba.apply_due_date(id, parsed_req.due_date,
+                                              dbdba.MODE_UPDATE if comming_from_put else dbdba.MODE_CREATE)
+      if outcome == dbdba.DUE_DATE_TASK_NOT_FOUND:
+         return jsonify({'error': 'Task with id {} not found, create a task beforehand'.format(id)}), 404
+      elif outcome == dbdba.DUE_DATE_ALREADY_EXISTS:
+         return jsonify({"error": "Due date already exists for this task, use PUT method instead to update it."}), 409
+      elif outcome == dbdba.DUE_DATE_NOT_FOUND:
+         return jsonify({"error": "Due date doesn't exists for this task, use POST method instead to create it."}), 404
+      return jsonify({"message": msg}), 200 if comming_from_put else 201
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
+
+@due_by_api.route('/due-by', methods=['GET'])
+async def list_due_dates_route():
+   """
+   Lists the due dates of every task within a date range, see due_by_operations_api.list_due_dates_route().
+   """
+   args, error = utils.parse_due_by_range_args(request.args)
+   if error is not None:
+      return jsonify({'error': error}), 400
+   try:
+      # One extra due date is fetched to know whether there is a next page
+      due_dates = await dba.get_due_dates_in_range(args["due_from"], args["due_to"], args["active"],
+                                                   args["limit"] + 1, args["after"])
+      next_after = None
+      if len(due_dates) > args["limit"]:
+         due_dates = due_dates[:args["limit"]]
+         next_after = '{0},{1}'.format(due_dates[-1].due_date.isoformat(), due_dates[-1].task_id)
+      return jsonify({"due_dates": due_dates, "next_after": next_after}), 200
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
+
+@due_by_api.route('/due-by/histogram', methods=['GET'])
+async def due_dates_histogram_route():
+   """
+   Counts the due dates of every task per day within a date range, see due_by_operations_api.due_dates_histogram_route().
+   """
+   args, error = utils.parse_due_by_range_args(request.args, paginated=False)
+   if error is not None:
+      return jsonify({'error': error}), 400
+   try:
+      histogram = await dba.get_due_dates_histogram(args["due_from"], args["due_to"], args["active"])
+      return jsonify(histogram), 200
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
@@ -0,0 +1,323 @@
+import csv
+import io
+import json
+from dataclasses import asdict
+from werkzeug.http import quote_etag
+from quart import request, Blueprint, jsonify, Response
+from database_operations import db_config as dbc, db_task_actions as dbta, async_db_task_actions as dba
+from rest_api import api_operations_utils as aou
+
+# This script defines the asyncio (Quart) variant of the REST API endpoints of tasks_operations_api.
+# The requests and responses are the same, only the serving model differs.
+
+tasks_api = Blueprint('tasks_api', __name__)
+utils = aou.api_operations_utils()
+
+# Number of exported rows written to the response at a time
+EXPORT_CHUNK_ROWS = 500
+
+def not_modified_response(etag: str):
+   """
+   Returns an empty '304 Not Modified' response if the request's 'If-None-Match' header matches the ETag, None otherwise.
+   """
+   if not request.if_none_match.contains_weak(etag):
+      return None
+   return '', 304, {"ETag": quote_etag(etag)}
+
+async def read_json_body():
+   """
+   Reads the JSON body of the request, see api_operations_utils.read_json_body().
+
+   Returns:
+      tuple: A tuple containing the decoded body and an error message, None if the body is a non-empty JSON document.
+   """
+   if not request.is_json:
+      return None, "Request does not contain JSON data"
+   body = await request.get_json(silent=True)
+   if body is None and await request.get_data(cache=True):
+      return None, "Invalid JSON format"
+   if not body:
+      return None, 'Empty request body'
+   return body, None
+
+async def read_task_json(is_new: bool = True):
+   """
+   Reads and validates the JSON body of a task request, see api_operations_utils.read_task_request().
+
+   Args:
+      is_new (bool, optional): True for a new task, False for an update. Defaults to True.
+
+   Returns:
+      tuple: A tuple containing the task (None if invalid) and the error response (None if valid).
+   """
+   body, error = await read_json_body()
+   if error is None:
+      task, error = utils.parse_task_body(body, is_new)
+   if error is not None:
+      return None, (jsonify({'error': error}), 400)
+   return task, None
+
+@tasks_api.route('/tasks', methods=['GET', 'POST', 'PATCH'])
+@tasks_api.route('/tasks/<task_id>', methods=['GET', 'PUT', 'DELETE'])
+async def list_tasks_route(task_id: int = None):
+   """
+   Route handler for listing tasks and performing CRUD operations on tasks, see tasks_operations_api.list_tasks_route().
+   """
+   if task_id is not None:
+      if not utils.is_task_id_valid(task_id):
+         return jsonify({'error': 'Parameter "task-id" in "/tasks/<task-id>" must be a valid integer.'}), 400
+
+   if request.method == 'GET':
+      if task_id is None:
+         return await list_tasks()
+      else:
+         return await get_task(task_id)
+   elif request.method == "POST":
+      return await add_task()
+   elif request.method == "PATCH":
+      return await update_tasks_status()
+   elif request.method == "DELETE":
+      return await delete_task(task_id)
+   elif request.method == "PUT":
+      return await update_task(task_id)
+
+@tasks_api.route('/tasks/export', methods=['GET'])
+async def export_tasks_route():
+   """
+   Route handler for exporting every task, streamed as NDJSON or CSV, see tasks_operations_api.export_tasks_route().
+   """
+   export_format = request.args.get("format", "ndjson").lower()
+   if export_format not in ("ndjson", "csv"):
+      return jsonify({'error': 'Parameter "format" must be either "ndjson" or "csv".'}), 400
+   include_due_by = request.args.get("include_due_by", "false").lower()
+   if include_due_by not in ("true", "false"):
+      return jsonify({'error': 'Parameter "include_due_by" must be either "true" or "false".'}), 400
+   include_due_by = include_due_by == "true"
+   args, error = utils.parse_task_list_args({key: value for key, value in request.args.items()
+                                             if key not in ("limit", "after_id")})
+   if error is not None:
+      return jsonify({'error': error}), 400
+
+   columns = dbta.EXPORT_COLUMNS_WITH_DUE_BY if include_due_by else dbta.EXPORT_COLUMNS
+   rows = dba.export_tasks(include_due_by, args["task_status"], args["created_from"],
+                           args["created_to"], args["exclude_removed"])
+   try:
+      # Fetch the first row now so that connection and query errors are still reported with a 500 status
+      first_row = await rows.__anext__()
+   except StopAsyncIteration:
+      first_row = None
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
+
+   async def all_rows():
+      if first_row is not None:
+         yield first_row
+         async for row in rows:
+            yield row
+
+   if export_format == "csv":
+      response = Response(generate_csv_export(columns, all_rows()), mimetype='text/csv')
+   else:
+      response = Response(generate_ndjson_export(columns, all_rows()), mimetype='application/x-ndjson')
+   response.headers["Content-Disposition"] = 'attachment; filename=tasks.{}'.format(export_format)
+   return response
+
+@tasks_api.route('/tasks/search', methods=['GET'])
+async def search_tasks_route():
+   """
+   Route handler for searching tasks by keyword, the most relevant first, see tasks_operations_api.search_tasks_route().
+   """
+   args, error = utils.parse_task_search_args(request.args)
+   if error is not None:
+      return jsonify({'error': error}), 400
+   search_config = dbc.get_config().section('search')
+   fuzzy = search_config.get('fuzzy', 'true').lower() == 'true'
+   max_candidates = int(search_config.get('max_candidates', 2000)) or None
+   try:
+      # One extra task is fetched to know whether there is a next page
+      tasks, truncated = await dba.search_tasks(args["terms"], args["limit"] + 1, args["after"], args["task_status"],
+                                                args["exclude_removed"], fuzzy, max_candidates)
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
+   next_after = None
+   if len(tasks) > args["limit"]:
+      tasks = tasks[:args["limit"]]
+      next_after = '{0!r},{1}'.format(tasks[-1].rank, tasks[-1].id)
+   return jsonify({"tasks": tasks, "next_after": next_after, "truncated": truncated}), 200
+
+async def generate_ndjson_export(columns: tuple, rows):
+   """
+   Serializes exported rows as NDJSON, EXPORT_CHUNK_ROWS rows at a time.
+   """
+   chunk = []
+   async for row in rows:
+      chunk.append(json.dumps(dict(zip(columns, row)), default=str) + '\n')
+      if len(chunk) == EXPORT_CHUNK_ROWS:
+         yield ''.join(chunk)
+         chunk = []
+   if chunk:
+      yield ''.join(chunk)
+
+async def generate_csv_export(columns: tuple, rows):
+   """
+   Serializes exported rows as CSV with a header line, EXPORT_CHUNK_ROWS rows at a time.
+   """
+   buffer = io.StringIO()
+   writer = csv.writer(buffer)
+   writer.writerow(columns)
+   count = 0
+   async for row in rows:
+      writer.writerow(row)
+      count += 1
+      if count % EXPORT_CHUNK_ROWS == 0:
+         yield buffer.getvalue()
+         buffer.seek(0)
+         buffer.truncate(0)
+   if buffer.tell():
+      yield buffer.getvalue()
+
+async def list_tasks():
+   """
+   Retrieves a list of tasks from the database, filtered by the query string parameters, see tasks_operations_api.list_tasks().
+   """
+   args, error = utils.parse_task_list_args(request.args)
+   if error is not None:
+      return jsonify({'error': error}), 400
+   try:
+      # One extra task of a page is fetched to know whether there is a next page. The tasks aren't read if the
+      # client has them.
+      version, tasks = await dba.get_versioned_tasks(args["limit"] + 1 if args["paginated"] else None, args["after_id"],
+                                                     args["task_status"], args["created_from"], args["created_to"],
+                                                     args["exclude_removed"], args["include"],
+                                                     unchanged=lambda version: utils.has_version(request, version))
+      etag = utils.make_etag(request, version)
+      if tasks is None:
+         return not_modified_response(etag)
+      if not args["paginated"]:
+         return jsonify(tasks), 200, {"ETag": quote_etag(etag)}
+      next_after_id = None
+      if len(tasks) > args["limit"]:
+         tasks = tasks[:args["limit"]]
+         next_after_id = tasks[-1].id
+      return jsonify({"tasks": tasks, "next_after_id": next_after_id}), 200, {"ETag": quote_etag(etag)}
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
+
+async def get_task(id: str):
+   """
+   Retrieve a task by its ID, see tasks_operations_api.get_task().
+   """
+   include, error = utils.parse_include_arg(request.args)
+   if error is not None:
+      return jsonify({'error': error}), 400
+   try:
+      # The current version is only read for a conditional request: the others only run the query of the body
+      if request.if_none_match:
+         version = await dba.get_task_version(id, include)
+         if version is None:
+            return jsonify({'error': 'Task with id {} not found'.format(id)}), 404
+         etag = utils.make_etag(request, version)
+         not_modified = not_modified_response(etag)
+         if not_modified is not None:
+            return not_modified
+
+      # The ETag comes from the version read along with the body, which may differ from the one checked above
+      version, db_response = await dba.get_versioned_task(id, include)
+      if db_response is None or len(db_response) == 0:
+         return jsonify({'error': 'Task with id {} not found'.format(id)}), 404
+      else:
+         return jsonify(db_response), 200, {"ETag": quote_etag(utils.make_etag(request, version))}
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
+
+async def add_task():
+   """
+   Adds a new task to the task table, see tasks_operations_api.add_task().
+   """
+   new_task, error_response = await read_task_json()
+   if error_response is not None:
+      return error_response
+   try:
+      response = await dba.insert_into_task_table(new_task.task_name, new_task.task_descrip,
+                                                  new_task.creation_date, new_task.task_status, new_task.due_date)
+      return jsonify({"new_task_id": response}), 201
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
+
+@tasks_api.route('/tasks/batch', methods=['POST'])
+async def add_tasks_batch_route():
+   """
+   Adds several new tasks at once, see tasks_operations_api.add_tasks_batch_route().
+   """
+   new_tasks = await request.get_json(silent=True)
+   if not isinstance(new_tasks, list) or len(new_tasks) == 0:
+      return jsonify({"error": "The request body must be a non-empty JSON array of tasks."}), 400
+   max_batch_size = int(dbc.get_config().section('api').get('max_batch_size', 1000))
+   if len(new_tasks) > max_batch_size:
+      return jsonify({"error": "A batch can contain at most {} tasks.".format(max_batch_size)}), 413
+
+   tasks = []
+   errors = []
+   for index, new_task in enumerate(new_tasks):
+      task, error = utils.parse_task_body(new_task)
+      if error is not None:
+         errors.append({"index": index, "error": error})
+      else:
+         tasks.append(asdict(task))
+   if errors:
+      return jsonify({"error": "Invalid tasks, none was added.", "errors": errors}), 400
+
+   try:
+      response = await dba.insert_tasks_batch(tasks)
+      return jsonify({"new_task_ids": response}), 201
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
+
+async def update_tasks_status():
+   """
+   Changes the status of several tasks at once, see tasks_operations_api.update_tasks_status().
+   """
+   body, error = await read_json_body()
+   if error is None:
+      status_change, error = utils.parse_status_change_body(body)
+   if error is not None:
+      return jsonify({'error': error}), 400
+   max_size = int(dbc.get_config().section('api').get('max_status_change_size', 10000))
+   if len(status_change.ids) > max_size:
+      return jsonify({"error": "A status change can contain at most {} ids.".format(max_size)}), 413
+   try:
+      updated, skipped, missing = await dba.update_tasks_status(status_change.ids, status_change.task_status)
+      return jsonify({"updated": updated, "skipped": skipped, "missing": missing}), 200
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
+
+async def update_task(task_id: int):
+   """
+   Update a task with the given task_id, see tasks_operations_api.update_task().
+   """
+   id = int(task_id)
+   update_task, error_response = await read_task_json(is_new=False)
+   if error_response is not None:
+      return error_response
+   try:
+      # The task's existence is checked by the update itself
+      found = await dba.update_task(id, update_task.task_name, update_task.task_descrip,
+                                    update_task.creation_date, update_task.task_status, update_task.due_date)
+      if not found:
+         return jsonify({'error': 'Task with id {} not found'.format(id)}), 404
+      return '', 204
+   except ValueError as e:
+      return jsonify({"error": str(e)}), 400
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
+
+async def delete_task(task_id: int):
+   """
+   Changes the status of a task with the given task_id to 'Deleted', see tasks_operations_api.delete_task().
+   """
+   try:
+      if not await dba.delete_task(task_id):
+         return jsonify({'error': 'Task with id {} not found'.format(task_id)}), 404
+      return '', 204
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
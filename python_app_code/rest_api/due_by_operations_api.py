@@ -1,10 +1,12 @@
 from flask import request, Blueprint, jsonify
-from database_operations import db_due_by_actions as dba, db_task_actions as dbta
-from rest_api import api_operations_utils as aou
+from werkzeug.http import quote_etag
+from database_operations import db_due_by_actions as dba
+from rest_api import api_admission, api_operations_utils as aou
 
 # This script defines the REST API endpoints for the operations that can be done on the Due_by table
 
-due_by_api = Blueprint('due_by_api', __name__)
+# The requests are admitted under the limits of api_admission, as they query the database
+due_by_api = api_admission.guard(Blueprint('due_by_api', __name__))
 utils = aou.api_operations_utils()
 
 @due_by_api.route('/tasks/<task_id>/due-by', methods=['GET', 'POST', 'PUT'])
@@ -36,17 +38,30 @@ def get_task_due_dates(id: str) -> jsonify:
 
    Returns:
       jsonify: A JSON response containing the result of the operation with the following status codes:
-         200: If the task's due dates are found in the database, the function returns the response from the database.
+         200: If the task's due dates are found in the database, the function returns the response from the database
+              along with an ETag built from the due dates' row versions.
+         304: If the request's 'If-None-Match' header matches the current ETag, the body is then empty.
          404: If the task's due dates are not found, the function returns an not-found error message.
          500: If an exception occurs during the database operation, the function returns an error message.
    """
    id = int(id)
    try:
-      db_response = dba.get_due_by(id)
+      # The current version is only read for a conditional request: the others are served from the cache
+      if request.if_none_match:
+         version = dba.get_due_by_version(id)
+         if version is None:
+            return jsonify({'error': 'Task\'s due date with task\'s id {} not found'.format(id)}), 404
+         etag = utils.make_etag(request, version)
+         not_modified = utils.not_modified_response(request, etag)
+         if not_modified is not None:
+            return not_modified
+
+      # The ETag comes from the version read along with the body, which may differ from the one checked above
+      version, db_response = dba.get_versioned_due_by(id)
       if db_response is None or len(db_response) == 0:
          return jsonify({'error': 'Task\'s due date with task\'s id {} not found'.format(id)}), 404
       else:
-         return db_response
+         return db_response, 200, {"ETag": quote_etag(utils.make_etag(request, version))}
    except Exception as e:
       return jsonify({'error': str(e)}), 500
 
@@ -65,30 +80,25 @@ def post_due_date(task_id: int, received_request: request, comming_from_put: boo
       jsonify: A JSON response containing the result of the operation with the following status codes:
          200: If the due date is successfully updated.
          201: If the due date is successfully created.
+         400: If the request body doesn't contain a valid due date.
          404: If the task with the given ID is not found, or if the due date doesn't exist for the task and comming from PUT.
          409: If a due date already exists for the task and if comming from POST as there is a creation conflict.
          500: If an unexpected error occurs.
    """
    id = int(task_id)
+   parsed_req, error = utils.read_due_date_request(received_request)
+   if error is not None:
+      return jsonify({'error': error}), 400
    try:
-      task = dbta.get_a_task(id)
-      if task is None or len(task) == 0:
+      # Existence checks and the change itself are done atomically, in a single round trip
+      outcome, msg = dba.apply_due_date(id, parsed_req.due_date, dba.MODE_UPDATE if comming_from_put else dba.MODE_CREATE)
+      if outcome == dba.DUE_DATE_TASK_NOT_FOUND:
          return jsonify({'error': 'Task with id {} not found, create a task beforehand'.format(id)}), 404
-      else:
-         tmp = utils.validate_due_date_json(received_request)
-         if tmp[1] == 200:
-            parsed_req = utils.parse_received_request(received_request.get_json())
-            check_if_due_date_exists = dba.get_specific_due_by(id, parsed_req["due_date"])
-            if not comming_from_put:
-               if check_if_due_date_exists is not None and len(check_if_due_date_exists) > 0:
-                  return jsonify({"error": "Due date already exists for this task, use PUT method instead to update it."}), 409
-            else:
-               if check_if_due_date_exists is None or len(check_if_due_date_exists) == 0:
-                  return jsonify({"error": "Due date doesn't exists for this task, use POST method instead to create it."}), 404
-            response = dba.insert_into_due_by_table(id, parsed_req["due_date"])
-            return jsonify({"message": response}), 200 if comming_from_put else 201
-         else:
-            return tmp[0], tmp[1]
+      elif outcome == dba.DUE_DATE_ALREADY_EXISTS:
+         return jsonify({"error": "Due date already exists for this task, use PUT method instead to update it."}), 409
+      elif outcome == dba.DUE_DATE_NOT_FOUND:
+         return jsonify({"error": "Due date doesn't exists for this task, use POST method instead to create it."}), 404
+      return jsonify({"message": msg}), 200 if comming_from_put else 201
    except Exception as e:
       return jsonify({'error': str(e)}), 500
       
@@ -103,4 +113,62 @@ def put_due_date(task_id: int, received_request: request) -> jsonify:
    Returns:
       jsonify: The JSON response indicating the success or failure of the operation.
    """
-   return post_due_date(task_id, received_request, True)
\ No newline at end of file
+   return post_due_date(task_id, received_request, True)
+
+@due_by_api.route('/due-by', methods=['GET'])
+def list_due_dates_route() -> jsonify:
+   """
+   Lists the due dates of every task within a date range, e.g. the upcoming or overdue ones, sorted by due date.
+
+   Query string parameters:
+      from / to: The due date range ('YYYY-MM-DD'), both ends included. Both are optional.
+      active: 'true' (default) to list the active due dates only, 'false' to list the inactive ones only.
+      limit: The maximum number of due dates in the page, from 1 to 1000 (100 by default).
+      after: The 'next_after' value of the previous page.
+
+   Returns:
+      jsonify: A JSON response containing the result of the operation with the following status codes:
+         200: A JSON object with the page of due dates ('due_dates', each one with its task's name and status) and
+              the 'after' value of the next page ('next_after', null on the last page).
+         400: If a query string parameter is invalid, the function returns an error message.
+         500: If an exception occurs during the database operation, the function returns an error message.
+   """
+   args, error = utils.parse_due_by_range_args(request.args)
+   if error is not None:
+      return jsonify({'error': error}), 400
+   try:
+      # One extra due date is fetched to know whether there is a next page
+      due_dates = dba.get_due_dates_in_range(args["due_from"], args["due_to"], args["active"],
+                                             args["limit"] + 1, args["after"])
+      next_after = None
+      if len(due_dates) > args["limit"]:
+         due_dates = due_dates[:args["limit"]]
+         next_after = '{0},{1}'.format(due_dates[-1].due_date.isoformat(), due_dates[-1].task_id)
+      return jsonify({"due_dates": due_dates, "next_after": next_after}), 200
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
+
+@due_by_api.route('/due-by/histogram', methods=['GET'])
+def due_dates_histogram_route() -> jsonify:
+   """
+   Counts the due dates of every task per day within a date range, e.g. for calendar views.
+
+   Query string parameters:
+      from / to: The due date range ('YYYY-MM-DD'), both ends included. Both are optional.
+      active: 'true' (default) to count the active due dates only, 'false' to count the inactive ones only.
+
+   Returns:
+      jsonify: A JSON response containing the result of the operation with the following status codes:
+         200: A list of the days having due dates, with their 'due_date' (an HTTP date, as in the other routes) and 'count',
+              sorted by day.
+         400: If a query string parameter is invalid, the function returns an error message.
+         500: If an exception occurs during the database operation, the function returns an error message.
+   """
+   args, error = utils.parse_due_by_range_args(request.args, paginated=False)
+   if error is not None:
+      return jsonify({'error': error}), 400
+   try:
+      histogram = dba.get_due_dates_histogram(args["due_from"], args["due_to"], args["active"])
+      return jsonify(histogram), 200
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
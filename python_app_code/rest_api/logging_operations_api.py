@@ -0,0 +1,54 @@
+import logging
+import re
+import time
+from flask import Blueprint, Response, g, request
+from database_operations import db_logging as dbl
+
+# This script gives every request a correlation id, added to the records logged while serving it and returned in the
+# 'X-Request-ID' header, and writes the access log. Successful requests are sampled (see 'request_sample_rate' in
+# database.ini), failed ones are always logged.
+
+logging_api = Blueprint('logging_api', __name__)
+
+CORRELATION_HEADER = 'X-Request-ID'
+# Correlation ids accepted from the clients, anything else is replaced by a new one
+VALID_CORRELATION_ID = re.compile(r'[A-Za-z0-9._-]{1,64}')
+
+access_logger = logging.getLogger(dbl.ACCESS_LOGGER)
+
+@logging_api.before_app_request
+def start_request_logging() -> None:
+   """
+   Sets the correlation id of the request, the one sent by the client if it is valid.
+   """
+   correlation_id = request.headers.get(CORRELATION_HEADER)
+   if correlation_id is None or not VALID_CORRELATION_ID.fullmatch(correlation_id):
+      correlation_id = dbl.new_correlation_id()
+   g.correlation_token = dbl.set_correlation_id(correlation_id)
+   g.logging_started = time.perf_counter()
+
+@logging_api.after_app_request
+def log_request(response: Response) -> Response:
+   """
+   Returns the correlation id to the client and logs the request if it failed or is sampled.
+   """
+   correlation_id = dbl.get_correlation_id()
+   if correlation_id is not None:
+      response.headers[CORRELATION_HEADER] = correlation_id
+   started = g.get('logging_started')
+   if started is not None and (response.status_code >= 500 or dbl.should_sample(dbl.get_settings().request_sample_rate)):
+      access_logger.log(logging.ERROR if response.status_code >= 500 else logging.INFO, 'Request served', extra={
+         "method": request.method,
+         "route": request.url_rule.rule if request.url_rule is not None else None,
+         "status": response.status_code,
+         "duration_ms": round((time.perf_counter() - started) * 1000, 3)})
+   return response
+
+@logging_api.teardown_app_request
+def end_request_logging(error) -> None:
+   """
+   Clears the correlation id once the request is served.
+   """
+   token = g.pop('correlation_token', None)
+   if token is not None:
+      dbl.reset_correlation_id(token)
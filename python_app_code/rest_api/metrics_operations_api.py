@@ -0,0 +1,76 @@
+import os
+import time
+from flask import Blueprint, Response, g, request
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Gauge, Histogram, REGISTRY, generate_latest
+from database_operations import db_metrics as dbm
+
+# This script defines the '/metrics' endpoint, in the Prometheus text format, along with the metrics of the requests
+# served by every blueprint of the app. The database metrics are defined in database_operations/db_metrics.py.
+
+metrics_api = Blueprint('metrics_api', __name__)
+
+HTTP_REQUEST_DURATION = Histogram('http_request_duration_seconds', 'Duration of the requests, until the response is returned.',
+                                  ['method', 'route', 'status'],
+                                  buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+HTTP_REQUEST_CHECKOUTS = Histogram('http_request_db_connections', 'Pooled connections checked out per request.',
+                                   ['method', 'route'], buckets=(0, 1, 2, 3, 5, 10, 25))
+HTTP_REQUESTS_IN_PROGRESS = Gauge('http_requests_in_progress', 'Requests being served.', ['method'],
+                                  multiprocess_mode='livesum')
+
+# Children of the labelled metrics, resolved once per label values
+_duration_children = {}
+_checkouts_children = {}
+
+@metrics_api.before_app_request
+def start_request_metrics() -> None:
+   """
+   Starts timing the request and counting the connections it checks out.
+   """
+   g.metrics_started = time.perf_counter()
+   dbm.reset_checkouts()
+   HTTP_REQUESTS_IN_PROGRESS.labels(request.method).inc()
+
+@metrics_api.after_app_request
+def record_request_metrics(response: Response) -> Response:
+   """
+   Records the duration of the request and the connections it checked out. The route is the URL rule matched
+   (e.g. '/tasks/<task_id>'), so that the number of label values stays bounded.
+   """
+   started = g.pop('metrics_started', None)
+   if started is None:
+      return response
+   route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+   key = (request.method, route, response.status_code)
+   duration = _duration_children.get(key)
+   if duration is None:
+      duration = _duration_children[key] = HTTP_REQUEST_DURATION.labels(request.method, route, str(response.status_code))
+   duration.observe(time.perf_counter() - started)
+   checkouts = _checkouts_children.get(key[:2])
+   if checkouts is None:
+      checkouts = _checkouts_children[key[:2]] = HTTP_REQUEST_CHECKOUTS.labels(request.method, route)
+   checkouts.observe(dbm.reset_checkouts())
+   return response
+
+@metrics_api.teardown_app_request
+def end_request_metrics(error) -> None:
+   """
+   Marks the request as served, whether or not it raised.
+   """
+   HTTP_REQUESTS_IN_PROGRESS.labels(request.method).dec()
+
+@metrics_api.route('/metrics', methods=['GET'])
+def metrics_route() -> Response:
+   """
+   Returns the metrics of the app in the Prometheus text format.
+   With several worker processes (PROMETHEUS_MULTIPROC_DIR set), the metrics of every worker are aggregated.
+
+   Returns:
+      Response: The metrics, with a 200 status code.
+   """
+   if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+      from prometheus_client import multiprocess
+      registry = CollectorRegistry()
+      multiprocess.MultiProcessCollector(registry)
+   else:
+      registry = REGISTRY
+   return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
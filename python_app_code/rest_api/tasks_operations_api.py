@@ -1,13 +1,23 @@
-from flask import request, Blueprint, jsonify
-from database_operations import db_task_actions as dba
-from rest_api import api_operations_utils as aou
+import csv
+import io
+import itertools
+import json
+from dataclasses import asdict
+from werkzeug.http import quote_etag
+from flask import request, Blueprint, jsonify, Response, stream_with_context
+from database_operations import db_config as dbc, db_task_actions as dba
+from rest_api import api_admission, api_operations_utils as aou
 
 # This script defines the REST API endpoints for the operations that can be done on the Task table
 
-tasks_api = Blueprint('tasks_api', __name__)
+# The requests are admitted under the limits of api_admission, as they query the database
+tasks_api = api_admission.guard(Blueprint('tasks_api', __name__))
 utils = aou.api_operations_utils()
 
-@tasks_api.route('/tasks', methods=['GET', 'POST'])
+# Number of exported rows written to the response at a time
+EXPORT_CHUNK_ROWS = 500
+
+@tasks_api.route('/tasks', methods=['GET', 'POST', 'PATCH'])
 @tasks_api.route('/tasks/<task_id>', methods=['GET', 'PUT', 'DELETE'])
 def list_tasks_route(task_id: int = None) -> jsonify:
    """
@@ -30,6 +40,8 @@ def list_tasks_route(task_id: int = None) -> jsonify:
          return get_task(task_id)
    elif request.method == "POST":
       return add_task(request)
+   elif request.method == "PATCH":
+      return update_tasks_status(request)
    elif request.method == "DELETE":
       if task_id is None:
          return jsonify({'error': 'Parameter "task-id" in "/tasks/<task-id>/" must be given to delete a task.'}), 400
@@ -41,39 +53,212 @@ def list_tasks_route(task_id: int = None) -> jsonify:
       else:
          return update_task(task_id, request)
    
+@tasks_api.route('/tasks/export', methods=['GET'])
+def export_tasks_route() -> Response:
+   """
+   Route handler for exporting every task, streamed to the client as NDJSON or CSV.
+
+   Query string parameters:
+      format: 'ndjson' (one JSON object per line, the default) or 'csv'.
+      include_due_by: 'true' to add the active due date of each task.
+      task_status, created_from, created_to, exclude_removed: The same filters as the task listing.
+
+   Returns:
+      Response: A streamed response containing the result of the operation with the following status codes:
+         200: The exported tasks, sorted by ID.
+         400: If a query string parameter is invalid, the function returns an error message.
+         500: If an exception occurs during the database operation, the function returns an error message.
+   """
+   export_format = request.args.get("format", "ndjson").lower()
+   if export_format not in ("ndjson", "csv"):
+      return jsonify({'error': 'Parameter "format" must be either "ndjson" or "csv".'}), 400
+   include_due_by = request.args.get("include_due_by", "false").lower()
+   if include_due_by not in ("true", "false"):
+      return jsonify({'error': 'Parameter "include_due_by" must be either "true" or "false".'}), 400
+   include_due_by = include_due_by == "true"
+   args, error = utils.parse_task_list_args({key: value for key, value in request.args.items()
+                                             if key not in ("limit", "after_id")})
+   if error is not None:
+      return jsonify({'error': error}), 400
+
+   columns = dba.EXPORT_COLUMNS_WITH_DUE_BY if include_due_by else dba.EXPORT_COLUMNS
+   try:
+      rows = dba.export_tasks(include_due_by, args["task_status"], args["created_from"],
+                              args["created_to"], args["exclude_removed"])
+      # Fetch the first row now so that connection and query errors are still reported with a 500 status
+      first_row = next(rows, None)
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
+   if first_row is not None:
+      rows = itertools.chain((first_row,), rows)
+
+   if export_format == "csv":
+      body = generate_csv_export(columns, rows)
+      response = Response(stream_with_context(body), mimetype='text/csv')
+   else:
+      body = generate_ndjson_export(columns, rows)
+      response = Response(stream_with_context(body), mimetype='application/x-ndjson')
+   response.headers["Content-Disposition"] = 'attachment; filename=tasks.{}'.format(export_format)
+   return response
+
+@tasks_api.route('/tasks/search', methods=['GET'])
+def search_tasks_route() -> jsonify:
+   """
+   Route handler for searching tasks by keyword, in their name and description, the most relevant first.
+
+   Every word of 'q' must start a word of the task, and, unless 'fuzzy' is disabled in the [search] section of the
+   configuration, tasks whose name is similar to 'q' (e.g. with a typo) are found too. Each task comes with its 'rank'.
+   One page of tasks is returned along with 'next_after', the value of 'after' to request the next page (null on
+   the last page). Only the 'max_candidates' newest matching tasks, set in the [search] section, are ranked: 'truncated'
+   tells whether the others were left out, as happens with very common words.
+
+   Query string parameters:
+      q: The searched text.
+      limit, after: The size of the page and the 'rank,id' of the last task of the previous page.
+      task_status, exclude_removed: The same filters as the task listing.
+
+   Returns:
+      jsonify: A JSON response containing the result of the operation with the following status codes:
+         200: The page of matching tasks, possibly empty.
+         400: If a query string parameter is invalid, the function returns an error message.
+         500: If an exception occurs during the database operation, the function returns an error message.
+   """
+   args, error = utils.parse_task_search_args(request.args)
+   if error is not None:
+      return jsonify({'error': error}), 400
+   search_config = dbc.get_config().section('search')
+   fuzzy = search_config.get('fuzzy', 'true').lower() == 'true'
+   max_candidates = int(search_config.get('max_candidates', 2000)) or None
+   try:
+      # One extra task is fetched to know whether there is a next page
+      tasks, truncated = dba.search_tasks(args["terms"], args["limit"] + 1, args["after"], args["task_status"],
+                                          args["exclude_removed"], fuzzy, max_candidates)
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
+   next_after = None
+   if len(tasks) > args["limit"]:
+      tasks = tasks[:args["limit"]]
+      next_after = '{0!r},{1}'.format(tasks[-1].rank, tasks[-1].id)
+   return jsonify({"tasks": tasks, "next_after": next_after, "truncated": truncated}), 200
+
+def generate_ndjson_export(columns: tuple, rows) -> str:
+   """
+   Serializes exported rows as NDJSON, EXPORT_CHUNK_ROWS rows at a time.
+
+   Args:
+      columns (tuple): The names of the columns of the rows.
+      rows (Iterator[tuple]): The exported rows.
+
+   Yields:
+      str: A chunk of the response body.
+   """
+   while True:
+      chunk = [json.dumps(dict(zip(columns, row)), default=str) + '\n' for row in itertools.islice(rows, EXPORT_CHUNK_ROWS)]
+      if not chunk:
+         return
+      yield ''.join(chunk)
+
+def generate_csv_export(columns: tuple, rows) -> str:
+   """
+   Serializes exported rows as CSV with a header line, EXPORT_CHUNK_ROWS rows at a time.
+
+   Args:
+      columns (tuple): The names of the columns of the rows.
+      rows (Iterator[tuple]): The exported rows.
+
+   Yields:
+      str: A chunk of the response body.
+   """
+   buffer = io.StringIO()
+   writer = csv.writer(buffer)
+   writer.writerow(columns)
+   while True:
+      chunk = list(itertools.islice(rows, EXPORT_CHUNK_ROWS))
+      writer.writerows(chunk)
+      if buffer.tell():
+         yield buffer.getvalue()
+         buffer.seek(0)
+         buffer.truncate(0)
+      if not chunk:
+         return
+
 def list_tasks() -> jsonify:
    """
-   Retrieves a list of all tasks from the database.
+   Retrieves a list of tasks from the database, filtered by the query string parameters.
+
+   Without 'limit' nor 'after_id' parameters every matching task is returned as a list. Otherwise one page of tasks
+   is returned along with 'next_after_id', the value of 'after_id' to request the next page (null on the last page).
+   With 'include=due_by' (or 'include=active_due_by') the due dates of each task are embedded, read by the same query.
+   The response has an ETag for conditional requests, built from a version read in the same transaction as the tasks:
+   a digest of the row versions of a page, or the number and the greatest row version of the tasks of the whole list.
 
    Returns:
       jsonify: A JSON response containing the result of the operation with the following status codes:
          200: If the tasks are found in the database, the function returns the response from the database.
+         304: If the request's 'If-None-Match' header matches the current ETag, the body is then empty.
+         400: If a query string parameter is invalid, the function returns an error message.
          500: If an exception occurs during the database operation, the function returns an error message.
    """
+   args, error = utils.parse_task_list_args(request.args)
+   if error is not None:
+      return jsonify({'error': error}), 400
    try:
-      return jsonify(dba.get_all_tasks()), 200
+      # One extra task of a page is fetched to know whether there is a next page. The tasks aren't read if the
+      # client has them.
+      version, tasks = dba.get_versioned_tasks(args["limit"] + 1 if args["paginated"] else None, args["after_id"],
+                                               args["task_status"], args["created_from"], args["created_to"],
+                                               args["exclude_removed"], args["include"],
+                                               unchanged=lambda version: utils.has_version(request, version))
+      etag = utils.make_etag(request, version)
+      if tasks is None:
+         return utils.not_modified_response(request, etag)
+      if not args["paginated"]:
+         return jsonify(tasks), 200, {"ETag": quote_etag(etag)}
+      next_after_id = None
+      if len(tasks) > args["limit"]:
+         tasks = tasks[:args["limit"]]
+         next_after_id = tasks[-1].id
+      return jsonify({"tasks": tasks, "next_after_id": next_after_id}), 200, {"ETag": quote_etag(etag)}
    except Exception as e:
       return jsonify({'error': str(e)}), 500
 
 def get_task(id: str) -> jsonify:
    """
    Retrieve a task by its ID.
+   With 'include=due_by' (or 'include=active_due_by') the due dates of the task are embedded, read by the same query.
 
    Args:
        id (str): The ID of the task to retrieve.
 
    Returns:
        jsonify: A JSON response containing the result of the operation with the following status codes:
-         200: If the task is found in the database, the function returns the response from the database.
+         200: If the task is found in the database, the function returns the response from the database along with
+              an ETag built from the task's row version.
+         304: If the request's 'If-None-Match' header matches the current ETag, the body is then empty.
+         400: If the 'include' parameter is invalid, the function returns an error message.
          404: If the task is not found, the function returns a not-found error message.
          500: If an exception occurs during the database operation, the function returns an error message.
    """
+   include, error = utils.parse_include_arg(request.args)
+   if error is not None:
+      return jsonify({'error': error}), 400
    try:
-      db_response = dba.get_a_task(id)
+      # The current version is only read for a conditional request: the others are served from the cache
+      if request.if_none_match:
+         version = dba.get_task_version(id, include)
+         if version is None:
+            return jsonify({'error': 'Task with id {} not found'.format(id)}), 404
+         etag = utils.make_etag(request, version)
+         not_modified = utils.not_modified_response(request, etag)
+         if not_modified is not None:
+            return not_modified
+
+      # The ETag comes from the version read along with the body, which may differ from the one checked above
+      version, db_response = dba.get_versioned_task(id, include)
       if db_response is None or len(db_response) == 0:
          return jsonify({'error': 'Task with id {} not found'.format(id)}), 404
       else:
-         return db_response
+         return db_response, 200, {"ETag": quote_etag(utils.make_etag(request, version))}
    except Exception as e:
       return jsonify({'error': str(e)}), 500
    
@@ -91,21 +276,85 @@ def add_task(received_request: request) -> jsonify:
          400: If the task has an invalid format, the function returns an error message.
          500: If an exception occurs during the database operation, the function returns an error message.
    """
-   tmp = utils.validate_json(received_request)
-   if tmp[1] == 200:
-      new_task = utils.parse_received_request(received_request.get_json())
-      if new_task["due_date"] is not None:
-         if not utils.validate_due_date_json(received_request):
-            return jsonify({"error": "A Due Date must have a valid 'due_date' with the 'YYYY-MM-DD' format."}), 400
-      try:
-         response = dba.insert_into_task_table(new_task["task_name"], new_task["task_descrip"], 
-                              new_task["creation_date"], new_task["task_status"], new_task["due_date"])
-         return jsonify({"new_task_id": response}), 201
-      except Exception as e:
-         return jsonify({'error': str(e)}), 500
-     
-   else:
-      return tmp[0], tmp[1]
+   new_task, error = utils.read_task_request(received_request)
+   if error is not None:
+      return jsonify({'error': error}), 400
+   try:
+      response = dba.insert_into_task_table(new_task.task_name, new_task.task_descrip,
+                                            new_task.creation_date, new_task.task_status, new_task.due_date)
+      return jsonify({"new_task_id": response}), 201
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
+
+@tasks_api.route('/tasks/batch', methods=['POST'])
+def add_tasks_batch_route() -> jsonify:
+   """
+   Adds several new tasks at once. The request body must be a JSON array of tasks, each one following the same
+   format as the body of 'POST /tasks'. The tasks are only inserted if all of them are valid, in a single transaction.
+   The maximum number of tasks per request is set by 'max_batch_size' in the [api] section of the configuration.
+
+   Returns:
+      jsonify: A JSON response containing the result of the operation with the following status codes:
+         201: If the tasks are successfully added, the function returns their IDs in the same order as in the request.
+         400: If the body isn't a non-empty JSON array or if any task is invalid, the function returns an error message
+              along with the index and error of each invalid task.
+         413: If there are more tasks than the maximum batch size.
+         500: If an exception occurs during the database operation, the function returns an error message.
+   """
+   new_tasks = request.get_json(silent=True)
+   if not isinstance(new_tasks, list) or len(new_tasks) == 0:
+      return jsonify({"error": "The request body must be a non-empty JSON array of tasks."}), 400
+   max_batch_size = int(dbc.get_config().section('api').get('max_batch_size', 1000))
+   if len(new_tasks) > max_batch_size:
+      return jsonify({"error": "A batch can contain at most {} tasks.".format(max_batch_size)}), 413
+
+   tasks = []
+   errors = []
+   for index, new_task in enumerate(new_tasks):
+      task, error = utils.parse_task_body(new_task)
+      if error is not None:
+         errors.append({"index": index, "error": error})
+      else:
+         tasks.append(asdict(task))
+   if errors:
+      return jsonify({"error": "Invalid tasks, none was added.", "errors": errors}), 400
+
+   try:
+      response = dba.insert_tasks_batch(tasks)
+      return jsonify({"new_task_ids": response}), 201
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
+
+def update_tasks_status(received_request: request) -> jsonify:
+   """
+   Changes the status of several tasks at once, e.g. to mark them 'Done' or 'Deleted'. The request body must be a JSON
+   object with the 'ids' of the tasks and their new 'task_status'. The maximum number of ids per request is set by
+   'max_status_change_size' in the [api] section of the configuration.
+   Unlike PUT /tasks/<id>, which always writes the task, the tasks that already have the new status are skipped:
+   they aren't written, so their version (and ETag) doesn't change, and they are listed as 'skipped'.
+
+   Args:
+      received_request (request): The request object containing the ids and the new status.
+
+   Returns:
+      jsonify: A JSON response containing the result of the operation with the following status codes:
+         200: The ids of the tasks that were updated ('updated'), that were skipped as they already had the status
+              ('skipped') and that don't exist ('missing').
+         400: If the body isn't a valid status change, the function returns an error message.
+         413: If there are more ids than the maximum.
+         500: If an exception occurs during the database operation, the function returns an error message.
+   """
+   status_change, error = utils.read_status_change_request(received_request)
+   if error is not None:
+      return jsonify({'error': error}), 400
+   max_size = int(dbc.get_config().section('api').get('max_status_change_size', 10000))
+   if len(status_change.ids) > max_size:
+      return jsonify({"error": "A status change can contain at most {} ids.".format(max_size)}), 413
+   try:
+      updated, skipped, missing = dba.update_tasks_status(status_change.ids, status_change.task_status)
+      return jsonify({"updated": updated, "skipped": skipped, "missing": missing}), 200
+   except Exception as e:
+      return jsonify({'error': str(e)}), 500
 
 def update_task(task_id: int, received_request: request) -> jsonify:
    """
@@ -124,25 +373,18 @@ def update_task(task_id: int, received_request: request) -> jsonify:
 
    """
    id = int(task_id)
+   update_task, error = utils.read_task_request(received_request, is_new=False)
+   if error is not None:
+      return jsonify({'error': error}), 400
    try:
-      task = dba.get_a_task(id)
-      if task is None or len(task) == 0:
+      # The task's existence is checked by the update itself
+      found = dba.update_task(id, update_task.task_name, update_task.task_descrip,
+                              update_task.creation_date, update_task.task_status, update_task.due_date)
+      if not found:
          return jsonify({'error': 'Task with id {} not found'.format(id)}), 404
-      else:
-         tmp = utils.validate_json(received_request, False)
-         if tmp[1] == 200:
-            update_task = utils.parse_received_request(received_request.get_json())
-            if update_task["due_date"] is not None:
-               if not utils.validate_due_date_json(received_request):
-                  return jsonify({"error": "A Due Date must have a valid 'due_date' with the 'YYYY-MM-DD' format."}), 400
-            response = dba.update_task(id, update_task["task_name"], update_task["task_descrip"], 
-                                 update_task["creation_date"], update_task["task_status"], update_task["due_date"])
-            if response is None:
-               return '', 204
-            else:
-               return jsonify({"error": str(response)}), 400
-         else:
-            return tmp[0], tmp[1]
+      return '', 204
+   except ValueError as e:
+      return jsonify({"error": str(e)}), 400
    except Exception as e:
       return jsonify({'error': str(e)}), 500
 
@@ -160,10 +402,8 @@ def delete_task(task_id: int) -> jsonify:
          500: If an exception occurs during the database operation, the function returns an error message.
    """
    try:
-     task = dba.get_a_task(task_id)
-     if task is None or len(task) == 0:
+     if not dba.delete_task(task_id):
        return jsonify({'error': 'Task with id {} not found'.format(task_id)}), 404
-     dba.delete_task(task_id)
      return '', 204
    except Exception as e:
      return jsonify({'error': str(e)}), 500
@@ -0,0 +1,96 @@
+# This File contains a side-by-side benchmark of the synchronous (Flask) and asyncio (ASGI) variants of the app.
+# Both apps must be running against the same database, e.g. with `docker compose --profile async up`, then launch
+# `python3 -m testing.async_benchmark --sync-url http://127.0.0.1:5001 --async-url http://127.0.0.1:5003`
+# It requires the optional 'httpx' package (see requirements-async.txt).
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+DEFAULT_CONCURRENCY = (1, 16, 64, 256)
+REQUESTS_PER_LEVEL = 2000
+
+async def create_tasks(client: httpx.AsyncClient, base_url: str, count: int = 20) -> list:
+    response = await client.post(base_url + '/tasks/batch',
+                                 json=[{"task_name": "benchmark task {}".format(i), "due_date": "2030-01-01"}
+                                       for i in range(count)])
+    response.raise_for_status()
+    return response.json()["new_task_ids"]
+
+def request_mix(task_ids: list, total: int) -> list:
+    # Read-mostly mix of the API's endpoints, on tasks created by the benchmark itself
+    paths = []
+    for i in range(total):
+        task_id = task_ids[i % len(task_ids)]
+        if i % 10 < 6:
+            paths.append('/tasks/{}'.format(task_id))
+        elif i % 10 < 9:
+            paths.append('/tasks/{}/due-by'.format(task_id))
+        else:
+            paths.append('/tasks?limit=50')
+    return paths
+
+async def run_level(client: httpx.AsyncClient, base_url: str, paths: list, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    queue = iter(paths)
+
+    async def worker():
+        nonlocal errors
+        for path in queue:
+            started = time.perf_counter()
+            try:
+                response = await client.get(base_url + path)
+                if response.status_code >= 500:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {"concurrency": concurrency,
+            "requests_per_second": len(paths) / elapsed,
+            "p50_ms": statistics.median(latencies) * 1000,
+            "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+            "errors": errors}
+
+async def benchmark(name: str, base_url: str, levels: tuple, total: int) -> list:
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        task_ids = await create_tasks(client, base_url)
+        paths = request_mix(task_ids, total)
+        # Warm the connection pools up before measuring
+        await run_level(client, base_url, paths[:100], 8)
+        results = []
+        for concurrency in levels:
+            result = await run_level(client, base_url, paths, concurrency)
+            result["app"] = name
+            results.append(result)
+        return results
+
+def print_results(results: list) -> None:
+    print("{:<6} {:>11} {:>10} {:>9} {:>9} {:>7}".format("app", "concurrency", "req/s", "p50 ms", "p99 ms", "errors"))
+    for result in results:
+        print("{app:<6} {concurrency:>11} {requests_per_second:>10.1f} {p50_ms:>9.1f} {p99_ms:>9.1f} {errors:>7}".format(**result))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compares the throughput of the sync and async apps.')
+    parser.add_argument('--sync-url', default='http://127.0.0.1:5001')
+    parser.add_argument('--async-url', default='http://127.0.0.1:5003')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=list(DEFAULT_CONCURRENCY))
+    parser.add_argument('--requests', type=int, default=REQUESTS_PER_LEVEL)
+    args = parser.parse_args()
+
+    results = []
+    for name, base_url in (('sync', args.sync_url), ('async', args.async_url)):
+        print("Benchmarking the {} app at {}".format(name, base_url))
+        results.extend(asyncio.run(benchmark(name, base_url, tuple(args.concurrency), args.requests)))
+    print_results(sorted(results, key=lambda result: (result["concurrency"], result["app"])))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# This File contains Integration Tests (ITs) for the shared backend of the read-through cache (RedisCacheBackend of
+# db_cache), run against an in-process stand-in of the Redis client so that neither a Redis server nor the 'redis'
+# package is needed. It doesn't need the database.
+# As with the other ITs, PyUnit wasn't implemented, the test is launched manually and fails with an AssertionError.
+import fnmatch
+import pickle
+from datetime import date
+from database_operations import db_cache as dbch, db_models as dbmo
+
+class StandInRedis:
+    """
+    In-process stand-in of a Redis client, implementing the commands used by RedisCacheBackend: get(), setex(),
+    delete() and scan_iter(). Keys expire according to a clock advanced by the test, and values are kept as the bytes
+    they were given, like a server does.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.entries = {}
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+    def _expire(self) -> None:
+        for key in [key for key, (_, expires_at) in self.entries.items() if expires_at <= self.now]:
+            del self.entries[key]
+
+    def get(self, key: str):
+        self._expire()
+        entry = self.entries.get(key)
+        return None if entry is None else entry[0]
+
+    def setex(self, key: str, seconds: int, value: bytes) -> bool:
+        assert isinstance(seconds, int) and seconds >= 1, 'Redis only accepts a positive number of seconds'
+        assert isinstance(value, bytes), 'Redis only stores bytes'
+        self.entries[key] = (value, self.now + seconds)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        assert keys, 'Redis rejects a DEL without keys'
+        return sum(self.entries.pop(key, None) is not None for key in keys)
+
+    def scan_iter(self, match: str = '*'):
+        self._expire()
+        return iter([key for key in self.entries if fnmatch.fnmatchcase(key, match)])
+
+class FailingRedis:
+    """
+    Stand-in of an unreachable Redis server.
+    """
+
+    def __getattr__(self, name: str):
+        def fail(*args, **kwargs):
+            raise ConnectionError('Redis is unreachable')
+        return fail
+
+def make_task(task_id: int) -> dbmo.Task:
+    return dbmo.Task(date(2024, 3, 1), task_id, 'cached task', 'cached task {}'.format(task_id), 'Created')
+
+def backend_test() -> None:
+    client = StandInRedis()
+    backend = dbch.RedisCacheBackend(client=client, prefix='it:')
+    task = make_task(1)
+
+    assert backend.get('task:1') == (False, None), 'A missing key must not be found'
+    backend.set('task:1', task, 60)
+    assert list(client.entries) == ['it:task:1'], 'The key must be stored with the prefix: {}'.format(list(client.entries))
+    assert pickle.loads(client.entries['it:task:1'][0]) == task, 'The value must be stored pickled'
+    found, value = backend.get('task:1')
+    assert found and value == task and value is not task, 'The value must be read back unpickled: {}'.format(value)
+    print('get/set: the values are pickled under the prefixed keys.')
+
+    backend.set('task:2', make_task(2), 60)
+    client.setex('other:task:1', 60, b'kept')
+    backend.delete(['task:1', 'task:404'])
+    backend.delete([])
+    assert backend.get('task:1') == (False, None) and backend.get('task:2')[0], 'Only the given keys must be deleted'
+    backend.clear()
+    assert list(client.entries) == ['other:task:1'], 'clear() must only remove the prefixed keys: {}'.format(
+        list(client.entries))
+    print('delete/clear: only the given keys, then only the prefixed keys, are removed.')
+
+    # Redis expires keys by the second: a shorter time to live is rounded up rather than making the key permanent
+    backend.set('task:1', task, 0.2)
+    assert client.entries['it:task:1'][1] == client.now + 1, 'A time to live below a second must be rounded up'
+    backend.set('task:2', task, 60)
+    client.advance(1)
+    assert backend.get('task:1') == (False, None), 'The key must have expired'
+    assert backend.get('task:2')[0], 'The key must not have expired yet'
+    client.advance(59)
+    assert backend.get('task:2') == (False, None), 'The key must have expired'
+    print('expiry: the keys expire after their time to live, rounded up to a second.')
+
+def shared_cache_test() -> None:
+    # Two caches sharing the backend, as two worker processes of the app do
+    client = StandInRedis()
+    first = dbch.Cache(dbch.RedisCacheBackend(client=client, prefix='it:'), ttl=60)
+    second = dbch.Cache(dbch.RedisCacheBackend(client=client, prefix='it:'), ttl=60)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return [make_task(1)]
+
+    assert first.get_or_load(dbch.task_key(1), loader) == [make_task(1)]
+    assert second.get_or_load(dbch.task_key(1), loader) == [make_task(1)]
+    assert len(loads) == 1, 'The value loaded by one process must be served to the other one'
+    second.invalidate(*dbch.task_keys(1))
+    first.get_or_load(dbch.task_key(1), loader)
+    assert len(loads) == 2, 'An invalidation by one process must reach the other one'
+    assert first.stats()["hits"] == 0 and second.stats()["hits"] == 1, 'Unexpected counters'
+    print('shared cache: the values and the invalidations are shared by the processes.')
+
+def unavailable_backend_test() -> None:
+    cache = dbch.Cache(dbch.RedisCacheBackend(client=FailingRedis(), prefix='it:'), ttl=60)
+    assert cache.get_or_load(dbch.task_key(1), lambda: [make_task(1)]) == [make_task(1)]
+    cache.invalidate(dbch.task_key(1))
+    assert cache.stats()["errors"] == 3, 'The backend errors must be counted: {}'.format(cache.stats())
+    print('unavailable backend: the lookups go to the database and the errors are counted.')
+
+def cache_testing_console():
+    print("I'll check the shared cache backend against a stand-in Redis client:")
+    backend_test()
+    shared_cache_test()
+    unavailable_backend_test()
@@ -0,0 +1,56 @@
+# This File contains Integration Tests (ITs) for the configuration subsystem, run against the postgres database.
+# As with the other ITs, PyUnit wasn't implemented, the test is launched manually and fails with an AssertionError.
+import sys
+from flask import Flask
+from database_operations import db_config as dbc
+from rest_api import tasks_operations_api, due_by_operations_api
+
+# Paths opened by the process while the audit hook is recording
+opened_files = []
+recording = False
+
+def record_open_events(event: str, args: tuple) -> None:
+    if recording and event == 'open':
+        opened_files.append(args[0])
+
+def no_filesystem_access_per_request_test(number_of_requests: int = 20) -> None:
+    """
+    Checks that once the app has started, serving requests doesn't read any file: the configuration
+    (database.ini and its environment variable overrides) must only be read at startup or on reload.
+    """
+    global recording
+    app = Flask(__name__)
+    app.register_blueprint(tasks_operations_api.tasks_api)
+    app.register_blueprint(due_by_operations_api.due_by_api)
+    client = app.test_client()
+
+    # Startup: the configuration is read and the first connections are opened
+    dbc.get_config()
+    client.get('/tasks')
+    client.get('/tasks/1/due-by')
+
+    sys.addaudithook(record_open_events)
+    recording = True
+    try:
+        for _ in range(number_of_requests):
+            client.get('/tasks')
+            client.get('/tasks/1')
+            client.get('/tasks/1/due-by')
+    finally:
+        recording = False
+
+    assert not opened_files, 'Files opened while serving requests: {}'.format(opened_files)
+    print('No filesystem access over {} requests.'.format(3 * number_of_requests))
+
+    # A reload reads the file again, and only then
+    recording = True
+    try:
+        dbc.reload_config()
+    finally:
+        recording = False
+    assert dbc.get_config().filename in opened_files, 'The configuration file was not read on reload'
+    print('The configuration file is only read on reload.')
+
+def config_testing_console():
+    print("I'll check that no file is read while serving requests:")
+    no_filesystem_access_per_request_test()
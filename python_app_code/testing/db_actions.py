@@ -48,7 +48,7 @@ def get_today_date(format = '%Y-%m-%d') -> str:
 def print_all_tasks():
     """ Retrieve all data from the Tasks table and prints them """
 
-    selec_query = 'SELECT * FROM app."Task"'
+    selec_query = 'SELECT id, task_name, task_descrip, creation_date, task_status FROM app."Task"'
     config  = dbc.load_config()
     try:
         with psycopg2.connect(**config) as conn:
@@ -0,0 +1,249 @@
+# This File contains the benchmark suite of the REST API and of the database layer, run against the postgres database.
+# Every route of tasks_api and due_by_api is driven through Flask's test client, and the hot functions of
+# db_task_actions and db_due_by_actions are called directly. For each case the suite records the latency percentiles,
+# the throughput and the number of pooled connections and of statements (round trips) per call.
+#
+# Launch it with `docker exec virtualization-level-1-prototype-app-python-1 python3 -m testing.endpoint_benchmarks`
+# (`--help` lists the options). The results are written as JSON with '--output'. Given a previous result file with
+# '--baseline', the suite exits with status 1 if a case got slower than its baseline (beyond '--tolerance') or
+# issues more statements or connections per call than its budget.
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import date, timedelta
+import psycopg2.extensions
+from flask import Flask
+from database_operations import db_cache as dbch, db_config as dbc, db_pool as dbp
+from database_operations import db_due_by_actions as dbdba, db_task_actions as dbta
+from rest_api import tasks_operations_api, due_by_operations_api
+
+# Statements executed through the instrumented connections, since the suite started
+statement_count = 0
+_counting_cursor_classes = {}
+
+def counting_cursor_class(cursor_factory: type) -> type:
+    """
+    Returns a subclass of the given cursor class counting its executed statements.
+    """
+    if cursor_factory not in _counting_cursor_classes:
+        class CountingCursor(cursor_factory):
+            def execute(self, query, vars=None):
+                global statement_count
+                statement_count += 1
+                return super().execute(query, vars)
+
+            def executemany(self, query, vars_list):
+                global statement_count
+                statement_count += 1
+                return super().executemany(query, vars_list)
+
+        _counting_cursor_classes[cursor_factory] = CountingCursor
+    return _counting_cursor_classes[cursor_factory]
+
+class CountingConnection(dbp.PooledConnection):
+    """
+    Pooled connection whose cursors count their executed statements.
+    """
+
+    def cursor(self, *args, **kwargs):
+        cursor_factory = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs['cursor_factory'] = counting_cursor_class(cursor_factory)
+        return super().cursor(*args, **kwargs)
+
+def install_counting_pool() -> None:
+    """
+    Replaces the process-wide pool with one opening instrumented connections.
+    """
+    config = dbc.get_config()
+    pool_config = config.section('pool')
+    dbp.close_pool()
+    with dbp._pool_lock:
+        dbp._pool = dbp.ConnectionPool(config.dsn,
+                                       min_size=int(pool_config.get("min_size", 1)),
+                                       max_size=int(pool_config.get("max_size", 10)),
+                                       timeout=float(pool_config.get("checkout_timeout", 5)),
+                                       ping_after=float(pool_config.get("ping_after", 30)),
+                                       connection_factory=CountingConnection)
+
+class BenchmarkCase:
+    """
+    One benchmarked operation along with its budgets of statements and connections per call.
+    """
+
+    def __init__(self, name: str, operation, max_statements: int, max_connections: int, expected_status: int = None) -> None:
+        """
+        Args:
+            name (str): The name of the case, e.g. 'GET /tasks/<id>'.
+            operation: Called with the iteration number, returns the response of a route (or anything for the DB layer).
+            max_statements (int): The maximum number of statements per call.
+            max_connections (int): The maximum number of pooled connections checked out per call.
+            expected_status (int, optional): The status code every response must have, for routes. Defaults to None.
+        """
+        self.name = name
+        self.operation = operation
+        self.max_statements = max_statements
+        self.max_connections = max_connections
+        self.expected_status = expected_status
+
+    def run(self, iterations: int) -> dict:
+        pool = dbp.get_pool()
+        latencies = []
+        statements = 0
+        unexpected = 0
+        checkouts_before = pool.stats()["checkouts"]
+        opened_before = pool.stats()["connections_opened"]
+        started = time.perf_counter()
+        for i in range(iterations):
+            statements_before = statement_count
+            call_started = time.perf_counter()
+            result = self.operation(i)
+            latencies.append(time.perf_counter() - call_started)
+            statements += statement_count - statements_before
+            if self.expected_status is not None and result.status_code != self.expected_status:
+                unexpected += 1
+        elapsed = time.perf_counter() - started
+        stats = pool.stats()
+        latencies.sort()
+        return {"iterations": iterations,
+                "throughput_per_second": iterations / elapsed,
+                "p50_ms": percentile(latencies, 50) * 1000,
+                "p95_ms": percentile(latencies, 95) * 1000,
+                "p99_ms": percentile(latencies, 99) * 1000,
+                "statements_per_call": statements / iterations,
+                "connections_per_call": (stats["checkouts"] - checkouts_before) / iterations,
+                "connections_opened": stats["connections_opened"] - opened_before,
+                "unexpected_status": unexpected,
+                "max_statements": self.max_statements,
+                "max_connections": self.max_connections}
+
+def percentile(sorted_values: list, rank: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, int(round(rank / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def build_cases(iterations: int) -> list:
+    app = Flask(__name__)
+    app.register_blueprint(tasks_operations_api.tasks_api)
+    app.register_blueprint(due_by_operations_api.due_by_api)
+    client = app.test_client()
+
+    # Tasks used by the read cases and consumed by the write cases, so that every call succeeds
+    read_ids = dbta.insert_tasks_batch([{"task_name": "bench {}".format(i), "due_date": "2030-01-01"} for i in range(100)])
+    write_ids = dbta.insert_tasks_batch([{"task_name": "bench w{}".format(i)} for i in range(iterations)])
+    delete_ids = dbta.insert_tasks_batch([{"task_name": "bench d{}".format(i)} for i in range(iterations)])
+    status_ids = dbta.insert_tasks_batch([{"task_name": "bench s{}".format(i)} for i in range(50)])
+    first_day = date(2031, 1, 1)
+
+    def read_id(i: int) -> int:
+        return read_ids[i % len(read_ids)]
+
+    def new_due_date(i: int) -> str:
+        return (first_day + timedelta(days=i)).isoformat()
+
+    def read_body(response):
+        # A streamed body is only produced, and its connection released, while it is read
+        response.get_data()
+        response.close()
+        return response
+
+    return [
+        # A page is read with its version in one transaction, whose isolation level is set by the first statement
+        BenchmarkCase('GET /tasks?limit=100', lambda i: client.get('/tasks?limit=100'), 3, 1, 200),
+        BenchmarkCase('GET /tasks?limit=100&include=due_by', lambda i: client.get('/tasks?limit=100&include=due_by'), 3, 1, 200),
+        BenchmarkCase('GET /tasks/<id>', lambda i: client.get('/tasks/{}'.format(read_id(i))), 1, 1, 200),
+        BenchmarkCase('GET /tasks/<id>?include=due_by', lambda i: client.get('/tasks/{}?include=due_by'.format(read_id(i))), 1, 1, 200),
+        BenchmarkCase('POST /tasks', lambda i: client.post('/tasks', json={"task_name": "bench p{}".format(i), "due_date": "2030-01-01"}),
+                      2, 1, 201),
+        BenchmarkCase('POST /tasks/batch', lambda i: client.post('/tasks/batch', json=[{"task_name": "bench b{}".format(j), "due_date": "2030-01-01"}
+                                                                                  for j in range(50)]), 2, 1, 201),
+        BenchmarkCase('PUT /tasks/<id>', lambda i: client.put('/tasks/{}'.format(write_ids[i]), json={"task_descrip": "updated {}".format(i)}),
+                      1, 1, 204),
+        BenchmarkCase('DELETE /tasks/<id>', lambda i: client.delete('/tasks/{}'.format(delete_ids[i])), 1, 1, 204),
+        # The status alternates so that every call writes the tasks, none of them being skipped
+        BenchmarkCase('PATCH /tasks', lambda i: client.patch('/tasks', json={"ids": status_ids,
+                                                                            "task_status": ("Done", "Postponed")[i % 2]}),
+                      1, 1, 200),
+        BenchmarkCase('GET /tasks/export', lambda i: read_body(client.get('/tasks/export?include_due_by=true')), 1, 1, 200),
+        BenchmarkCase('GET /tasks/search', lambda i: client.get('/tasks/search?q=bench'), 1, 1, 200),
+        BenchmarkCase('GET /tasks/<id>/due-by', lambda i: client.get('/tasks/{}/due-by'.format(read_id(i))), 1, 1, 200),
+        BenchmarkCase('POST /tasks/<id>/due-by', lambda i: client.post('/tasks/{}/due-by'.format(write_ids[i]), json={"due_date": new_due_date(i)}),
+                      1, 1, 201),
+        BenchmarkCase('PUT /tasks/<id>/due-by', lambda i: client.put('/tasks/{}/due-by'.format(write_ids[i]), json={"due_date": new_due_date(i)}),
+                      1, 1, 200),
+        BenchmarkCase('GET /due-by', lambda i: client.get('/due-by?from=2030-01-01&to=2030-12-31&limit=100'), 1, 1, 200),
+        BenchmarkCase('GET /due-by/histogram', lambda i: client.get('/due-by/histogram?from=2030-01-01&to=2031-12-31'), 1, 1, 200),
+        BenchmarkCase('db get_tasks', lambda i: dbta.get_tasks(limit=100), 1, 1),
+        BenchmarkCase('db get_a_task', lambda i: dbta.get_a_task(read_id(i)), 1, 1),
+        BenchmarkCase('db get_due_by', lambda i: dbdba.get_due_by(read_id(i)), 1, 1),
+        BenchmarkCase('db get_due_dates_in_range', lambda i: dbdba.get_due_dates_in_range('2030-01-01', '2030-12-31', limit=100), 1, 1),
+    ]
+
+def find_regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, result in results.items():
+        if result["unexpected_status"]:
+            regressions.append("{0}: {1} responses with an unexpected status".format(name, result["unexpected_status"]))
+        if result["statements_per_call"] > result["max_statements"]:
+            regressions.append("{0}: {1:.2f} statements per call, the budget is {2}".format(
+                name, result["statements_per_call"], result["max_statements"]))
+        if result["connections_per_call"] > result["max_connections"]:
+            regressions.append("{0}: {1:.2f} connections per call, the budget is {2}".format(
+                name, result["connections_per_call"], result["max_connections"]))
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if result["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+            regressions.append("{0}: p95 of {1:.2f} ms, the baseline is {2:.2f} ms".format(name, result["p95_ms"], reference["p95_ms"]))
+        if result["statements_per_call"] > reference["statements_per_call"]:
+            regressions.append("{0}: {1:.2f} statements per call, the baseline is {2:.2f}".format(
+                name, result["statements_per_call"], reference["statements_per_call"]))
+    return regressions
+
+def endpoint_benchmarks(iterations: int, output: str = None, baseline_file: str = None,
+                        tolerance: float = 0.25, use_cache: bool = False) -> int:
+    install_counting_pool()
+    if not use_cache:
+        # Without the cache every call reaches the database, which is what the budgets are about
+        dbch.get_cache().enabled = False
+
+    results = {}
+    for case in build_cases(iterations):
+        # Warm-up of the read cases, e.g. to prepare their statements on the pooled connections
+        if case.name.startswith(('GET', 'db')):
+            for i in range(min(5, iterations)):
+                case.operation(i)
+        results[case.name] = case.run(iterations)
+        result = results[case.name]
+        print("{0:<40} {1:>9.1f}/s p50 {2:>7.2f} ms p95 {3:>7.2f} ms p99 {4:>7.2f} ms {5:>5.2f} stmt {6:>5.2f} conn".format(
+            case.name, result["throughput_per_second"], result["p50_ms"], result["p95_ms"], result["p99_ms"],
+            result["statements_per_call"], result["connections_per_call"]))
+
+    document = {"meta": {"python": platform.python_version(), "iterations": iterations, "cache": use_cache,
+                         "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S')},
+                "results": results}
+    if output is not None:
+        with open(output, 'w') as file:
+            json.dump(document, file, indent=2)
+
+    baseline = {}
+    if baseline_file is not None:
+        with open(baseline_file) as file:
+            baseline = json.load(file)["results"]
+    regressions = find_regressions(results, baseline, tolerance)
+    for regression in regressions:
+        print("REGRESSION " + regression)
+    return 1 if regressions else 0
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmarks the REST API routes and the database layer.')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--output', help='File the JSON results are written to.')
+    parser.add_argument('--baseline', help='Results of a previous run to compare with.')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95 slowdown over the baseline (0.25 is 25%%).')
+    parser.add_argument('--cache', action='store_true', help='Keep the read-through cache enabled.')
+    args = parser.parse_args()
+    sys.exit(endpoint_benchmarks(args.iterations, args.output, args.baseline, args.tolerance, args.cache))
+
+if __name__ == "__main__":
+    main()
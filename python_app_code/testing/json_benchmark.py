@@ -0,0 +1,51 @@
+# This File contains a micro-benchmark of the JSON providers of rest_api/api_json_provider.py, serializing task and
+# due date payloads of typical sizes as the routes do (app.json.response()). It doesn't need the database.
+# Launch it with `docker exec virtualization-level-1-prototype-app-python-1 python3 -m testing.json_benchmark`
+import time
+from datetime import date, timedelta
+from flask import Flask
+from rest_api import api_json_provider
+
+PAYLOAD_SIZES = (1, 100, 1000, 10000)
+STATUSES = ('Created', 'Done', 'Deleted', 'Dropped', 'Postponed')
+
+def make_tasks(count: int) -> list:
+    first_day = date(2024, 1, 1)
+    return [{"id": i, "task_name": "task {}".format(i), "task_descrip": "description of the task {}".format(i),
+             "creation_date": first_day + timedelta(days=i % 365), "task_status": STATUSES[i % len(STATUSES)]}
+            for i in range(count)]
+
+def make_due_dates(count: int) -> list:
+    first_day = date(2030, 1, 1)
+    return [{"task_id": 1, "due_date": first_day + timedelta(days=i), "is_active": i == count - 1} for i in range(count)]
+
+def make_app(provider_name: str) -> Flask:
+    app = Flask(__name__)
+    app.json = api_json_provider.JSON_PROVIDERS[provider_name](app)
+    return app
+
+def run(app: Flask, payload, iterations: int) -> float:
+    with app.app_context():
+        started = time.perf_counter()
+        for _ in range(iterations):
+            app.json.response(payload).get_data()
+        return (time.perf_counter() - started) / iterations
+
+def json_benchmark() -> None:
+    apps = {name: make_app(name) for name in api_json_provider.JSON_PROVIDERS}
+    for label, make_payload in (("tasks", make_tasks), ("due dates", make_due_dates)):
+        for size in PAYLOAD_SIZES:
+            payload = make_payload(size)
+            # Every provider must write the same bytes (the payloads are ASCII only)
+            bodies = set()
+            for app in apps.values():
+                with app.app_context():
+                    bodies.add(app.json.response(payload).get_data())
+            iterations = max(5, 20000 // size)
+            timings = {name: run(app, payload, iterations) for name, app in apps.items()}
+            print("{:<10} {:>6} rows  default {:>10.1f} us  orjson {:>10.1f} us  speed-up {:>5.2f}x  {}".format(
+                label, size, timings["default"] * 1e6, timings["orjson"] * 1e6, timings["default"] / timings["orjson"],
+                "identical" if len(bodies) == 1 else "DIFFERENT OUTPUT"))
+
+if __name__ == "__main__":
+    json_benchmark()
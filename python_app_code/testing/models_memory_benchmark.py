@@ -0,0 +1,79 @@
+# This File contains a benchmark of the memory footprint and of the build and serialization times of the rows returned
+# by the task lookups: one RealDictRow per row (the former RealDictCursor results), one plain dictionary per row, and
+# the Task records of db_models. The rows are generated in memory, so the database is not needed. The serialization
+# uses the options of the orjson JSON provider of the app.
+# Launch it with `docker exec virtualization-level-1-prototype-app-python-1 python3 -m testing.models_memory_benchmark`
+# (`--rows` changes the number of rows, 1000000 by default).
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import date, timedelta
+import orjson
+from psycopg2.extras import RealDictRow
+from database_operations import db_models as dbmo
+from rest_api import api_json_provider
+
+STATUSES = ('Created', 'Done', 'Deleted', 'Dropped', 'Postponed')
+# Columns of the Task table, in the order of 'SELECT *'
+TABLE_COLUMNS = ("id", "task_name", "task_descrip", "creation_date", "task_status")
+
+def make_rows(count: int) -> list:
+    """
+    Returns rows like a plain cursor does, one new tuple and new strings per row, in the order of TABLE_COLUMNS.
+    """
+    days = [date(2024, 1, 1) + timedelta(days=i) for i in range(365)]
+    return [(i, "task {}".format(i), "description of the task {}".format(i), days[i % 365], STATUSES[i % 5])
+            for i in range(count)]
+
+def real_dict_rows(rows: list) -> list:
+    return [RealDictRow(zip(TABLE_COLUMNS, row)) for row in rows]
+
+def plain_dicts(rows: list) -> list:
+    return [dict(zip(TABLE_COLUMNS, row)) for row in rows]
+
+def task_records(rows: list) -> list:
+    return dbmo.from_rows(dbmo.Task, rows)
+
+def measure(build, rows: list) -> tuple:
+    """
+    Returns the memory allocated by the containers of the rows (the values themselves are shared by every variant),
+    the build time and the orjson serialization time.
+    """
+    # The build is timed apart, as tracing the allocations slows it down
+    gc.collect()
+    started = time.perf_counter()
+    result = build(rows)
+    build_time = time.perf_counter() - started
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = build(rows)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    started = time.perf_counter()
+    orjson.dumps(result, default=api_json_provider.default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SORT_KEYS)
+    dump_time = time.perf_counter() - started
+    del result
+    return allocated, build_time, dump_time
+
+def models_memory_benchmark(count: int) -> None:
+    rows = make_rows(count)
+    # The queries select the columns of the records in the order of Task.COLUMNS
+    positions = [TABLE_COLUMNS.index(column) for column in dbmo.Task.COLUMNS]
+    record_rows = [tuple(row[i] for i in positions) for row in rows]
+    print("{} rows".format(count))
+    for name, build, source in (("RealDictRow", real_dict_rows, rows), ("dict", plain_dicts, rows),
+                                ("Task record", task_records, record_rows)):
+        allocated, build_time, dump_time = measure(build, source)
+        print("{:<12} {:>8.1f} bytes/row {:>10.1f} MB total  build {:>7.3f} s  serialize {:>7.3f} s".format(
+            name, allocated / count, allocated / 1e6, build_time, dump_time))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compares the memory footprint of the row types.')
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+    models_memory_benchmark(args.rows)
+
+if __name__ == "__main__":
+    main()
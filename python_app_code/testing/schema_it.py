@@ -0,0 +1,121 @@
+# This File contains Integration Tests (ITs) for the indexes and the trigger of the v1.0.1 and v1.1 designs of the
+# postgres database (see database/migrations), which must have been applied with `bash database/migrate_db.sh`.
+# The hot queries of the app are explained on a seeded table and must be served by index scans, and the trigger
+# deactivating the due dates must only fire when a task moves into the 'Deleted' or 'Dropped' status.
+# Everything runs in a single transaction that is rolled back, the data of the database is left untouched.
+# As with the other ITs, PyUnit wasn't implemented, the test is launched manually and fails with an AssertionError.
+import json
+from psycopg2 import sql
+from database_operations import db_pool as dbp
+from database_operations import db_due_by_actions as dbda
+from database_operations import db_task_actions as dbta
+
+SEEDED_TASKS = 50000
+PAGE_SIZE = 100
+TRIGGER_NAME = 'task_status_update_trigger'
+TASK_STATUS_INDEXES = ('task_status_id_idx', 'task_not_removed_id_idx')
+# Versions of the design whose indexes and trigger are tested, as recorded by migrate_db.sh
+REQUIRED_VERSIONS = ('1.0', '1.0.1', '1.1')
+
+# 1% of the seeded tasks are 'Postponed', 1% 'Done' and the rest 'Deleted', which is what a long-lived table looks
+# like; each one has a due date, 10% of them active
+SEED_QUERIES = (
+    'INSERT INTO app."Task" (task_name, task_status) '
+    'SELECT \'schema_it \' || i, CASE i % 100 WHEN 0 THEN \'Postponed\' WHEN 1 THEN \'Done\' ELSE \'Deleted\' END '
+    'FROM generate_series(1, {0}) AS i'.format(SEEDED_TASKS),
+    'INSERT INTO app."Due_by" (task_id, due_date, is_active) '
+    'SELECT id, DATE \'2030-01-01\' + (id % 365), id % 10 = 0 FROM app."Task" WHERE task_name LIKE \'schema_it %\'',
+    'ANALYZE app."Task"',
+    'ANALYZE app."Due_by"',
+)
+
+def plan_nodes(plan: dict):
+    """
+    Walks a plan of EXPLAIN (FORMAT JSON) and its sub-plans.
+    """
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from plan_nodes(child)
+
+def explain(cur, query: sql.Composable, params: list, analyze: bool = False) -> dict:
+    options = 'ANALYZE, FORMAT JSON' if analyze else 'FORMAT JSON'
+    cur.execute(sql.SQL('EXPLAIN ({0}) '.format(options)) + query, params)
+    document = cur.fetchone()[0]
+    return (json.loads(document) if isinstance(document, str) else document)[0]
+
+def assert_index_scans(cur, name: str, query: sql.Composable, params: list, expected: tuple) -> None:
+    """
+    Checks that a query scans no table sequentially and that it uses one of the expected indexes: the planner may serve
+    a filter on the statuses that aren't removed from the partial index as well as from the index on the status.
+    """
+    nodes = list(plan_nodes(explain(cur, query, params)['Plan']))
+    seq_scans = [node['Relation Name'] for node in nodes if node['Node Type'] == 'Seq Scan']
+    assert not seq_scans, '{0}: sequential scan of {1}'.format(name, seq_scans)
+    indexes = {node['Index Name'] for node in nodes if 'Index Name' in node}
+    assert indexes.intersection(expected), '{0}: none of {1} used, the plan uses {2}'.format(name, expected,
+                                                                                            sorted(indexes))
+    print('{0}: index scans only, using {1}.'.format(name, ', '.join(sorted(indexes))))
+
+def migrations_test(cur) -> None:
+    cur.execute('SELECT version FROM app.schema_migrations')
+    missing = set(REQUIRED_VERSIONS).difference(row[0] for row in cur)
+    assert not missing, 'Design versions {} not applied, run `bash database/migrate_db.sh`'.format(sorted(missing))
+    print('Design versions {} applied.'.format(', '.join(REQUIRED_VERSIONS)))
+
+def hot_queries_test(cur) -> None:
+    queries = {
+        "tasks by status": (dbta.compose_tasks_query(PAGE_SIZE, task_status=['Postponed']), TASK_STATUS_INDEXES),
+        "tasks by status, next page": (dbta.compose_tasks_query(PAGE_SIZE, after_id=1000,
+                                                                task_status=['Postponed', 'Done']), TASK_STATUS_INDEXES),
+        "tasks not removed": (dbta.compose_tasks_query(PAGE_SIZE, exclude_removed=True), ('task_not_removed_id_idx',)),
+        "tasks with active due date": (dbta.compose_tasks_query(PAGE_SIZE, exclude_removed=True,
+                                                                include=dbta.INCLUDE_ACTIVE_DUE_BY), ('Due_by_pkey',)),
+        "active due dates in range": (dbda.compose_due_dates_query('2030-02-01', '2030-02-07', limit=PAGE_SIZE),
+                                      ('due_by_active_due_date_idx',)),
+    }
+    for name, ((query, params), expected) in queries.items():
+        assert_index_scans(cur, name, query, params, expected)
+
+def trigger_calls(cur, query: str, params: tuple) -> tuple:
+    """
+    Runs an update of the tasks under EXPLAIN ANALYZE.
+
+    Returns:
+        tuple: The number of updated rows and the number of calls of the trigger deactivating the due dates.
+    """
+    result = explain(cur, sql.SQL(query), list(params), analyze=True)
+    calls = sum(trigger['Calls'] for trigger in result.get('Triggers', ()) if trigger['Trigger Name'] == TRIGGER_NAME)
+    return result['Plan']['Actual Rows'], calls
+
+def trigger_test(cur) -> None:
+    rows, calls = trigger_calls(cur, 'UPDATE app."Task" SET task_descrip = %s WHERE task_status = %s RETURNING id',
+                                ('renamed', 'Postponed'))
+    assert rows > 0 and calls == 0, 'The trigger fired {0} times when describing {1} tasks'.format(calls, rows)
+    print('Describing {0} tasks fires no trigger.'.format(rows))
+
+    # As by PUT /tasks/<id>, whose update sets the status to itself when it isn't changed
+    rows, calls = trigger_calls(cur, 'UPDATE app."Task" SET task_name = task_name, task_status = task_status '
+                                     'WHERE task_status = %s RETURNING id', ('Deleted',))
+    assert rows > 0 and calls == 0, 'The trigger fired {0} times when updating {1} deleted tasks'.format(calls, rows)
+    print('Updating {0} already deleted tasks fires no trigger.'.format(rows))
+
+    rows, calls = trigger_calls(cur, 'UPDATE app."Task" SET task_status = %s WHERE task_status = %s RETURNING id',
+                                ('Dropped', 'Postponed'))
+    assert rows > 0 and calls == rows, 'The trigger fired {0} times when dropping {1} tasks'.format(calls, rows)
+    cur.execute('SELECT count(*) FROM app."Due_by" AS d JOIN app."Task" AS t ON t.id = d.task_id '
+                'WHERE t.task_status = \'Dropped\' AND d.is_active')
+    assert cur.fetchone()[0] == 0, 'Dropped tasks still have active due dates'
+    print('Dropping {0} tasks fires the trigger once each and deactivates their due dates.'.format(rows))
+
+def schema_testing_console():
+    print("I'll check the hot queries and the trigger against {} seeded tasks:".format(SEEDED_TASKS))
+    with dbp.connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                migrations_test(cur)
+                for query in SEED_QUERIES:
+                    cur.execute(query)
+                hot_queries_test(cur)
+                trigger_test(cur)
+        finally:
+            conn.rollback()
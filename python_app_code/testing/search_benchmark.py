@@ -0,0 +1,119 @@
+# This File contains a scaling test of the task search (GET /tasks/search, see db_task_actions.search_tasks()): the
+# Task table is filled with generated tasks up to each of the given sizes (a million by default), and the queries of a
+# few typical searches, from a rare word to the most common one, are timed at every size. It fails if the median
+# duration of a search exceeds the budget, which shows whether the search keeps up as the table grows.
+# The generated words follow a Zipf-like distribution, as in real text: a few words are in most tasks, most of them
+# in a handful. Everything runs in a single transaction that is rolled back, the data of the database is left untouched.
+# The design v1.2 must have been applied with `bash database/migrate_db.sh`.
+# Launch it with `docker exec virtualization-level-1-prototype-app-python-1 python3 -m testing.search_benchmark`
+# (`--sizes 10000,100000,1000000`, `--runs 20` and `--budget-ms 50` are the defaults).
+import argparse
+import random
+import statistics
+import sys
+import time
+from database_operations import db_config as dbc, db_pool as dbp, db_task_actions as dbta
+from rest_api import api_operations_utils as aou
+
+VOCABULARY_SIZE = 5000
+SYLLABLES = ('ba', 'ke', 'lo', 'mi', 'nu', 'pa', 're', 'si', 'to', 'va', 'dor', 'fen', 'gar', 'lin', 'mos', 'ter')
+STATUSES = ['Created', 'Done', 'Deleted', 'Dropped', 'Postponed']
+# Tasks of two words and descriptions of six, the words being drawn with a probability inversely proportional to
+# their rank in the vocabulary. The description refers to the row so that it is drawn again for every task.
+SEED_QUERY = (
+    'INSERT INTO app."Task" (task_name, task_descrip, task_status) '
+    'SELECT left(w[floor(%(n)s ^ random())::int] || \' \' || w[floor(%(n)s ^ random())::int], 20), '
+    'array_to_string(ARRAY(SELECT w[floor(%(n)s ^ random())::int] FROM generate_series(1, 6 + 0 * i)), \' \'), '
+    '(%(statuses)s)[1 + floor(random() * 5)::int] '
+    'FROM (SELECT %(words)s::text[] AS w) AS v, generate_series(1, %(count)s) AS i')
+GIN_INDEXES = ('task_search_vector_idx', 'task_name_trgm_idx')
+
+def make_vocabulary() -> list:
+    """
+    Returns VOCABULARY_SIZE distinct pronounceable words, always the same ones.
+    """
+    generator = random.Random(42)
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add(''.join(generator.choice(SYLLABLES) for _ in range(generator.randint(2, 4))))
+    return sorted(words, key=lambda word: (len(word), word))
+
+def make_searches(words: list) -> dict:
+    """
+    Returns the searched texts by name, the most common words being the first of the vocabulary.
+    """
+    typo = words[20][:2] + words[20][3] + words[20][2] + words[20][4:]
+    return {"rare word": words[4000],
+            "common word": words[0],
+            "prefix": words[50][:3],
+            "two words": '{0} {1}'.format(words[10], words[300]),
+            "typo": typo,
+            "rare word, not removed": words[4000]}
+
+def seed(cur, words: list, count: int) -> None:
+    cur.execute(SEED_QUERY, {"n": len(words), "words": words, "statuses": STATUSES, "count": count})
+    # The entries of the GIN indexes are first put in a pending list, merged on VACUUM, which can't run here
+    for index in GIN_INDEXES:
+        cur.execute('SELECT gin_clean_pending_list(c.oid) FROM pg_class AS c WHERE c.oid = to_regclass(%s)',
+                    ('app.' + index,))
+    cur.execute('ANALYZE app."Task"')
+
+def time_search(cur, text: str, exclude_removed: bool, fuzzy: bool, max_candidates, runs: int) -> tuple:
+    """
+    Runs the query of a search, as composed by search_tasks(), several times.
+
+    Returns:
+        tuple: The median duration in seconds and the number of tasks found (one page at most).
+    """
+    terms = aou.SEARCH_TERM_PATTERN.findall(text.lower())[:aou.MAX_SEARCH_TERMS]
+    query, params = dbta.compose_task_search_query(terms, aou.DEFAULT_SEARCH_PAGE_SIZE, exclude_removed=exclude_removed,
+                                                   fuzzy=fuzzy, max_candidates=max_candidates)
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        cur.execute(query, params)
+        found = len(cur.fetchall())
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations), found
+
+def search_benchmark(sizes: list, runs: int, budget: float) -> bool:
+    search_config = dbc.get_config().section('search')
+    fuzzy = search_config.get('fuzzy', 'true').lower() == 'true'
+    max_candidates = int(search_config.get('max_candidates', 2000)) or None
+    words = make_vocabulary()
+    searches = make_searches(words)
+    within_budget = True
+    with dbp.connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute('SELECT setseed(0.42)')
+                cur.execute('SELECT count(*) FROM app."Task"')
+                count = cur.fetchone()[0]
+                for size in sizes:
+                    started = time.perf_counter()
+                    seed(cur, words, max(size - count, 0))
+                    count = max(size, count)
+                    print('{0} tasks (seeded in {1:.1f} s), fuzzy={2}, max_candidates={3}'.format(
+                        count, time.perf_counter() - started, fuzzy, max_candidates))
+                    for name, text in searches.items():
+                        duration, found = time_search(cur, text, name.endswith('not removed'), fuzzy, max_candidates,
+                                                      runs)
+                        within_budget = within_budget and duration <= budget
+                        print('    {0:<24} {1:<18} {2:>8.2f} ms  {3:>3} found{4}'.format(
+                            name, repr(text), duration * 1e3, found, '' if duration <= budget else '  OVER BUDGET'))
+        finally:
+            conn.rollback()
+    return within_budget
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measures the task search as the Task table grows.')
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma-separated sizes of the table.')
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--budget-ms', type=float, default=50, help='Maximum median duration of a search.')
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    if not search_benchmark(sizes, args.runs, args.budget_ms / 1000):
+        sys.exit('Some searches exceeded the budget of {} ms.'.format(args.budget_ms))
+
+if __name__ == "__main__":
+    main()
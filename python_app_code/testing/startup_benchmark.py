@@ -0,0 +1,112 @@
+# This File contains a benchmark of the cold start of a worker of the Python back-end, in production and in debug mode
+# (FLASK_DEBUG), which serves the testing blueprints too. It doesn't need the database.
+# - Without preloading, each worker is a new interpreter that imports app.py and calls create_app(): this is timed in
+#   fresh interpreters traced with `-X importtime`, and the import time is broken down per top-level package.
+# - With preloading (the default of gunicorn.conf.py), each worker is forked from the master and only runs the
+#   post_fork hook of gunicorn.conf.py: this is timed from the fork until the hook returns.
+# Launch it with `docker exec virtualization-level-1-prototype-app-python-1 python3 -m testing.startup_benchmark`
+# (`--runs` changes the number of runs, 10 by default).
+import argparse
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+
+APP_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Packages of the app, the other ones are third-party or standard library ones
+APP_PACKAGES = ('app', 'rest_api', 'database_operations', 'testing')
+TOP_PACKAGES = 8
+COLD_START = """
+import time
+started = time.perf_counter()
+import app
+app.create_app()
+print(time.perf_counter() - started)
+"""
+
+def parse_import_times(trace: str) -> dict:
+    """
+    Sums the time spent importing each top-level package, out of the output of `-X importtime`.
+
+    Returns:
+        dict: The time in seconds per top-level package, only counting the modules' own time.
+    """
+    times = defaultdict(float)
+    for line in trace.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, _, name = line[len('import time:'):].split('|')
+        times[name.strip().split('.')[0]] += int(self_time) / 1e6
+    return times
+
+def cold_start(debug: bool) -> tuple:
+    """
+    Starts a new interpreter importing the app and creating it, as a worker does without preloading.
+
+    Returns:
+        tuple: The duration of the import and creation of the app, and the import time per top-level package.
+    """
+    env = dict(os.environ, FLASK_DEBUG='true' if debug else 'false')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', COLD_START], cwd=APP_DIRECTORY, env=env,
+                            capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1]), parse_import_times(result.stderr)
+
+def forked_start(post_fork, workers: int) -> float:
+    """
+    Forks the current process and runs the post_fork hook in the child, as the master of gunicorn does.
+
+    Returns:
+        float: The duration from the fork until the hook returned in the child.
+    """
+    read_end, write_end = os.pipe()
+    started = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        post_fork(SimpleNamespace(num_workers=workers), None)
+        os.write(write_end, repr(time.perf_counter()).encode())
+        os._exit(0)
+    os.close(write_end)
+    with os.fdopen(read_end) as reader:
+        finished = float(reader.read())
+    os.waitpid(pid, 0)
+    return finished - started
+
+def startup_benchmark(runs: int) -> None:
+    for debug in (False, True):
+        durations, packages = [], defaultdict(list)
+        for _ in range(runs):
+            duration, times = cold_start(debug)
+            durations.append(duration)
+            for package, package_time in times.items():
+                packages[package].append(package_time)
+        app_time = sum(statistics.median(packages[package]) for package in APP_PACKAGES if package in packages)
+        print("{:<10} cold start {:>7.1f} ms (median of {} runs), of which the app's own modules {:>6.1f} ms".format(
+            "debug" if debug else "production", statistics.median(durations) * 1e3, runs, app_time * 1e3))
+        medians = sorted(((statistics.median(times), package) for package, times in packages.items()), reverse=True)
+        for package_time, package in medians[:TOP_PACKAGES]:
+            print("    {:<24} {:>7.1f} ms".format(package, package_time * 1e3))
+
+    # Preloaded app, the master imports and creates it once before forking the workers
+    sys.path.insert(0, APP_DIRECTORY)
+    import app
+    app.create_app()
+    spec = importlib.util.spec_from_file_location('gunicorn_conf', os.path.join(APP_DIRECTORY, 'gunicorn.conf.py'))
+    gunicorn_conf = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gunicorn_conf)
+    durations = [forked_start(gunicorn_conf.post_fork, gunicorn_conf.workers) for _ in range(runs)]
+    print("{:<10} forked worker start {:>7.1f} ms (median of {} runs)".format(
+        "preloaded", statistics.median(durations) * 1e3, runs))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measures the cold start of a worker.')
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+    startup_benchmark(args.runs)
+
+if __name__ == "__main__":
+    main()
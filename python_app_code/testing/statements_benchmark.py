@@ -0,0 +1,51 @@
+# This File contains a benchmark of the hot lookups, run with literal composition (each call builds its own query text
+# with sql.Literal) and with the prepared statements of db_statements, against the postgres database.
+# Launch it with `docker exec virtualization-level-1-prototype-app-python-1 python3 -m testing.statements_benchmark`
+import time
+from psycopg2 import sql
+from database_operations import db_pool as dbp, db_statements as dbst, db_task_actions as dbta
+
+ITERATIONS = 5000
+
+def literal_select_task(cur, task_id: int) -> None:
+    select_query = sql.SQL('SELECT * FROM app."Task" WHERE id = {0}').format(sql.Literal(task_id))
+    cur.execute(select_query)
+    cur.fetchall()
+
+def prepared_select_task(cur, task_id: int) -> None:
+    dbst.execute(cur, 'task_select', (task_id,))
+    cur.fetchall()
+
+def literal_select_due_by(cur, task_id: int) -> None:
+    select_query = sql.SQL('SELECT * FROM app."Due_by" WHERE task_id = {0} ORDER BY due_date').format(sql.Literal(task_id))
+    cur.execute(select_query)
+    cur.fetchall()
+
+def prepared_select_due_by(cur, task_id: int) -> None:
+    dbst.execute(cur, 'due_by_select', (task_id,))
+    cur.fetchall()
+
+def run(name: str, operation, task_ids: list, iterations: int = ITERATIONS) -> float:
+    with dbp.connection() as conn:
+        with conn.cursor() as cur:
+            # Warm-up, which also prepares the statement on this connection
+            operation(cur, task_ids[0])
+            started = time.perf_counter()
+            for i in range(iterations):
+                operation(cur, task_ids[i % len(task_ids)])
+            elapsed = time.perf_counter() - started
+    print("{:<24} {:>10.1f} calls/s {:>8.1f} us/call".format(name, iterations / elapsed, elapsed / iterations * 1e6))
+    return elapsed
+
+def statements_benchmark() -> None:
+    task_ids = dbta.insert_tasks_batch([{"task_name": "bench {}".format(i), "due_date": "2030-01-01"} for i in range(100)])
+    for label, literal, prepared in (("task by id", literal_select_task, prepared_select_task),
+                                     ("due dates of a task", literal_select_due_by, prepared_select_due_by)):
+        print("\n" + label)
+        literal_time = run("literal composition", literal, task_ids)
+        prepared_time = run("prepared statement", prepared, task_ids)
+        print("speed-up: {:.2f}x".format(literal_time / prepared_time))
+    print("\nStatement counters:", dbst.stats())
+
+if __name__ == "__main__":
+    statements_benchmark()